@@ -63,6 +63,8 @@ class CfdCaseWriterFoam:
     def write_case(self, updating=False):
         """ Write_case() will collect case setings, and finally build a runnable case
         """
+        if self.builder.isRestarting():
+            return self.write_restart()
         self.builder.createCase()  # move from init() to here, to avoid case folder overwriting after result Obtained
         FreeCAD.Console.PrintMessage("Start to write case to folder {}\n".format(self.solver_obj.WorkingDir))
         _cwd = os.curdir
@@ -83,6 +85,16 @@ class CfdCaseWriterFoam:
                                                         self.solver_obj.SolverName, self.solver_obj.WorkingDir))
         return True
 
+    def write_restart(self):
+        """ restart mode: keep the case and its results, only controlDict and Allrun are updated
+        so the solver continues from the latest time folder
+        """
+        end_time = self.solver_obj.EndTime if self.solver_obj.Transient else None
+        end_time = self.builder.setupRestart(endTime=end_time)
+        FreeCAD.Console.PrintMessage("{} case in folder {} is set to restart from the latest time to endTime {}\n".format(
+                                                        self.solver_obj.SolverName, self.case_folder, end_time))
+        return True
+
     def write_mesh(self):
         """ This is FreeCAD specific code, convert from UNV to OpenFoam
         """
@@ -27,17 +27,33 @@ import platform
 import os
 from PySide import QtCore
 import FreeCAD
+from FoamCaseBuilder.outputbuffer import OutputBuffer
+from FoamCaseBuilder.procmonitor import ResourceSampler, format_summary
 
 
 class CfdConsoleProcess:
     """ Class to run a console process asynchronously, printing output and
     errors to the FreeCAD console and allowing clean termination in Linux
-    and Windows """
-    def __init__(self, finishedHook=None, stdoutHook=None, stderrHook=None):
+    and Windows
+
+    Output is not accumulated: the whole stream goes to logFile only, the latest
+    bufferLines lines are kept for display (recentOutput), hooks receive the new
+    complete lines in one batch every hookInterval milliseconds, and at most
+    echoLines lines per batch are echoed to the console """
+    def __init__(self, finishedHook=None, stdoutHook=None, stderrHook=None, logFile=None,
+                 bufferLines=2000, hookInterval=250, echoLines=100):
         self.process = QtCore.QProcess()
         self.finishedHook = finishedHook
         self.stdoutHook = stdoutHook
         self.stderrHook = stderrHook
+        self.logFile = logFile
+        self.log = None
+        self.resourceSampler = None
+        self.stdout = OutputBuffer(bufferLines, echoLines)
+        self.stderr = OutputBuffer(bufferLines, echoLines)
+        self.timer = QtCore.QTimer()
+        self.timer.setInterval(hookInterval)
+        self.timer.timeout.connect(self.deliverOutput)
         self.process.finished.connect(self.finished)
         self.process.readyReadStandardOutput.connect(self.readStdout)
         self.process.readyReadStandardError.connect(self.readStderr)
@@ -60,6 +76,13 @@ class CfdConsoleProcess:
                    '-u',  # Prevent python from buffering stdout
                    os.path.join(os.path.dirname(__file__), "WindowsRunWrapper.py")] + cmd
         print("Raw command: ", cmd)
+        self.stdout.clear()
+        self.stderr.clear()
+        if self.logFile:  # stdout and stderr interleaved as they are read, like `tee`
+            self.log = open(self.logFile, 'wb')
+            self.stdout.log = self.stderr.log = self.log
+        if self.timer.interval():
+            self.timer.start()
         self.process.start(cmd[0], cmd[1:])
 
     def terminate(self):
@@ -73,29 +96,58 @@ class CfdConsoleProcess:
         self.process.waitForFinished()
 
     def finished(self, exit_code):
+        self.readStdout()
+        self.readStderr()
+        self.stdout.flush()
+        self.stderr.flush()
+        self.timer.stop()
+        self.deliverOutput()
+        if self.log:
+            self.log.close()
+            self.log = self.stdout.log = self.stderr.log = None
+        if self.resourceSampler:
+            print(format_summary(self.resourceSampler.stop()), end='')
+            self.resourceSampler = None
         if self.finishedHook:
             self.finishedHook(exit_code)
 
     def readStdout(self):
-        # Ensure only complete lines are passed on
-        text = ""
-        while self.process.canReadLine():
-            text += str(self.process.readLine())
-        print(text, end='')  # Avoid displaying on FreeCAD status bar
-        if self.stdoutHook:
-            self.stdoutHook(text)
+        # Only complete lines are passed on, in batches by deliverOutput()
+        self.stdout.feed(self.process.readAllStandardOutput().data())
+        if not self.timer.interval():
+            self.deliverOutput()
 
     def readStderr(self):
-        # Ensure only complete lines are passed on
-        # Print any error output to console
-        self.process.setReadChannel(QtCore.QProcess.StandardError)
-        text = ""
-        while self.process.canReadLine():
-            text += str(self.process.readLine())
-        if self.stderrHook:
+        self.stderr.feed(self.process.readAllStandardError().data())
+        if not self.timer.interval():
+            self.deliverOutput()
+
+    def deliverOutput(self):
+        """ Pass the lines read since the last call to the hooks and echo them to the console """
+        if self.log:
+            self.log.flush()  # for the readers tailing the log
+        text, echo = self.stdout.take()
+        if echo:
+            print(echo, end='')  # Avoid displaying on FreeCAD status bar
+        if text and self.stdoutHook:
+            self.stdoutHook(text)
+        text, echo = self.stderr.take()
+        if text and self.stderrHook:
             self.stderrHook(text)
-        FreeCAD.Console.PrintError(text)
-        self.process.setReadChannel(QtCore.QProcess.StandardOutput)
+        if echo:  # Print any error output to console
+            FreeCAD.Console.PrintError(echo)
+
+    def startResourceMonitor(self, case=None, solver=None, interval=1.0):
+        """ Sample CPU, memory and I/O of the solver ranks below the started process until it finishes,
+        the series and the load imbalance summary are saved as `log.<solver>.resources.*` in the case """
+        pid = self.process.processId() if hasattr(self.process, 'processId') else self.process.pid()
+        if pid:
+            self.resourceSampler = ResourceSampler(pid, case, solver, interval).start()
+        return self.resourceSampler
+
+    def recentOutput(self, lines=None):
+        """ Latest lines of stdout kept in the ring buffer, the full output is in logFile """
+        return self.stdout.recent(lines)
 
     def state(self):
         return self.process.state()
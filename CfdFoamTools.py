@@ -63,6 +63,8 @@ from FoamCaseBuilder import supported_radiation_models
 from FoamCaseBuilder import getVariableList
 from FoamCaseBuilder.utility import getFoamRuntime, getFoamVersion
 from FoamCaseBuilder.utility import reverseTranslatePath, translatePath, makeRunCommand
+from FoamCaseBuilder.utility import getFoamEnvironment, makeFoamCommand
+from FoamCaseBuilder.procmonitor import application_name
 from FoamCaseBuilder.utility import getFoamDir as detectFoamDir
 
 
@@ -122,6 +124,17 @@ def getRunEnvironment():
     else:
         return {}
 
+
+def makeConsoleCommand(cmdline, case=None):
+    """ Return (command list, environment variables, working dir) to start by CfdConsoleProcess
+    On Posix, the command is assembled by FoamCaseBuilder.utility.makeFoamCommand() from the OpenFOAM environment
+    snapshot, so etc/bashrc is not sourced for every command.
+    """
+    command = makeFoamCommand(cmdline, case) if getFoamRuntime() == "Posix" else None
+    if command is None:
+        return makeRunCommand(cmdline, case), getRunEnvironment(), None
+    return command
+
 # it may bypass the requirement: python.Popen() must run from terminal
 # but it is based on QProcess, so need eventloop
 class CfdFoamProcess:
@@ -131,7 +144,8 @@ class CfdFoamProcess:
 
     def run(self, cmdline, case=None):
         print("Running ", cmdline)
-        self.process.start(makeRunCommand(cmdline, case), env_vars=getRunEnvironment())
+        cmd, env_vars, working_dir = makeConsoleCommand(cmdline, case)
+        self.process.start(cmd, env_vars=env_vars, working_dir=working_dir)
         if not self.process.waitForFinished():
             print("Error: Unable to run command " + cmdline)
             #raise Exception("Unable to run command " + cmdline)
@@ -156,12 +170,14 @@ def runFoamCommand(cmdline, case=None):
     return proc.output
 
 
-def startFoamApplication(cmd, case, finishedHook=None, stdoutHook=None, stderrHook=None):
+def startFoamApplication(cmd, case, finishedHook=None, stdoutHook=None, stderrHook=None, monitorInterval=None):
     """ Run OpenFOAM application and automatically generate the log.application file.
         Returns a CfdConsoleProcess object after launching
         cmd  - List or string with the application being the first entry followed by the options.
               e.g. ['transformPoints', '-scale', '"(0.001 0.001 0.001)"']
         case - Case path
+        monitorInterval - Seconds between samples of CPU, memory and I/O per rank, saved to
+              log.application.resources.* in the case, None for no sampling
     """
     if isinstance(cmd, list) or isinstance(cmd, tuple):
         cmds = cmd
@@ -173,18 +189,27 @@ def startFoamApplication(cmd, case, finishedHook=None, stdoutHook=None, stderrHo
     app = cmds[0].rsplit('/', 1)[-1]
     logFile = "log.{}".format(app)
 
-    cmdline = ' '.join(cmds)  # Space to separate options
-    # Pipe to log file and terminal
-    cmdline += " 1> >(tee -a " + logFile + ") 2> >(tee -a " + logFile + " >&2)"
-    # Tee appends to the log file, so we must remove first. Can't do directly since
-    # paths may be specified using variables only available in foam runtime environment.
-    cmdline = "{{ rm {}; {}; }}".format(logFile, cmdline)
-
-    proc = CfdConsoleProcess.CfdConsoleProcess(finishedHook=finishedHook, stdoutHook=stdoutHook, stderrHook=stderrHook)
+    if getFoamRuntime() == "Posix" and getFoamEnvironment() is not None:
+        # No shell to tee: the process writes its output to the log file
+        cmd, env_vars, working_dir = makeConsoleCommand(cmds, case)
+        proc = CfdConsoleProcess.CfdConsoleProcess(finishedHook=finishedHook, stdoutHook=stdoutHook,
+                                                   stderrHook=stderrHook, logFile=os.path.join(working_dir, logFile))
+    else:
+        cmdline = ' '.join(cmds)  # Space to separate options
+        # Pipe to log file and terminal
+        cmdline += " 1> >(tee -a " + logFile + ") 2> >(tee -a " + logFile + " >&2)"
+        # Tee appends to the log file, so we must remove first. Can't do directly since
+        # paths may be specified using variables only available in foam runtime environment.
+        cmdline = "{{ rm {}; {}; }}".format(logFile, cmdline)
+        cmd, env_vars, working_dir = makeRunCommand(cmdline, case), getRunEnvironment(), None
+        proc = CfdConsoleProcess.CfdConsoleProcess(finishedHook=finishedHook, stdoutHook=stdoutHook,
+                                                   stderrHook=stderrHook)
     print("Running ", ' '.join(cmds), " -> ", logFile)
-    proc.start(makeRunCommand(cmdline, case), env_vars=getRunEnvironment())
+    proc.start(cmd, env_vars=env_vars, working_dir=working_dir)
     if not proc.waitForStarted():
         raise Exception("Unable to start command " + ' '.join(cmds))
+    if monitorInterval:
+        proc.startResourceMonitor(case, application_name(cmds), monitorInterval)
     return proc
 
 def runFoamApplication(cmd, case):
@@ -47,6 +47,7 @@ class CfdRunnableFoam(_CfdRunnable):
             self.ploter = FoamResidualPloter.FoamResidualPloter()
         else:
             pass  # consider use the PyFoam's residual watcher
+        self.convergence_watcher = None
 
     def check_prerequisites(self):
         return ""
@@ -77,7 +78,36 @@ class CfdRunnableFoam(_CfdRunnable):
         from importCfdResultFoamVTK import importCfdResult
         importCfdResult(result, self.analysis)
 
+    def solve_finished(self, exit_code):
+        if self.convergence_watcher and self.convergence_watcher.stop_reason:
+            FreeCAD.Console.PrintMessage("Solver is stopped early, {}\n".format(self.convergence_watcher.stop_reason))
+            self.convergence_watcher.restore()  # stopAt writeNow would stop the next run at its first step
+        self.convergence_watcher = None  # a new watcher for the next run
+        self.attach_profile_report()
+
+    def attach_profile_report(self):
+        """ profile the solver log, save `log.<solver>.profile.json/txt` and attach the text to the solver
+        """
+        from FoamCaseBuilder.logreport import profile_log, format_report, save_report
+        case_path = self.solver.WorkingDir + os.path.sep + self.solver.InputCaseName
+        log_file = case_path + os.path.sep + "log." + self.writer.builder.getSolverName()
+        if not os.path.exists(log_file):
+            FreeCAD.Console.PrintWarning("Solver log {} is not found for profiling\n".format(log_file))
+            return None
+        self.profile_report = profile_log(log_file)
+        save_report(self.profile_report, log_file + ".profile")
+        if "ProfileReport" in self.solver.PropertiesList:
+            self.solver.ProfileReport = format_report(self.profile_report)
+        return self.profile_report
+
     def process_output(self, text):
+        # the residuals of a transient run level off within each time step, only a steady run is watched
+        if getattr(self.solver, "StopOnStalledResiduals", False) and not self.solver.Transient:
+            if self.convergence_watcher is None:
+                from FoamCaseBuilder.convergence import ConvergenceWatcher
+                case_path = self.solver.WorkingDir + os.path.sep + self.solver.InputCaseName
+                self.convergence_watcher = ConvergenceWatcher(case_path)
+            self.convergence_watcher.feed(text)
         if using_freecad_plot:
             self.ploter.process_text(text)
             self.ploter.refresh()
@@ -115,6 +115,8 @@ def getDefaultSolverSettings():
             #
             'templateCasePath': None,  # New feature in 2020, control how case is created
             'caseCreationMode': "fromScratch",
+            'writeCompression': False,  # gzip initial fields and set `writeCompression on` in controlDict
+            'restartFromLatestTime': False,  # keep the case and its results, continue the solver from the latest time
             # heat transfer specific properties
             'heatTransfering':False,
             'conjugate': False, # conjugate heat transfer (CHT)
@@ -346,6 +348,9 @@ class BasicBuilder(object):
 
     def createCase(self):
         # TODO:        self._solverSettings["caseCreationMode"]
+        if self.isRestarting():  # the case folder with results is kept
+            self.setupRestart()
+            return
         if self._templatePath:
             createCaseFromTemplate(self._casePath, self._templatePath)
         else:
@@ -389,29 +394,92 @@ class BasicBuilder(object):
     # TODO: setupCase()  or setup() could be a better name
     def build(self):
         # if case is built from clone/template, this function should not be called, or called with diff build_level
-        self.setupBoundaryConditions()
-        self.setupInternalFields()
-        # build_level 
-        self.setupFluidProperties()  # materials properties
-        self.setupTurbulenceProperties()
+        if self.isRestarting():  # case setup of the interrupted run is kept, createCase() has set up the restart
+            return
+        write_report.clear(self._casePath)
+        with CaseSession(self._casePath):  # field files are written once at the end
+            self.setupBoundaryConditions()
+            self.setupInternalFields()
+            # build_level 
+            self.setupFluidProperties()  # materials properties
+            self.setupTurbulenceProperties()
+
+            if self._solverSettings['transient']:
+                self.setupSolverControl()
+            if self._solverSettings['parallel']:
+                # see: http://cfd.direct/openfoam/user-guide/running-applications-parallel/
+                self.setupParallelSettings(self._paralleSettings)
+                # it is the CfdRunnalbe to mpirun and recompose the result and show result
+            if self._solverSettings['buoyant']:
+                self.setupGravityProperties()
+            if self._solverSettings['dynamicMeshing']:
+                self.setupDynamicMeshingProperties()
+            self.setupSolverControl() # residual, relaxfactor refValue, refCell etc
+
+            # Move mesh files, after being edited, to polyMesh.org
+            #movePolyMesh(self._casePath)  # make trouble in WSL for ln -s command in Allrun script
+        if self._solverSettings.get('writeCompression', False):
+            self.setupWriteCompression()
+        if _debug: print("Info: build case: " + write_report.summary(self._casePath))
+
+    def setupWriteCompression(self):
+        """ initial fields are stored as `0/U.gz`, solver output is also compressed
+        """
+        compressFieldFiles(self._casePath, '0')
+        f = ParsedParameterFile(self._casePath + "/system/controlDict")
+        f["writeCompression"] = "on"
+        f.writeFile()
 
-        if self._solverSettings['transient']:
-            self.setupSolverControl()
-        if self._solverSettings['parallel']:
-            # see: http://cfd.direct/openfoam/user-guide/running-applications-parallel/
-            self.setupParallelSettings()
-            # it is the CfdRunnalbe to mpirun and recompose the result and show result
-        if self._solverSettings['buoyant']:
-            self.setupGravityProperties()
-        if self._solverSettings['dynamicMeshing']:
-            self.setupDynamicMeshingProperties()
-        self.setupSolverControl() # residual, relaxfactor refValue, refCell etc
+    def isRestarting(self):
+        """ restart mode: `restartFromLatestTime` is set and the case has results to continue from
+        """
+        return bool(self._solverSettings.get('restartFromLatestTime', False)) and \
+            getLatestTime(self._casePath) is not None
+
+    def setupRestart(self, endTime=None, extendTime=None):
+        """ continue the solver from the latest time folder, time folders and results are left untouched
+        set `startFrom latestTime` in controlDict and extend endTime beyond the latest time:
+        to endTime if given, otherwise by extendTime, otherwise keep the endTime of an interrupted run,
+        or extend a finished run by its original duration. The Allrun script is rewritten without
+        initialisation and decomposition. Return the new endTime.
+        """
+        latest = getLatestTime(self._casePath)
+        if latest is None:
+            raise IOError("Error: no result time folder in case {} to restart from".format(self._casePath))
+        latestTime = float(latest)
+        f = ParsedParameterFile(self._casePath + "/system/controlDict")
+        startTime = float(f["startTime"]) if "startTime" in f else 0.0
+        currentEndTime = float(f["endTime"])
+        if endTime is not None and float(endTime) > latestTime:
+            newEndTime = endTime
+        elif extendTime:
+            newEndTime = latestTime + extendTime
+        elif currentEndTime > latestTime:
+            newEndTime = currentEndTime
+        else:
+            newEndTime = latestTime + (currentEndTime - startTime)
+        newEndTime = float(newEndTime)
+        if newEndTime.is_integer():  # iterations of steady solvers
+            newEndTime = int(newEndTime)
+        f["startFrom"] = "latestTime"
+        f["stopAt"] = "endTime"
+        f["endTime"] = newEndTime
+        f.writeFile()
 
-        # Move mesh files, after being edited, to polyMesh.org
-        #movePolyMesh(self._casePath)  # make trouble in WSL for ln -s command in Allrun script
+        # keep the log of the previous run, Allrun overwrites log.<solver>
+        log_file = self._casePath + os.path.sep + "log." + self._solverName
+        if os.path.exists(log_file):
+            os.rename(log_file, log_file + "." + latest)
+        createRunScript(self._casePath, self._solverSettings['potentialInit'], self._solverSettings['parallel'],
+                        self._solverName, self._paralleSettings['numberOfSubdomains'], restart=True)
+        print("Info: restart {} from time {} to endTime {}".format(self._solverName, latest, newEndTime))
+        return newEndTime
 
     def setupMesh(self, mesh_path, scale):
         # create mesh by conversion from other mesh file format
+        if self.isRestarting():
+            print("Info: mesh is not converted again in restart mode")
+            return
         if os.path.exists(mesh_path):
             convertMesh(self._casePath, mesh_path, scale)
 
@@ -462,7 +530,7 @@ class BasicBuilder(object):
     def _summarizeInternalFields(self):
         print("Solver created fields are initialized with value:\n")
         for var in self._solverCreatedVariables:
-            f = ParsedParameterFile(self._casePath + os.path.sep + "0" + os.path.sep + var)
+            f = openFieldFile(self._casePath + os.path.sep + "0" + os.path.sep + var)
             print("    {}:      {}".format(var, f['internalField']))
 
     def editCase(self):
@@ -503,6 +571,27 @@ class BasicBuilder(object):
             return vtk_files[-1]
 
 
+    def getPipeline(self, mesh_path=None, scale=None, export_vtk=False):
+        """ pipeline of mesh conversion, solver and post-processing steps, run with step caching:
+        `asyncio.run(builder.getPipeline(mesh_path, 0.001).run())`, needs python 3.7+
+        """
+        from .pipeline import case_pipeline
+        restart = self.isRestarting()
+        return case_pipeline(self._casePath, self._solverName, mesh_file=None if restart else mesh_path,
+                             scale=None if restart else scale,
+                             init_potential=self._solverSettings['potentialInit'],
+                             run_parallel=self._solverSettings['parallel'],
+                             num_proc=self._paralleSettings['numberOfSubdomains'], export_vtk=export_vtk,
+                             restart=restart)
+
+    def getConvergenceWatcher(self, **kwargs):
+        """ watcher writing and stopping a steady solver once its residuals stall above the residualControl,
+        fed by `watcher.feed(text)` of the solver output or tailing `log.<solver>` by `watcher.watch()`
+        """
+        from .convergence import ConvergenceWatcher
+        kwargs.setdefault('log', self._casePath + os.path.sep + "log." + self.getSolverName())
+        return ConvergenceWatcher(self._casePath, **kwargs)
+
     ###########################################################################
     def getSolverCommand(self):
         if os.path.exists(self._casePath + os.path.sep + "Allrun"):
@@ -574,7 +663,7 @@ class BasicBuilder(object):
             else:
                 print("Info: variable {} is left unchanged".format(v))
 
-            f = ParsedParameterFile(fname)
+            f = openFieldFile(fname)
             if v.split('.')[0] == 'U':
                 f['dimensions'] = "[0 1 -1 0 0 0 0]"
                 f['internalField'] = "uniform (0 0 0)"
@@ -628,13 +717,13 @@ class BasicBuilder(object):
 
     @property
     def parallelSettings(self):
-        return self._parallelSettings
+        return self._paralleSettings
     def setupParallelSettings(self, settings):
         # copy if not existent dic file`decomposeParDict`
         # OpenFOAM 3.0 + can have dict file in other place
         # `decomposeParDict -decomposeParDict dictPath`
 
-        f = self._casePath + os.path.sep + 'decomposeParDict'
+        f = self._casePath + os.path.sep + 'system' + os.path.sep + 'decomposeParDict'
         if not os.path.exists(f):
             createRawFoamFile(self._casePath, 'system', 'decomposeParDict',
                               getDecomposeParDictTemplate(4, 'scotch'))
@@ -642,7 +731,7 @@ class BasicBuilder(object):
             d = ParsedParameterFile(f)
             if 'method' in settings:
                 d['method'] = settings['method']
-            if 'method' in settings:
+            if 'numberOfSubdomains' in settings:
                 d['numberOfSubdomains'] = settings['numberOfSubdomains']
             d.writeFile()
         #runCommand('decomposePar -case {}'.format(self._casePath)) # maybe too early to call it now
@@ -770,7 +859,7 @@ class BasicBuilder(object):
             # update the initial internal field
             value = self._internalFields[var]
             if var in self._solverCreatedVariables:
-                f = ParsedParameterFile(self._casePath + "/0/" + var)
+                f = openFieldFile(self._casePath + "/0/" + var)
                 f["internalField"] = formatValue(value)
                 f.writeFile()
             else:
@@ -850,6 +939,8 @@ class BasicBuilder(object):
         f.writeFile()
 
     def setupResidualControl(self, pResidual, UResidual, other = 0.001):
+        """ stop at fixed absolute residuals, see getConvergenceWatcher() to stop when residuals stall above them
+        """
         f = ParsedParameterFile(self._casePath + "/system/fvSolution")
         for algo in _supported_algorithms:
             if algo in f:
@@ -880,7 +971,7 @@ class BasicBuilder(object):
     def _initVelocityBoundaryAsWall(self):
         """incompressible flow has different wall_function:
         """
-        f = ParsedParameterFile(self._casePath + "/0/U")
+        f = openFieldFile(self._casePath + "/0/U")
         for bcName in listBoundaryNames(self._casePath):
             f["boundaryField"][bcName]={}
             f["boundaryField"][bcName]["value"]="uniform (0 0 0)"
@@ -890,7 +981,7 @@ class BasicBuilder(object):
     def _initPressureBoundaryAsWall(self):
         """ shared by compressible flow, porous, nonNewtonian flow
         """
-        f = ParsedParameterFile(self._casePath + "/0/p")
+        f = openFieldFile(self._casePath + "/0/p")
         if 'p_rgh' in self._solverCreatedVariables:
             self._initPressure_rghAsWall()
             for bcName in listBoundaryNames(self._casePath):
@@ -903,14 +994,14 @@ class BasicBuilder(object):
 
     def _initPressure_rghAsWall(self):
         #
-        p_rgh = ParsedParameterFile(self._casePath + "/0/p_rgh")
+        p_rgh = openFieldFile(self._casePath + "/0/p_rgh")
         for bcName in listBoundaryNames(self._casePath):
             p_rgh["boundaryField"][bcName] = {"type": "fixedFluxPressure", 'rho': 'rhok', 'value': "uniform 0"}
         p_rgh.writeFile()
 
     def _initPointDisplacementAsWall(self):
         #
-        pd = ParsedParameterFile(self._casePath + "/0/pointDisplacement")
+        pd = openFieldFile(self._casePath + "/0/pointDisplacement")
         for bcName in listBoundaryNames(self._casePath):
             pd["boundaryField"][bcName] = {"type": "fixedValue", 'value': "uniform (0 0 0)"}
         pd.writeFile()
@@ -968,7 +1059,7 @@ class BasicBuilder(object):
         if "value" in bcDict:
             value = bcDict['value']
 
-        f = ParsedParameterFile(self._casePath + "/0/U")
+        f = openFieldFile(self._casePath + "/0/U")
         f["boundaryField"][bcName] = {}
         if wall_type == 'fixed' or wall_type == 'noSlip':  # noSlip equal to fixed wall
             f["boundaryField"][bcName]["type"] = "fixedValue"
@@ -987,14 +1078,14 @@ class BasicBuilder(object):
             f["boundaryField"][bcName]["type"] = "movingWallVelocity"
             f["boundaryField"][bcName]["U"] = formatValue(value)
             if self._solverSettings['dynamicMeshing'] and "pointDisplacement" in self._solverCreatedVariables():
-                df = ParsedParameterFile(self._casePath + "/0/pointDisplacement")
+                df = openFieldFile(self._casePath + "/0/pointDisplacement")
                 df["boundaryField"][bcName] = {'type': "calculated", 'value': 'uniform (0 0 0)'}
                 df.writeFile()
         else:
             print("wall boundary: {} is not supported yet".format(wall_type))
         f.writeFile()
 
-        pf = ParsedParameterFile(self._casePath + "/0/p")
+        pf = openFieldFile(self._casePath + "/0/p")
         pf["boundaryField"][bcName] = {'type': "zeroGradient"}
         pf.writeFile()
 
@@ -1015,7 +1106,7 @@ class BasicBuilder(object):
         boundary_name = bcDict['name']
         var_list = self._solverCreatedVariables
         for var in var_list:
-            f = ParsedParameterFile(case + "/0/" + var)
+            f = openFieldFile(case + "/0/" + var)
             if interface_type == "empty" or interface_type == "2Dinerface":  # 2D case single layer extruded 3D emsh
                 f["boundaryField"]["frontAndBack"] = {}
                 f["boundaryField"]["frontAndBack"]["type"] = "empty"
@@ -1056,7 +1147,7 @@ class BasicBuilder(object):
         # buoyantPressure for heat exchanger wall, value uniform 0;
         # source doc: http://www.openfoam.com/documentation/cpp-guide/html/a02111.html#details
 
-        f = ParsedParameterFile(self._casePath + "/0/p_rgh")
+        f = openFieldFile(self._casePath + "/0/p_rgh")
         for bcDict in self._boundarySettings:
             bc = bcDict['name']
             subtype = bcDict['subtype']
@@ -1083,9 +1174,9 @@ class BasicBuilder(object):
         inlet_type = bcDict['subtype']
         value = bcDict['value']
 
-        pf = ParsedParameterFile(self._casePath + "/0/p")
+        pf = openFieldFile(self._casePath + "/0/p")
         pf["boundaryField"][bcName] = {}
-        Uf = ParsedParameterFile(self._casePath + "/0/U")
+        Uf = openFieldFile(self._casePath + "/0/U")
         Uf["boundaryField"][bcName] = {}
 
         if 'p_rgh' in self._solverCreatedVariables:
@@ -1120,7 +1211,7 @@ class BasicBuilder(object):
         value = bcDict['value']
 
         # velocity intial value is default to wall: uniform (0,0,0)
-        Uf = ParsedParameterFile(self._casePath + "/0/U")
+        Uf = openFieldFile(self._casePath + "/0/U")
         Uf["boundaryField"][bcName] = {}
         if inlet_type == "massFlowRate":  # compressible flow only?
             Uf["boundaryField"][bcName]["type"] = "flowRateInletVelocity"
@@ -1140,7 +1231,7 @@ class BasicBuilder(object):
             print(inlet_type + " is not supported as inlet boundary type")
         Uf.writeFile()
 
-        pf = ParsedParameterFile(self._casePath + "/0/p")
+        pf = openFieldFile(self._casePath + "/0/p")
         if 'p_rgh' in self._solverCreatedVariables:
             pf["boundaryField"][bcName] = {'type': 'calculated', 'value': "$internalField"}
         else:
@@ -1168,7 +1259,7 @@ class BasicBuilder(object):
         outlet_type = bcDict['subtype']
         value = bcDict['value']
 
-        pf = ParsedParameterFile(self._casePath + "/0/p")
+        pf = openFieldFile(self._casePath + "/0/p")
         pf["boundaryField"][bcName] = {}
         if outlet_type == "totalPressure":
             pf["boundaryField"][bcName]["type"] = 'totalPressure'
@@ -1192,7 +1283,7 @@ class BasicBuilder(object):
             print("pressure bundary default to zeroGradient for outlet type '{}' ".format(outlet_type))
         pf.writeFile()
         # velocity intial value is default to wall, uniform 0, so it needs to change
-        Uf = ParsedParameterFile(self._casePath + "/0/U")
+        Uf = openFieldFile(self._casePath + "/0/U")
         Uf["boundaryField"][bcName] = {}
         if outlet_type == "totalPressure" or outlet_type == "staticPressure" :
             Uf["boundaryField"][bcName]["type"] = "pressureInletOutletVelocity"  #
@@ -1226,23 +1317,23 @@ class BasicBuilder(object):
         value = bcDict['value']
         
         if bcDict['type'] == "freestreamPressure" or bcDict['type'] == "freestream":
-            f = ParsedParameterFile(self._casePath + "/0/p")
+            f = openFieldFile(self._casePath + "/0/p")
             f["boundaryField"][bcName] = {}
             f["boundaryField"][bcName]["type"] = "freestreamPressure"
             f.writeFile()
             #
-            f = ParsedParameterFile(self._casePath + "/0/U")
+            f = openFieldFile(self._casePath + "/0/U")
             f["boundaryField"][bcName] = {}
             f["boundaryField"][bcName]["type"] = "freestream"
             f["boundaryField"][bcName]["value"] = formatValue(value)
             f.writeFile()
         elif bcDict['type'] == "freestreamVelocity":
-            f = ParsedParameterFile(self._casePath + "/0/p")
+            f = openFieldFile(self._casePath + "/0/p")
             f["boundaryField"][bcName] = {}
             f["boundaryField"][bcName]["type"] = "freestream"
             f.writeFile()
             #
-            f = ParsedParameterFile(self._casePath + "/0/U")
+            f = openFieldFile(self._casePath + "/0/U")
             f["boundaryField"][bcName] = {}
             f["boundaryField"][bcName]["type"] = "freestreamVelocity"
             f["boundaryField"][bcName]["value"] = formatValue(value)
@@ -1360,7 +1451,7 @@ class BasicBuilder(object):
             kWallFunction = 'kqRWallFunction'
 
         for var in turbulence_var_list:
-            f = ParsedParameterFile(case + "/0/" + var)
+            f = openFieldFile(case + "/0/" + var)
             # kOmega has nonzero internalField for k, omega and epsilon, set default in CreateInitVarables()
             bcName = bcDict['name']
             # if boundaryType == 'wall' and 'type == 'rough':
@@ -1419,7 +1510,7 @@ class BasicBuilder(object):
             turbulentMixingLength = 0.1  # in metre, half inlet diam/width
         #print(turbulence_var_list)
         for var in turbulence_var_list:
-            f = ParsedParameterFile(case + "/0/" + var)
+            f = openFieldFile(case + "/0/" + var)
             f["boundaryField"][bcName] = {}
             if var == 'k' or var.find("k.") == 0: #begin with
                 f["boundaryField"][bcName]["type"] = "turbulentIntensityKineticEnergyInlet"
@@ -1454,7 +1545,7 @@ class BasicBuilder(object):
         bcName = bcDict['name']
         turbulence_var_list = self.listTurbulenceVarables()
         for var in turbulence_var_list:
-            f = ParsedParameterFile(self._casePath + "/0/" + var)
+            f = openFieldFile(self._casePath + "/0/" + var)
             f["boundaryField"][bcName] = {}
             if var == 'k' or var.find("k.") == 0: #begin with
                 f["boundaryField"][bcName]["type"] = "inletOutlet"
@@ -1497,7 +1588,7 @@ class BasicBuilder(object):
         if not "freestreamValue" in turbulenceSettings:
             turbulenceSettings["freestreamValue"] = '$internalField'
         for v in turbulence_var_list:
-            f = ParsedParameterFile(self._casePath + "/0/" + v)
+            f = openFieldFile(self._casePath + "/0/" + v)
             f["boundaryField"][bcName] = {}
             if v.split('.')[0] in set(['nut', 'nuTilda', 'alphat']):
                 f["boundaryField"][bcName]["type"] = "freestream"
@@ -1514,7 +1605,7 @@ class BasicBuilder(object):
         bcName = bcDict['name']
         subtype = bcDict['subtype']
         for v in turbulence_var_list:
-            f = ParsedParameterFile(self._casePath + "/0/" + v)
+            f = openFieldFile(self._casePath + "/0/" + v)
             f["boundaryField"][bcName] = {}
             f["boundaryField"][bcName]["type"] = subtype
             f.writeFile()
\ No newline at end of file
@@ -24,6 +24,8 @@ __title__ = "Classes for New CFD solver"
 __author__ = "Qingfeng Xia"
 __url__ = "http://www.freecadweb.org"
 
+import collections
+
 import numpy
 
 try:
@@ -39,16 +41,27 @@ except:
     print(plt.get_backend())  #TkAgg
     import matplotlib.animation as animation
 
+from .parser import GrowableArray, ResidualParser
+from .downsample import MinMaxDecimator, lttb
+
 
-''' this class can only process velocity and pressure residues, pyFoam has already got this function
+''' plot the first initial residual of every solved field per time step, pyFoam has already got this function
 backends: matplotlib (with or without FreeCAD), gnuplot (should be phrased out)
 matplotlib is not working within FreeCAD, because matplotlib using PyQt eventloop, same as FreeCAD will freeze GUI
 Instead, Plot module of FreeCAD should be used
 matplotlib standalone mode is not yet working
+Lines are created once and only their data is updated, each series is decimated by min/max bucketing
+to at most `point_budget` points, so redraw cost does not grow with the number of iterations
 '''
 class FoamResidualPloter():
-    def __init__(self, backend = 'matplotlib'):
+    labels = {'Ux': "$U_x$", 'Uy': "$U_y$", 'Uz': "$U_z$", 'p': "$p$"}
+    colors = {'Ux': 'violet', 'Uy': 'green', 'Uz': 'blue', 'p': 'orange'}
+
+    def __init__(self, backend = 'matplotlib', point_budget = 2000):
+        self.point_budget = point_budget
+        self.lines = {}
         self.reset()
+        self.updated = False
         if backend == 'gnuplot':
             import Gnuplot
             self.g = Gnuplot.Gnuplot()
@@ -64,98 +77,100 @@ class FoamResidualPloter():
         elif backend == 'matplotlib':
             if withinFreeCAD:
                 self.fig = Plot.figure(FreeCAD.ActiveDocument.Name + "Residuals")
+                self.setupAxis(self.fig.axes)
                 self.Timer = QtCore.QTimer()
                 self.Timer.timeout.connect(self.refresh)
                 self.Timer.start(1000)
-                self.updated = False
             else:
                 self.fig = plt.figure()
                 self.axis = self.fig.add_subplot(1,1,1)
-                self.axis.set_title("Simulation residuals")
-                self.axis.set_xlabel("Iteration")
-                self.axis.set_ylabel("Residual")
-                self.axis.grid(True)
-                self.axis.set_yscale('log')
+                self.setupAxis(self.axis)
                 self.axis.set_ylim(1e-4, 1e2)  # or autoscale?
-                #xaxis data is not needed for steady case
-                for var in self.residuals:
-                    self.axis.plot(self.residuals[var], label = var)
-                plt.legend()
                 #todo: setup animation hook
         else:
             print('plot backend {} is not supported'.format(backend))
         self.backend = backend
 
+    def setupAxis(self, ax):
+        ax.set_title("Simulation residuals")
+        ax.set_xlabel("Iteration")
+        ax.set_ylabel("Residual")
+        ax.grid(True)
+        ax.set_yscale('log')
+
+    def updateLines(self, ax):
+        # existing lines get new (decimated) data, no clear and replot
+        new_line = False
+        for var in self.decimators:
+            if var not in self.lines:
+                self.lines[var], = ax.plot([], [], label=self.labels.get(var, var), color=self.colors.get(var), linewidth=1)
+                new_line = True
+            self.lines[var].set_data(*self.decimators[var].points())
+        if new_line:
+            ax.legend()
+        ax.relim()
+        ax.autoscale_view()
+
     def refresh(self):  ## only for matplotlib in FreeCAD plot module
         if self.updated:
             self.updated = False
-            ax = self.fig.axes
-            ax.cla()
-            ax.set_title("Simulation residuals")
-            ax.set_xlabel("Iteration")
-            ax.set_ylabel("Residual")
-
-            ax.plot(self.UxResiduals, label="$U_x$", color='violet', linewidth=1)
-            ax.plot(self.UyResiduals, label="$U_y$", color='green', linewidth=1)
-            ax.plot(self.UzResiduals, label="$U_z$", color='blue', linewidth=1)
-            ax.plot(self.pResiduals, label="$p$", color='orange', linewidth=1)
-
-            ax.grid()
-            ax.set_yscale('log')
-            ax.legend()
-
-        self.fig.canvas.draw()
+            self.updateLines(self.fig.axes)
+            self.fig.canvas.draw()
 
     def reset(self):
-        # set init values for plotting tool independent data, gnuplot does not accept numpy.array?
-        init_residual = [1]  # numpy.array([1])
-        self.UxResiduals = init_residual
-        self.UyResiduals = init_residual
-        self.UzResiduals = init_residual
-        self.pResiduals = init_residual
-        self.residuals = {'xVelocity': self.UxResiduals, 'yVelocity': self.UyResiduals, 'zVelocity':self.UzResiduals, 'pressure': self.pResiduals}
+        # first initial residual of each field per time step, numbered by self.niter
+        for line in self.lines.values():
+            line.remove()
+        self.lines = {}
+        self.parser = ResidualParser(None, parse=False, index=False)  # fed with the solver output
+        self.iterations = collections.OrderedDict()  # field -> GrowableArray of time step numbers
+        self.residuals = collections.OrderedDict()  # field -> GrowableArray of residuals
+        self.decimators = collections.OrderedDict()  # field -> MinMaxDecimator for plotting
+        self.nsolves = {}  # field -> number of solves of the parser already plotted
         self.niter = 0
 
     def process_text(self, text):
-        loglines = text.split('\n')
-        printlines = []
-        for line in loglines:
-            # print line,
-            split = line.split()
-
-            # Only store the first residual per timestep
-            if line.startswith(u"Time = "):
-                self.niter += 1
-
-            # print split,  Uz does not exist for 2D case, continuity is important but not yet extracted
-            if "Ux," in split and self.niter > len(self.UxResiduals):
-                self.UxResiduals.append(float(split[7].split(',')[0]))
-            if "Uy," in split and self.niter > len(self.UyResiduals):
-                self.UyResiduals.append(float(split[7].split(',')[0]))
-            if "Uz," in split and self.niter > len(self.UzResiduals):
-                self.UzResiduals.append(float(split[7].split(',')[0]))
-            if "p," in split and self.niter > len(self.pResiduals):
-                self.pResiduals.append(float(split[7].split(',')[0]))
-        self.updated = True
+        self.parser.feed(text)
+        self.niter = len(self.parser.times)
+        for var in self.parser.quantities:
+            series = self.parser.get_series(var)
+            start = self.nsolves.get(var, 0)
+            time_index = series['time_index'][start:]
+            if not len(time_index):
+                continue
+            self.nsolves[var] = start + len(time_index)
+            # Only store the first residual per timestep, its first solve may be plotted already
+            first = numpy.ones(len(time_index), dtype=bool)
+            first[1:] = time_index[1:] != time_index[:-1]
+            first[0] = not start or series['time_index'][start - 1] != time_index[0]
+            if not first.any():
+                continue
+            x = time_index[first] + 1
+            y = series['initial'][start:][first]
+            if var not in self.residuals:
+                self.iterations[var] = GrowableArray(numpy.int64)
+                self.residuals[var] = GrowableArray(numpy.float64)
+                self.decimators[var] = MinMaxDecimator(self.point_budget)
+            self.iterations[var].extend(x)
+            self.residuals[var].extend(y)
+            self.decimators[var].extend(x, y)
+            self.updated = True
 
     def plot(self):
         if self.backend == 'gnuplot':
             # NOTE: the mod checker is in place for the possibility plotting takes longer
             # NOTE: than a small test case to solve
             import Gnuplot
-            if numpy.mod(self.niter, 1) == 0:
-                self.g.plot(Gnuplot.Data(self.UxResiduals, with_='line', title="Ux", inline=1),
-                            Gnuplot.Data(self.UyResiduals, with_='line', title="Uy", inline=1),
-                            Gnuplot.Data(self.UzResiduals, with_='line', title="Uz", inline=1),
-                            Gnuplot.Data(self.pResiduals, with_='line', title="p"))
+            if numpy.mod(self.niter, 1) == 0 and self.residuals:
+                self.g.plot(*[Gnuplot.Data(*lttb(self.iterations[var].values, self.residuals[var].values, self.point_budget),
+                                           with_='line', title=var, inline=1) for var in self.residuals])
 
             if self.niter >= 2:
                 self.g("set autoscale")  # NOTE: this is just to supress the empty yrange error when GNUplot autscales
         elif self.backend == 'matplotlib':  ## only for matplotlib NOT in FreeCAD plot module
-            if not withinFreeCAD:
-                if self.niter%5==0:  #only re-plot some data points
-                    self.axis.clear()
-                    for var in self.residuals:
-                        self.axis.plot(self.residuals[var], label = var)
+            if not withinFreeCAD and self.updated:
+                self.updated = False
+                self.updateLines(self.axis)
+                self.fig.canvas.draw_idle()
         else:
-            print('plot backend {} is not supported'.format(backend))
\ No newline at end of file
+            print('plot backend {} is not supported'.format(self.backend))
@@ -26,6 +26,7 @@ from .config import getFoamVersion
 CfdFoam fork using more proper template tech to expand dict data structure
 """
 
+# version is filled in on the first use, so that importing does not trigger OpenFOAM detection
 _foamFileHeader_part1 = '''/*--------------------------------*- C++ -*----------------------------------*\\
 | ===========                 |                                                 |
 | \\\\      /  F ield         | OpenFOAM: The Open Source CFD Toolbox           |
@@ -33,12 +34,12 @@ _foamFileHeader_part1 = '''/*--------------------------------*- C++ -*----------
 |   \\\\  /    A nd           | Web:      www.OpenFOAM.org                      |
 |    \\\\/     M anipulation  |                                                 |
 \*---------------------------------------------------------------------------*/
-'''.format(getFoamVersion()[0], getFoamVersion()[1])
+'''
 
 _foamFileHeader_part2 = '''FoamFile
 {
     version     2.0;
-    format      ascii;
+    format      %s;
     class       %s;
     location    "%s";
     object      %s;
@@ -47,8 +48,11 @@ _foamFileHeader_part2 = '''FoamFile
 // generated by createRawFoamFile
 
 '''
-def getFoamFileHeader(location, dictname, classname = 'dictionary'):
-        return _foamFileHeader_part1 + _foamFileHeader_part2 % (classname, location, dictname)
+def getFoamFileHeader(location, dictname, classname = 'dictionary', file_format = 'ascii'):
+        if file_format == 'binary':  # nonuniform lists are written as little endian float64
+            file_format = 'binary;\n    arch        "LSB;label=32;scalar=64"'
+        part1 = _foamFileHeader_part1.format(getFoamVersion()[0], getFoamVersion()[1])
+        return part1 + _foamFileHeader_part2 % (file_format, classname, location, dictname)
 
 _fvSolution_template = """
 solvers
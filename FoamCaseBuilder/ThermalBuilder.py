@@ -189,7 +189,7 @@ class ThermalBuilder(BasicBuilder):
             if v in set(['T', 'p_rgh',  'alphat']):
                 createRawFoamFile(casePath, '0', v, lines, 'volScalarField')
             fname = casePath + os.path.sep + "0" + os.path.sep + v
-            f = ParsedParameterFile(fname)
+            f = openFieldFile(fname)
             
             if v == 'T':
                 f['dimensions'] = "[0 0 0 1 0 0 0]"
@@ -218,7 +218,7 @@ class ThermalBuilder(BasicBuilder):
         /opt/openfoam4/tutorials/heatTransfer/buoyantPimpleFoam/hotRoom
         For compressible flow without heat transfer (mainly with wall), zeroGradient is used, buoyant flow is not considered
         """
-        f = ParsedParameterFile(self._casePath + "/0/T")
+        f = openFieldFile(self._casePath + "/0/T")
         for bc in bc_names:
             f["boundaryField"][bc]={}
             f["boundaryField"][bc]["type"]="zeroGradient"
@@ -230,7 +230,7 @@ class ThermalBuilder(BasicBuilder):
     def initThermalTurbulenceBoundaryAsWall(self, bc_names):
         # todo: check if this wall function is only for kEpsilon turbulence model?
         # id yplus < 1, set to zero without wall function
-        f = ParsedParameterFile(self._casePath + "/0/alphat")
+        f = openFieldFile(self._casePath + "/0/alphat")
         for bc in bc_names:
             f["boundaryField"][bc]={}
             if self._solverSettings['heatTransfering']:
@@ -261,7 +261,7 @@ class ThermalBuilder(BasicBuilder):
         Optional thin thermal layer resistances can be specified through thicknessLayers and kappaLayers entries 
         for the fixed heat transfer coefficient mode
         """
-        f = ParsedParameterFile(self._casePath + "/0/T")
+        f = openFieldFile(self._casePath + "/0/T")
         for boundary in self._boundarySettings:
             bType = boundary['type']
             s = boundary['thermalSettings']
@@ -331,7 +331,7 @@ class ThermalBuilder(BasicBuilder):
 
     def _setupThermalTurbulenceDiffusivity(self):
         # Prt default value is set in initThermalTurbulenceBoundaryAsWall()
-        f = ParsedParameterFile(self._casePath + "/0/alphat")
+        f = openFieldFile(self._casePath + "/0/alphat")
         for bcDict in self._boundarySettings:
             bc = bcDict['name']
             subtype = bcDict['subtype']
@@ -0,0 +1,183 @@
+# coding=utf-8
+
+from __future__ import print_function, absolute_import
+
+"""Reader of OpenFOAM binary format (`format binary;`) field and polyMesh files.
+
+The binary payload of `List<scalar>`, `List<vector>`, labelList, vectorField and
+faceCompactList is exposed as numpy.ndarray by numpy.frombuffer over a mmap of the
+file, no data is copied. The arrays are read only and keep the mmap alive.
+
+header `arch "LSB;label=32;scalar=64";` gives byte order, label and scalar size,
+the OpenFOAM default (LSB, 32bit label, 64bit scalar) is used if arch is missing.
+A gzip compressed file (`U.gz`) can not be mapped, it is decompressed into memory once.
+"""
+
+import re
+import gzip
+import mmap
+import os.path
+
+import numpy
+
+from .parser import CppDictParser, resolve_gz_path, read_file_bytes
+
+_header_pattern = re.compile(br'FoamFile\s*\{(.*?)\}', re.DOTALL)
+# start of a binary list after the header of polyMesh files: `N(`
+_list_pattern = re.compile(br'(\d+)\s*\(')
+# start of a binary list inside a field dictionary
+_field_list_pattern = re.compile(br'List<(\w+)>\s*(\d+)\s*\(')
+
+# number of components of the element type, all in scalar except `label`
+_type_components = {'scalar': 1, 'vector': 3, 'sphericalTensor': 1, 'symmTensor': 6, 'tensor': 9,
+                    'label': 1}
+# OpenFOAM class of polyMesh files and the element type of their lists
+_mesh_classes = {'labelList': 'label', 'vectorField': 'vector', 'faceCompactList': 'label',
+                 'scalarField': 'scalar'}
+
+
+def is_binary_file(filepath):
+    """Check if the file header has `format binary;`."""
+    filepath = resolve_gz_path(filepath)
+    with (gzip.open(filepath, 'rb') if filepath.endswith('.gz') else open(filepath, 'rb')) as f:
+        m = _header_pattern.search(f.read(4096))
+    return bool(m) and re.search(br'format\s+binary\s*;', m.group(1)) is not None
+
+
+class BinaryFoamFile(object):
+    """Binary format OpenFOAM file mapped into memory.
+
+    Attributes:
+        filepath: Full file path.
+        header: FoamFile header as a dictionary.
+        byte_order: '<' for LSB and '>' for MSB.
+        label_size: Label size in bits, 32 or 64.
+        scalar_size: Scalar size in bits, 32 or 64.
+    """
+
+    def __init__(self, filepath):
+        """Map the file and parse the FoamFile header."""
+        self.filepath = filepath = resolve_gz_path(filepath)
+        if not os.path.getsize(filepath):
+            raise ValueError('{} is an empty file'.format(filepath))
+        if filepath.endswith('.gz'):
+            self._buffer = read_file_bytes(filepath)
+        else:
+            with open(filepath, 'rb') as f:
+                # mmap is independent of the file object, it is closed when no array refers to it
+                self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        m = _header_pattern.search(self._buffer, 0, 4096)
+        if not m:
+            raise ValueError('FoamFile header is not found in {}'.format(filepath))
+        self._header_end = m.end()
+        self.header = CppDictParser(m.group(1).decode('latin-1')).values
+        if self.header.get('format', 'ascii') != 'binary':
+            raise ValueError('{} is not a binary format file'.format(filepath))
+
+        self.byte_order = '<'
+        self.label_size = 32
+        self.scalar_size = 64
+        for item in self.header.get('arch', '').strip('"').split(';'):
+            if item == 'MSB':
+                self.byte_order = '>'
+            elif item.startswith('label='):
+                self.label_size = int(item[6:])
+            elif item.startswith('scalar='):
+                self.scalar_size = int(item[7:])
+
+    @property
+    def cls(self):
+        """OpenFOAM class of the file, e.g. volVectorField or labelList."""
+        return self.header.get('class', '')
+
+    def dtype(self, element_type):
+        """numpy dtype of the element type of a list."""
+        if element_type == 'label':
+            return numpy.dtype('{}i{}'.format(self.byte_order, self.label_size // 8))
+        return numpy.dtype('{}f{}'.format(self.byte_order, self.scalar_size // 8))
+
+    def _array(self, element_type, count, offset):
+        """Return (array view of the list payload at offset, position after `)`)."""
+        if element_type not in _type_components:
+            raise ValueError('binary List<{}> is not supported'.format(element_type))
+        ncomp = _type_components[element_type]
+        dtype = self.dtype(element_type)
+        end = offset + count * ncomp * dtype.itemsize
+        if self._buffer[end:end + 1] != b')':
+            raise ValueError('closing bracket of binary list is not found at {} in {}'
+                             .format(end, self.filepath))
+        data = numpy.frombuffer(self._buffer, dtype, count * ncomp, offset)
+        if ncomp > 1:
+            data = data.reshape(count, ncomp)
+        return data, end + 1
+
+    def read_list(self, pos=None):
+        """Read the next `N(...)` list of a polyMesh file like owner, neighbour or points.
+
+        Args:
+            pos: Optional position to start searching, default to the end of header.
+
+        Returns:
+            (array, end) where end is the position after the closing bracket.
+        """
+        if self.cls not in _mesh_classes:
+            raise ValueError('class {} is not a supported polyMesh list'.format(self.cls))
+        m = _list_pattern.search(self._buffer, self._header_end if pos is None else pos)
+        if not m:
+            raise ValueError('binary list is not found in {}'.format(self.filepath))
+        return self._array(_mesh_classes[self.cls], int(m.group(1)), m.end())
+
+    def read_faces(self):
+        """Read faces of a faceCompactList or faceList file.
+
+        Returns:
+            (offsets, labels): point labels of face i are labels[offsets[i]:offsets[i+1]].
+            For faceCompactList both are views into the file; faceList is written
+            face by face and has to be copied into the compact form.
+        """
+        if self.cls == 'faceCompactList':
+            offsets, end = self.read_list()
+            labels, end = self.read_list(end)
+            return offsets, labels
+        if self.cls != 'faceList':
+            raise ValueError('class {} is not a face list'.format(self.cls))
+        m = _list_pattern.search(self._buffer, self._header_end)
+        count = int(m.group(1))
+        pos = m.end()
+        faces = []
+        for i in range(count):
+            m = _list_pattern.search(self._buffer, pos)
+            face, pos = self._array('label', int(m.group(1)), m.end())
+            faces.append(face)
+        offsets = numpy.zeros(count + 1, dtype=self.dtype('label'))
+        numpy.cumsum([len(f) for f in faces], out=offsets[1:])
+        labels = numpy.concatenate(faces) if faces else numpy.zeros(0, dtype=self.dtype('label'))
+        return offsets, labels
+
+    def read_field(self):
+        """Read a field file like 0/U into a dictionary.
+
+        The ascii part (dimensions, uniform values, boundaryField) is parsed by
+        CppDictParser, every binary `nonuniform List<type> N(...)` becomes an array view.
+        """
+        pieces = []
+        arrays = {}
+        text_length = 0
+        pos = self._header_end
+        while True:
+            m = _field_list_pattern.search(self._buffer, pos)
+            if not m:
+                break
+            data, end = self._array(m.group(1).decode('latin-1'), int(m.group(2)), m.end())
+            pieces.append(self._buffer[pos:m.end()].decode('latin-1'))
+            text_length += len(pieces[-1])
+            arrays[text_length] = data
+            pieces.append(')')
+            text_length += 1
+            pos = end
+        pieces.append(self._buffer[pos:].decode('latin-1'))
+
+        def list_reader(list_type, count, text, pos):
+            return arrays[pos], pos + 1
+
+        return CppDictParser(''.join(pieces), list_reader).values
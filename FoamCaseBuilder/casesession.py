@@ -0,0 +1,124 @@
+# coding=utf-8
+
+from __future__ import print_function, absolute_import
+
+"""Transactional editing of the field files of a case.
+
+Inside `with CaseSession(case):` every `openFieldFile()` of the same file returns
+the same LazyFieldFile object and `writeFile()` only marks it dirty. A ParsedParameterFile
+of a file open in the session shares its content, so it sees the unsaved changes.
+Dirty files are written once when the session exits without exception, each through
+a temporary file renamed into place after its mapping is released; on exception all
+changes are discarded.
+
+    with CaseSession(case_path) as session:
+        f = openFieldFile(case_path + "/0/U")
+        f["boundaryField"]["inlet"] = {"type": "zeroGradient"}
+        f.writeFile()  # deferred
+    print(session.written)
+"""
+
+import os
+import os.path
+import threading
+import collections
+
+from .parser import resolve_gz_path
+from .foamfile import LazyFieldFile
+
+_local = threading.local()
+
+
+def _active_sessions():
+    if not hasattr(_local, 'sessions'):
+        _local.sessions = []
+    return _local.sessions
+
+
+def _file_state(filepath):
+    if not os.path.exists(filepath):  # e.g. U.gz replaced by an uncompressed U
+        return None
+    st = os.stat(filepath)
+    return st.st_mtime, st.st_size
+
+
+def openFieldFile(fpath):
+    """Open a field file like 0/U, shared within the active CaseSession of its case."""
+    realpath = os.path.realpath(fpath)
+    for session in reversed(_active_sessions()):
+        if realpath.startswith(session.case_path + os.path.sep):
+            return session.open(fpath)
+    return LazyFieldFile(fpath)
+
+
+def sessionFile(fpath):
+    """Return the LazyFieldFile of fpath open in an active CaseSession, None if it is not open in one."""
+    realpath = os.path.realpath(resolve_gz_path(fpath))
+    for session in reversed(_active_sessions()):
+        if realpath in session._files:
+            return session.open(fpath)
+    return None
+
+
+class CaseSession(object):
+    """Context manager caching opened field files of a case until exit.
+
+    Attributes:
+        case_path: Real path of the case folder.
+        written: List of file paths written on exit.
+        skipped: List of dirty file paths not written since the content is unchanged.
+    """
+
+    def __init__(self, case_path):
+        self.case_path = os.path.realpath(case_path)
+        self._files = collections.OrderedDict()  # realpath -> [LazyFieldFile, file state, dirty]
+        self.written = []
+        self.skipped = []
+
+    def __enter__(self):
+        _active_sessions().append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _active_sessions().remove(self)
+        if exc_type is None:
+            self.flush()
+        else:
+            self._files.clear()
+        return False
+
+    def open(self, fpath):
+        """Return the LazyFieldFile of fpath, loaded at most once in this session."""
+        realpath = os.path.realpath(resolve_gz_path(fpath))
+        entry = self._files.get(realpath)
+        if entry and entry[1] != _file_state(realpath):
+            # replaced outside the session, e.g. by createRawFoamFile()
+            if entry[2]:
+                print('Warning: {} is changed on disk, in-memory changes will overwrite it'.format(fpath))
+            else:
+                entry = None
+        if not entry:
+            f = LazyFieldFile(fpath, on_write=lambda f: self._write(f, realpath))
+            entry = self._files[realpath] = [f, _file_state(realpath), False]
+        return entry[0]
+
+    def _write(self, f, realpath):
+        if self in _active_sessions():
+            self._files[realpath][2] = True  # saved by flush()
+        else:  # kept by the caller after the session
+            f.save()
+
+    def isDirty(self, fpath):
+        entry = self._files.get(os.path.realpath(resolve_gz_path(fpath)))
+        return bool(entry and entry[2])
+
+    def flush(self):
+        """Write all dirty files, then they are clean and still cached."""
+        for realpath, entry in self._files.items():
+            if entry[2]:
+                if entry[0].save(realpath):
+                    self.written.append(realpath)
+                else:
+                    self.skipped.append(realpath)
+                entry[1] = _file_state(realpath)
+                entry[2] = False
@@ -0,0 +1,267 @@
+# coding=utf-8
+
+from __future__ import print_function, absolute_import
+
+"""Steps of a case with declared inputs and outputs, their dependencies, step caching and Allrun.
+
+Each step is an OpenFOAM command with the case paths it reads and writes, relative
+to the case and optionally glob patterns like `processor*/0`. A step depends on an
+earlier step if it reads or writes a path the earlier one writes, or writes a path
+the earlier one reads. A step is up to date if the hash of its command and input
+files is the same as after its last successful run and its outputs exist. File
+hashes are cached by size and mtime in `.pipeline.json` in the case, unchanged
+files are not read again.
+
+This module has no asyncio code, so the bash script `Allrun` of the steps can be
+written on every supported Python; pipeline.Pipeline runs the same steps
+concurrently from Python 3.7+.
+
+    steps = case_steps(case, 'simpleFoam', mesh_file='mesh.unv', scale=0.001,
+                       init_potential=True, run_parallel=True, num_proc=4)
+    steps.write_allrun()
+"""
+
+import os
+import glob
+import json
+import fnmatch
+import hashlib
+import collections
+
+from .filewriter import write_if_changed
+from .config import getFoamDir, getFoamRuntime
+
+try:
+    from shlex import quote as _shell_quote
+except ImportError:  # Python 2
+    from pipes import quote as _shell_quote
+
+_STATE_FILE = '.pipeline.json'
+# time folders with a nonzero digit like 0.5 and 100, the results: 0 has the initial conditions
+_RESULT_DIRS = '[0-9]*[1-9]*'
+_hash_chunk_size = 1 << 20
+
+SKIPPED = 'skipped'
+
+
+def _split_path(path):
+    return os.path.normpath(path).replace(os.path.sep, '/').split('/')
+
+
+def _overlap(a, b):
+    """True if paths or patterns a and b are the same, or one is inside the other."""
+    return all(pa == pb or fnmatch.fnmatchcase(pa, pb) or fnmatch.fnmatchcase(pb, pa)
+               for pa, pb in zip(_split_path(a), _split_path(b)))
+
+
+def _overlaps(paths, others):
+    return any(_overlap(a, b) for a in paths for b in others)
+
+
+def _quote(arg):
+    return _shell_quote(str(arg))
+
+
+class Step(object):
+    """A command of the case.
+
+    Attributes:
+        name: Unique name of the step, the log file is `log.<name>`.
+        cmd: Argument list of the command, not quoted.
+        inputs: Case relative paths or glob patterns of files and folders read by the command.
+        outputs: Case relative paths or glob patterns of files and folders written by the command.
+        after: Names of steps to run before this step in addition to the dependencies
+            found from inputs and outputs.
+    """
+
+    def __init__(self, name, cmd, inputs=(), outputs=(), after=()):
+        self.name = name
+        self.cmd = [str(arg) for arg in cmd]
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.after = list(after)
+
+    def __repr__(self):
+        return 'Step({!r}, {!r})'.format(self.name, self.cmd)
+
+    def command_line(self):
+        """Command line with shell quoting."""
+        return ' '.join(_quote(arg) for arg in self.cmd)
+
+
+class CaseSteps(object):
+    """Ordered steps of a case, see the module documentation.
+
+    Attributes:
+        case: Case path, working directory of all steps.
+        steps: OrderedDict of step name and Step in declaration order.
+    """
+
+    def __init__(self, case, steps=()):
+        self.case = os.path.abspath(case)
+        self.steps = collections.OrderedDict()
+        self._files = {}  # case relative path -> [mtime_ns, size, sha1 hex]
+        self._keys = {}  # step name -> input hash after the last successful run
+        for step in steps:
+            self.add(step)
+
+    def add(self, step):
+        """Append a step, return it."""
+        if step.name in self.steps:
+            raise ValueError('duplicated pipeline step name: {}'.format(step.name))
+        for name in step.after:
+            if name not in self.steps:
+                raise ValueError('step {} should run after unknown step {}'.format(step.name, name))
+        self.steps[step.name] = step
+        return step
+
+    def dependencies(self, name):
+        """Names of earlier steps the step depends on."""
+        step = self.steps[name]
+        deps = []
+        for other in self.steps.values():
+            if other is step:
+                break
+            if other.name in step.after or _overlaps(step.inputs, other.outputs) \
+                    or _overlaps(step.outputs, other.outputs) or _overlaps(step.outputs, other.inputs):
+                deps.append(other.name)
+        return deps
+
+    ############################ step caching ############################
+    def _state_path(self):
+        return os.path.join(self.case, _STATE_FILE)
+
+    def _load_state(self):
+        try:
+            with open(self._state_path()) as f:
+                state = json.load(f)
+        except (IOError, OSError, ValueError):
+            state = {}
+        self._files = state.get('files', {})
+        self._keys = state.get('steps', {})
+
+    def _save_state(self):
+        content = json.dumps({'steps': self._keys, 'files': self._files}, indent=1, sort_keys=True)
+        write_if_changed(self._state_path(), lambda f: f.write(content))
+
+    def _expand(self, patterns):
+        """Sorted case relative paths of the files matching patterns, folders are walked."""
+        files = set()
+        for pattern in patterns:
+            for path in glob.glob(os.path.join(self.case, pattern)):
+                if os.path.isdir(path):
+                    for folder, dirs, names in os.walk(path):
+                        files.update(os.path.join(folder, n) for n in names)
+                else:
+                    files.add(path)
+        return sorted(os.path.relpath(p, self.case) for p in files)
+
+    def _file_hash(self, relpath):
+        path = os.path.join(self.case, relpath)
+        st = os.stat(path)
+        signature = [getattr(st, 'st_mtime_ns', st.st_mtime), st.st_size]
+        cached = self._files.get(relpath)
+        if cached and cached[:2] == signature:
+            return cached[2]
+        h = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(_hash_chunk_size), b''):
+                h.update(chunk)
+        self._files[relpath] = signature + [h.hexdigest()]
+        return h.hexdigest()
+
+    def input_key(self, name):
+        """Hash of the command and the content of the input files of the step."""
+        step = self.steps[name]
+        h = hashlib.sha1(json.dumps(step.cmd).encode('utf-8'))
+        for relpath in self._expand(step.inputs):
+            try:
+                h.update('\0{}\0{}'.format(relpath, self._file_hash(relpath)).encode('utf-8'))
+            except (IOError, OSError):  # removed while listing
+                h.update('\0{}\0'.format(relpath).encode('utf-8'))
+        return h.hexdigest()
+
+    def is_up_to_date(self, name):
+        """True if the inputs of the step are unchanged since its last successful run and its outputs exist."""
+        step = self.steps[name]
+        if name not in self._keys or not all(glob.glob(os.path.join(self.case, p)) for p in step.outputs):
+            return False
+        return self._keys[name] == self.input_key(name)
+
+    ############################ bash script ############################
+    def allrun_script(self):
+        """Text of a bash script running all steps in declaration order, stopping at the first failure."""
+        lines = ["#!/bin/bash", ""]
+        if getFoamRuntime() != 'BlueCFD':
+            lines.append("source {}/etc/bashrc".format(getFoamDir()))
+        lines += ["set -o pipefail", "cd \"$(dirname \"$0\")\" || exit 1", ""]
+        for step in self.steps.values():
+            lines.append("# {}".format(step.name))
+            lines.append("{} 2>&1 | tee log.{} || exit $?".format(step.command_line(), step.name))
+            lines.append("")
+        return '\n'.join(lines)
+
+    def write_allrun(self, filepath=None):
+        """Write the bash script to `Allrun` in the case, or filepath, and make it executable."""
+        filepath = filepath or os.path.join(self.case, 'Allrun')
+        script = self.allrun_script()  # unix line ending also for WSL
+        write_if_changed(filepath, lambda f: f.write(script))
+        try:
+            os.chmod(filepath, os.stat(filepath).st_mode | 0o111)
+        except OSError:
+            pass  # on windows file system it is default executable to WSL user by default
+        return filepath
+
+
+_mesh_converters = {'.unv': 'ideasUnvToFoam', '.msh': 'gmshToFoam', '.cas': 'fluentMeshToFoam'}
+
+
+def case_steps(case, solver_name, mesh_file=None, scale=None, init_potential=False,
+               run_parallel=False, num_proc=1, reconstruct=None, export_vtk=False, restart=False, cls=CaseSteps):
+    """Standard steps of a case: mesh conversion, scaling, initialisation, decomposition,
+    solver, reconstruction and VTK export.
+
+    Args:
+        case: Case path.
+        solver_name: Solver application like simpleFoam.
+        mesh_file: Mesh to convert into constant/polyMesh, by ideasUnvToFoam, gmshToFoam or fluentMeshToFoam
+            selected by the file extension; no mesh conversion if None.
+        scale: Mesh scaling factor applied by transformPoints, not scaled if None or 1.
+        init_potential: Initialise the flow by potentialFoam.
+        run_parallel: Decompose the case and run the solver by mpirun.
+        num_proc: Number of processes for a parallel run.
+        reconstruct: Reconstruct the parallel result, default to export_vtk.
+        export_vtk: Export the latest time to VTK by foamToVTK.
+        restart: Continue the solver from the latest time, without potentialFoam, and without
+            decomposePar if the case is decomposed already, as it would remove the processor results.
+        cls: CaseSteps or a subclass like pipeline.Pipeline to create.
+    """
+    pipeline = cls(case)
+    mesh = 'constant/polyMesh'
+    if mesh_file:
+        ext = os.path.splitext(mesh_file)[1].lower()
+        if ext not in _mesh_converters:
+            raise ValueError('mesh file format of {} is not supported'.format(mesh_file))
+        # outside of the case: an absolute input path is not joined to the case path
+        pipeline.add(Step(_mesh_converters[ext], [_mesh_converters[ext], os.path.abspath(mesh_file)],
+                          inputs=[os.path.abspath(mesh_file)], outputs=[mesh]))
+    if scale and float(scale) != 1.0:
+        pipeline.add(Step('transformPoints', ['transformPoints', '-scale', '({0} {0} {0})'.format(scale)],
+                          inputs=[mesh], outputs=[mesh + '/points']))
+    setup = ['constant', 'system', '0']
+    if init_potential and not restart:
+        pipeline.add(Step('potentialFoam', ['potentialFoam'], inputs=setup, outputs=['0']))
+    if run_parallel:
+        if not (restart and glob.glob(os.path.join(pipeline.case, 'processor*'))):
+            pipeline.add(Step('decomposePar', ['decomposePar', '-force'], inputs=setup, outputs=['processor*']))
+        pipeline.add(Step(solver_name, ['mpirun', '-np', num_proc, solver_name, '-parallel'],
+                          inputs=['system', 'processor*/constant', 'processor*/0'],
+                          outputs=['processor*/' + _RESULT_DIRS]))
+        if reconstruct or (reconstruct is None and export_vtk):
+            pipeline.add(Step('reconstructPar', ['reconstructPar', '-newTimes'],
+                              inputs=['processor*/' + _RESULT_DIRS], outputs=[_RESULT_DIRS]))
+    else:
+        pipeline.add(Step(solver_name, [solver_name], inputs=setup, outputs=[_RESULT_DIRS]))
+    if export_vtk:
+        pipeline.add(Step('foamToVTK', ['foamToVTK', '-latestTime'], inputs=[mesh, _RESULT_DIRS], outputs=['VTK']))
+    return pipeline
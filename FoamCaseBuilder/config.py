@@ -1,9 +1,11 @@
 
 from __future__ import print_function
 
+import os
 import os.path
 import platform
 import sys
+import json
 import subprocess
 
 # ubuntu 14.04 defaullt to 3.x, while ubuntu 16.04 default to 4.x, ubuntu 18.04 defaullt to 4.1
@@ -13,6 +15,11 @@ import subprocess
 _DEFAULT_FOAM_DIR = '/opt/openfoam5'
 _DEFAULT_FOAM_VERSION = (5, 0)
 
+# detection runs bash twice (0.5~3 seconds), it is done on the first getFoamDir()/getFoamVersion() call,
+# the result is cached on disk until ~/.bashrc or one of these environment variables is changed
+_CACHE_ENV_VARS = ('WM_PROJECT_DIR', 'WM_PROJECT_VERSION', 'WM_PROJECT', 'FOAM_INST_DIR')
+_BASHRC = '~/.bashrc'
+
 
 def _runCommandOnWSL(cmdstr):
     """ used to detect Foam runtime
@@ -113,7 +120,7 @@ def _detectOpenFOAMcomVersion(foam_ver):
     # OpenFOAM.com (variant name: OpenFOAM+) the commercial version of OpenFOAM, 
     # version pattern is vYYMM  maybe have a ending `+` like `v1612+`
     # return as a integer like 1612
-    yymm = foam_foam[1:] if len(foam_ver)==5 else foam_foam[1:5]
+    yymm = foam_ver[1:] if len(foam_ver)==5 else foam_ver[1:5]
     if yymm.isdigit():
         return int(yymm)
     else:
@@ -147,6 +154,72 @@ def _detectFoamVersion(bashrc = '~/.bashrc'):
         return None
 
 
+def _getCacheFile():
+    cache_dir = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_dir, 'FoamCaseBuilder', 'foam_settings.json')
+
+
+def _getCacheKey(bashrc = _BASHRC):
+    """ detection result is valid as long as bashrc and the foam environment variables are unchanged
+    """
+    bashrc = os.path.expanduser(bashrc)
+    mtime = os.path.getmtime(bashrc) if os.path.exists(bashrc) else None
+    return {'platform': platform.system(), 'bashrc': bashrc, 'mtime': mtime,
+            'env': dict((var, os.environ.get(var)) for var in _CACHE_ENV_VARS)}
+
+
+def _readCache(key):
+    try:
+        with open(_getCacheFile()) as f:
+            cached = json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+    if cached.get('key') != key:
+        return None
+    version = cached['FOAM_VERSION']
+    return {'FOAM_DIR': cached['FOAM_DIR'], 'FOAM_VERSION': tuple(version) if isinstance(version, list) else version}
+
+
+def _writeCache(key, settings):
+    from .filewriter import write_if_changed
+    cache_file = _getCacheFile()
+    content = json.dumps({'key': key, 'FOAM_DIR': settings['FOAM_DIR'], 'FOAM_VERSION': settings['FOAM_VERSION']},
+                         indent=2, sort_keys=True)
+    try:
+        if not os.path.isdir(os.path.dirname(cache_file)):
+            os.makedirs(os.path.dirname(cache_file))
+        write_if_changed(cache_file, lambda f: f.write(content))
+    except (IOError, OSError) as e:
+        print("Warning: failed to write OpenFOAM detection cache {}: {}".format(cache_file, e))
+
+
+def _loadFoamSettings(refresh = False):
+    """ fill _FOAM_SETTINGS from the disk cache, or by detection if the cache is missing, stale or refresh is True
+    values set by setFoamDir()/setFoamVersion() before the first detection are kept unless refresh is True
+    """
+    key = _getCacheKey()
+    settings = None if refresh else _readCache(key)
+    if not settings:
+        detected_dir = _detectFoamDir()
+        detected_version = _detectFoamVersion()
+        settings = {"FOAM_DIR": detected_dir if detected_dir else _DEFAULT_FOAM_DIR,
+                    "FOAM_VERSION": detected_version if detected_version else _DEFAULT_FOAM_VERSION}
+        _writeCache(key, settings)
+    for name, value in settings.items():
+        if refresh or name not in _FOAM_SETTINGS:
+            _FOAM_SETTINGS[name] = value
+    _FOAM_SETTINGS['FOAM_VARIANT'] = _detectFoamVarient()
+    _FOAM_SETTINGS['FOAM_RUNTIME'] = _detectFoamRuntime()
+
+
+def refreshFoamSettings():
+    """ detect OpenFOAM again and update the disk cache, e.g. after installing another OpenFOAM version
+    return a copy of the settings dict
+    """
+    _loadFoamSettings(refresh = True)
+    return dict(_FOAM_SETTINGS)
+
+
 # public API getter and setter for FOAM_SETTINGS
 def setFoamDir(dir):
     if os.path.exists(dir) and os.path.isabs(dir):
@@ -154,6 +227,7 @@ def setFoamDir(dir):
         if os.path.exists(bashrc):
             _FOAM_SETTINGS['FOAM_DIR'] = dir
             _FOAM_SETTINGS['FOAM_VERSION'] = _detectFoamVersion(bashrc)
+            _FOAM_SETTINGS['FOAM_VARIANT'] = _detectFoamVarient()
     else:
         print("Warning: {} does not contain etc/bashrc file to set as foam_dir".format(dir))
 
@@ -165,21 +239,20 @@ def setFoamVersion(ver):
 
 
 def getFoamDir():
-    """detect from output of 'bash -i -c "echo $WM_PROJECT_DIR"', if default is not set
+    """detect from output of 'bash -i -c "echo $WM_PROJECT_DIR"' on the first call, if not set by setFoamDir()
     """
-    if 'FOAM_DIR' in _FOAM_SETTINGS:
-        return _FOAM_SETTINGS['FOAM_DIR']
+    if 'FOAM_DIR' not in _FOAM_SETTINGS:
+        _loadFoamSettings()
+    return _FOAM_SETTINGS['FOAM_DIR']
 
 def getFoamVersion():
-    """ detect version from output of 'bash -i -c "echo $WM_PROJECT_VERSION"' if default is not set
+    """ detect version from output of 'bash -i -c "echo $WM_PROJECT_VERSION"' on the first call, if not set
     """
-    if 'FOAM_VERSION' in _FOAM_SETTINGS:
-        return _FOAM_SETTINGS['FOAM_VERSION']
+    if 'FOAM_VERSION' not in _FOAM_SETTINGS:
+        _loadFoamSettings()
+    return _FOAM_SETTINGS['FOAM_VERSION']
 
-_detectedFoamDir = _detectFoamDir()
-_detectedFoamVersion = _detectFoamVersion()
-_FOAM_SETTINGS = {"FOAM_DIR": _detectedFoamDir if _detectedFoamDir else _DEFAULT_FOAM_DIR, 
-                                "FOAM_VERSION": _detectedFoamVersion if _detectedFoamVersion else _DEFAULT_FOAM_VERSION}
+_FOAM_SETTINGS = {}  # filled lazily by _loadFoamSettings()
 
 # see more details on variants: https://openfoamwiki.net/index.php/Forks_and_Variants
 # http://www.cfdsupport.com/install-openfoam-for-windows.html, using cygwin
@@ -192,7 +265,8 @@ def _detectFoamVarient():
     """ FOAM_EXT version is also detected from 'bash -i -c "echo $WM_PROJECT"'
     return 'foam' for foam-extend , and "OpenFOAM" for the other two
     """
-    if getFoamDir() and getFoamDir().find('ext') > 0:
+    foam_dir = _FOAM_SETTINGS.get('FOAM_DIR')
+    if foam_dir and foam_dir.find('ext') > 0:
         return  "foam-extend"
     else:
         #if getFoamVersion() and isinstance(getFoamVersion(), int):
@@ -207,22 +281,22 @@ def _detectFoamRuntime():
     else:
         return "Posix"
 
-_FOAM_SETTINGS['FOAM_VARIANT'] = _detectFoamVarient()
-_FOAM_SETTINGS['FOAM_RUNTIME'] = _detectFoamRuntime()
 def getFoamVariant():
     """detect from output of 'bash -i -c "echo $WM_PROJECT_DIR"', if default is not set
     """
-    if 'FOAM_VARIANT' in _FOAM_SETTINGS:
-        return _FOAM_SETTINGS['FOAM_VARIANT']
+    if 'FOAM_VARIANT' not in _FOAM_SETTINGS:
+        _loadFoamSettings()
+    return _FOAM_SETTINGS['FOAM_VARIANT']
 
 def isFoamExt():
-    return _FOAM_SETTINGS['FOAM_VARIANT'] == "foam-extend"
+    return getFoamVariant() == "foam-extend"
 
 def getFoamRuntime():
-    """detect from output of 'bash -i -c "echo $WM_PROJECT_DIR"', if default is not set
+    """ 'Posix' or 'BashWSL', it does not need OpenFOAM detection
     """
-    if 'FOAM_RUNTIME' in _FOAM_SETTINGS:
-        return _FOAM_SETTINGS['FOAM_RUNTIME']
+    if 'FOAM_RUNTIME' not in _FOAM_SETTINGS:
+        _FOAM_SETTINGS['FOAM_RUNTIME'] = _detectFoamRuntime()
+    return _FOAM_SETTINGS['FOAM_RUNTIME']
 
 
 if __name__ == "__main__":
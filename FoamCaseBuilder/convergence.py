@@ -0,0 +1,381 @@
+# coding=utf-8
+
+from __future__ import print_function, absolute_import
+
+"""Live convergence watcher stopping a solver when its residuals stall.
+
+residualControl of fvSolution stops a steady solver only below fixed absolute
+residuals, a run whose residuals flatten above them iterates until endTime.
+The watcher is fed with the solver output, from the stdout of a running process
+by feed() or by tailing the log file with poll(), and judges the initial residual
+of each field over a window of the latest time steps on a log10 scale:
+
+    plateau: the fitted trend drops less than `plateau_tolerance` decades over
+        `plateau_window` steps and the residual stays within `oscillation_amplitude` decades
+    oscillation: the trend over `oscillation_window` steps drops less than
+        `plateau_tolerance` decades, while the residual swings by `oscillation_amplitude` or more
+
+A run is stalled when all watched fields are in plateau or oscillation. Monitors of
+other quantities printed to the log, like the force coefficients of a function object,
+converge when their values of the last window stay within a relative tolerance.
+On a stalled run, or when all monitors have converged, `stopAt writeNow` is set in
+`system/controlDict`, the solver re-reads it (runTimeModifiable), writes the current
+time and exits normally. restore() sets stopAt back once the solver has exited, so
+the next run of the case is not stopped at its first step; watch() does so itself.
+
+Used with the runner, which needs Python 3.7+:
+
+    watcher = ConvergenceWatcher(case, plateau_window=200,
+                                 monitors=[Monitor('Cd', r'Cd\\s*[:=]\\s*([-+.\\deE]+)', window=100, tolerance=1e-4)])
+    exit_code = asyncio.run(run_foam_application('simpleFoam', case, stdout_callback=watcher.feed))
+    print(watcher.stop_reason)
+    watcher.restore()
+
+or for a solver started otherwise, e.g. by Allrun:
+
+    python -m FoamCaseBuilder.convergence case --log log.simpleFoam
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import collections
+
+import numpy
+
+from .filewriter import write_if_changed
+
+_stop_pattern = re.compile(r'^([ \t]*stopAt[ \t]+)(\w+)([ \t]*;)', re.MULTILINE)
+_modifiable_pattern = re.compile(r'^[ \t]*runTimeModifiable[ \t]+(\w+)[ \t]*;', re.MULTILINE)
+_false_words = ('false', 'off', 'no', 'none', 'n', 'f')
+_end_pattern = re.compile(br'^End[ \t]*\r?$', re.MULTILINE)  # last line of a solver run
+_residual_pattern = re.compile(br'''^(?:
+    Time\ =\ (?P<time>[-+.\deE]+)[\ \t\r]*$
+    |[\ \t]*\w+:\s+Solving\ for\ (?P<field>[\w.:]+),\ Initial\ residual\ =\ (?P<initial>[-+.\deE]+),
+    )''', re.MULTILINE | re.VERBOSE)
+
+
+def _set_stop_at(filepath, text, stop_at):
+    """Write stopAt into controlDict text, return its previous value, None if there was no entry."""
+    match = _stop_pattern.search(text)
+    if match:
+        new_text = text[:match.start(2)] + stop_at + text[match.end(2):]
+    else:
+        new_text = text.rstrip('\n') + '\n\nstopAt          {};\n'.format(stop_at)
+    write_if_changed(filepath, lambda f: f.write(new_text))
+    return match.group(2) if match else None
+
+
+def request_stop(case, stop_at='writeNow'):
+    """Set `stopAt` in `system/controlDict` of the case, only the value of the entry is replaced.
+
+    Returns:
+        The previous value of stopAt, None if controlDict has no stopAt entry.
+    """
+    filepath = os.path.join(case, 'system', 'controlDict')
+    with open(filepath, 'r') as f:
+        text = f.read()
+    modifiable = _modifiable_pattern.search(text)
+    if modifiable and modifiable.group(1).lower() in _false_words:
+        print("Warning: runTimeModifiable is {} in {}, the running solver will not see stopAt {}".format(
+            modifiable.group(1), filepath, stop_at))
+    return _set_stop_at(filepath, text, stop_at)
+
+
+def residual_trend(values):
+    """Drop of log10(values) fitted by least squares over the values, in decades; NaN are ignored.
+
+    Returns:
+        (drop, swing): decades the trend line falls from the first to the last value, positive
+        for decreasing values, and the peak-to-peak decades around the trend line.
+    """
+    y = numpy.log10(numpy.maximum(numpy.asarray(values, dtype=numpy.float64), 1e-300))
+    x = numpy.arange(len(y), dtype=numpy.float64)
+    valid = numpy.isfinite(y)
+    if valid.sum() < 3:
+        return numpy.nan, numpy.nan
+    x, y = x[valid], y[valid]
+    slope, intercept = numpy.polyfit(x, y, 1)
+    deviation = y - (slope * x + intercept)
+    return -slope * (len(values) - 1), float(deviation.max() - deviation.min())
+
+
+class Monitor(object):
+    """A quantity printed to the log, converged when it is steady over a window of its latest values.
+
+    Attributes:
+        name: Name of the quantity.
+        pattern: Regular expression matched in each line, its first group is the value.
+        window: Number of latest values judged.
+        tolerance: Largest (max - min) / |mean| of the window of a converged quantity.
+        values: Deque of the latest values.
+    """
+
+    def __init__(self, name, pattern, window=50, tolerance=1e-3):
+        self.name = name
+        self.pattern = re.compile(pattern.encode('utf-8') if not isinstance(pattern, bytes) else pattern,
+                                  re.MULTILINE)
+        self.window = window
+        self.tolerance = tolerance
+        self.values = collections.deque(maxlen=window)
+        self.count = 0
+
+    def feed(self, data):
+        """Collect the values matched in complete lines of data in bytes."""
+        for m in self.pattern.finditer(data):
+            try:
+                self.values.append(float(m.group(1)))
+            except ValueError:
+                continue
+            self.count += 1
+
+    def spread(self):
+        """Relative spread (max - min) / |mean| of the window, NaN before the window is filled."""
+        if len(self.values) < self.window:
+            return numpy.nan
+        values = numpy.array(self.values)
+        return float(numpy.ptp(values) / max(abs(values.mean()), 1e-300))
+
+    def converged(self):
+        return bool(self.spread() <= self.tolerance)
+
+
+class ConvergenceWatcher(object):
+    """Judge the solver output as it arrives and request a graceful stop once it stops converging.
+
+    Attributes:
+        case: Case path, its system/controlDict is changed to stop the solver.
+        fields: Names of the fields whose initial residuals are judged, None for all solved fields.
+        plateau_window: Number of steps over which a plateau is judged.
+        oscillation_window: Number of steps over which an oscillation is judged.
+        plateau_tolerance: Smallest drop in decades over a window of a converging residual.
+        oscillation_amplitude: Peak-to-peak decades around the trend from which a stalled residual oscillates.
+        min_steps: Number of steps before the first judgement, to skip the start-up transient.
+        check_interval: Judge every this number of steps.
+        monitors: List of Monitor, the solver is stopped when all of them have converged.
+        residuals: False to judge only the monitors.
+        stop: False to only report, without changing controlDict.
+        log: Path of the solver log tailed by poll() and watch().
+        stop_reason: Text why the stop is requested, None while running.
+        finished: True once the solver has written the End of its run to the output.
+        steps: Number of time steps seen so far.
+        residuals_history: OrderedDict of field name and deque of the initial residuals of the latest
+            steps, NaN for a step not solving the field; only the judged windows are kept.
+    """
+
+    def __init__(self, case, fields=None, plateau_window=100, oscillation_window=None, plateau_tolerance=0.1,
+                 oscillation_amplitude=0.5, min_steps=None, check_interval=10, monitors=(), residuals=True,
+                 stop=True, log=None):
+        self.case = case
+        self.fields = fields
+        self.plateau_window = plateau_window
+        self.oscillation_window = oscillation_window or 2 * plateau_window
+        self.plateau_tolerance = plateau_tolerance
+        self.oscillation_amplitude = oscillation_amplitude
+        self.min_steps = max(self.plateau_window, self.oscillation_window) if min_steps is None else min_steps
+        self.check_interval = max(1, check_interval)
+        self.monitors = list(monitors)
+        self.residuals = residuals
+        self.stop = stop
+        self.log = log
+        self.status = collections.OrderedDict()  # field name -> 'converging', 'plateau' or 'oscillation'
+        self._stop_at = None  # (stopAt before the stop request, requested stopAt) until restore()
+        self.reset()
+
+    def feed(self, text):
+        """Take a chunk of solver output, return stop_reason once the stop is requested."""
+        if not isinstance(text, bytes):
+            text = text.encode('utf-8')
+        data = self._partial + text
+        end = data.rfind(b'\n') + 1
+        self._partial = data[end:]
+        if end and _end_pattern.search(data, 0, end):
+            self.finished = True
+        if end and self.stop_reason is None:
+            data = data[:end]
+            self._parse_residuals(data)
+            for monitor in self.monitors:
+                monitor.feed(data)
+            if self.steps - self._checked_steps >= self.check_interval:
+                self.check()
+        return self.stop_reason
+
+    def poll(self):
+        """Feed the bytes appended to the log file since the last call, return stop_reason."""
+        if self.log is None:
+            raise ValueError('no log file to poll, give `log` to the watcher')
+        if not os.path.exists(self.log):
+            return self.stop_reason
+        if os.path.getsize(self.log) < self.offset:  # the log is rewritten by a new run
+            self.reset()
+        with open(self.log, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read()
+        self.offset += len(data)
+        return self.feed(data)
+
+    def reset(self):
+        """Forget the output seen so far, for a new run of the solver."""
+        self.offset = 0  # bytes of the log read by poll()
+        self.stop_reason = None
+        self.finished = False
+        self.status.clear()
+        self.steps = 0
+        self.residuals_history = collections.OrderedDict()
+        self._row = None  # field name -> first initial residual in the current step
+        self._partial = b''
+        self._checked_steps = 0
+        for monitor in self.monitors:
+            monitor.values.clear()
+            monitor.count = 0
+
+    def _parse_residuals(self, data):
+        """Keep the first initial residual of each field per step, in rings of the longest window."""
+        history = max(self.plateau_window, self.oscillation_window)
+        for m in _residual_pattern.finditer(data):
+            if m.group('time') is not None:
+                if self._row is not None:
+                    for field, values in self.residuals_history.items():
+                        values.append(self._row.get(field, numpy.nan))
+                self._row = {}
+                self.steps += 1
+            elif self._row is not None:  # solves before the first time step, like potentialFoam, are skipped
+                field = m.group('field').decode('latin-1')
+                if field not in self.residuals_history:
+                    self.residuals_history[field] = collections.deque(maxlen=history)
+                if field not in self._row:
+                    try:
+                        self._row[field] = float(m.group('initial'))
+                    except ValueError:
+                        continue
+
+    def _latest(self, field):
+        """Initial residuals of the field over the kept steps, including the current step."""
+        values = list(self.residuals_history[field])
+        if self._row is not None:
+            values.append(self._row.get(field, numpy.nan))
+        return values
+
+    def restore(self):
+        """Set stopAt in controlDict back to its value before the stop request, after the solver has exited.
+
+        stopAt is left alone if it was changed since the request. Returns True if it is restored.
+        """
+        if self._stop_at is None:
+            return False
+        previous, requested = self._stop_at
+        self._stop_at = None
+        filepath = os.path.join(self.case, 'system', 'controlDict')
+        with open(filepath, 'r') as f:
+            text = f.read()
+        match = _stop_pattern.search(text)
+        if not match or match.group(2) != requested:
+            return False
+        _set_stop_at(filepath, text, previous or 'endTime')  # endTime is the default of OpenFOAM
+        print("Info: stopAt {} is restored in {}".format(previous or 'endTime', filepath))
+        return True
+
+    def watch(self, poll_interval=2.0, running=None):
+        """Tail the log until the solver has exited or running() returns False, return stop_reason.
+
+        The solver has exited once it writes End to the log; stopAt is restored then after an early stop.
+        """
+        while True:
+            alive = running is None or running()
+            self.poll()
+            if self.finished or not alive:
+                break
+            time.sleep(poll_interval)
+        self.restore()
+        return self.stop_reason
+
+    def _judge(self, values, window):
+        if len(values) < window:
+            return None
+        drop, swing = residual_trend(values[-window:])
+        if numpy.isnan(drop):  # the field is not solved lately
+            return None
+        if drop >= self.plateau_tolerance:
+            return 'converging'
+        return 'oscillation' if swing >= self.oscillation_amplitude else 'plateau'
+
+    def check(self):
+        """Judge the residuals of the latest windows and the monitors, request the stop if the run has stalled.
+
+        Returns:
+            stop_reason, None if the run goes on.
+        """
+        nsteps = self.steps
+        self._checked_steps = nsteps
+        if self.stop_reason is not None or nsteps < self.min_steps:
+            return self.stop_reason
+        reason = None
+        if self.residuals:
+            fields = self.fields if self.fields is not None else list(self.residuals_history)
+            self.status.clear()
+            for field in fields:
+                if field not in self.residuals_history:
+                    continue
+                values = self._latest(field)
+                status = self._judge(values, self.plateau_window)
+                if status != 'plateau':  # no plateau, but it may oscillate over its longer window
+                    oscillation = self._judge(values, self.oscillation_window)
+                    status = 'oscillation' if oscillation == 'oscillation' else status
+                if status is not None:
+                    self.status[field] = status
+            if self.status and all(s != 'converging' for s in self.status.values()):
+                reason = 'residuals stalled at step {}: {}'.format(
+                    nsteps, ', '.join('{} {}'.format(f, s) for f, s in self.status.items()))
+        if reason is None and self.monitors and all(m.converged() for m in self.monitors):
+            reason = 'monitors converged at step {}: {}'.format(
+                nsteps, ', '.join('{} {:.3g}'.format(m.name, m.values[-1]) for m in self.monitors))
+        if reason is not None:
+            self.stop_reason = reason
+            print("Info: convergence watcher, " + reason)
+            if self.stop:
+                self._stop_at = (request_stop(self.case), 'writeNow')
+                print("Info: stopAt writeNow is set in {}".format(os.path.join(self.case, 'system', 'controlDict')))
+        return self.stop_reason
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m FoamCaseBuilder.convergence',
+                                     description='Stop an OpenFOAM solver when its residuals stall')
+    parser.add_argument('case')
+    parser.add_argument('--log', default=None, help='solver log, default the newest log.* in the case')
+    parser.add_argument('--window', type=int, default=100, help='steps of the plateau window')
+    parser.add_argument('--oscillation-window', type=int, default=None, help='default twice the plateau window')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='decades a converging residual drops per window')
+    parser.add_argument('--amplitude', type=float, default=0.5, help='decades of an oscillation')
+    parser.add_argument('--field', action='append', default=None, help='field to judge, default all')
+    parser.add_argument('--monitor', nargs=2, action='append', default=[], metavar=('NAME', 'REGEX'),
+                        help='quantity printed to the log, the first group of REGEX is the value')
+    parser.add_argument('--monitor-window', type=int, default=50)
+    parser.add_argument('--monitor-tolerance', type=float, default=1e-3)
+    parser.add_argument('--dry-run', action='store_true', help='report without changing controlDict')
+    parser.add_argument('--interval', type=float, default=2.0)
+    args = parser.parse_args(argv)
+
+    log = args.log and os.path.join(args.case, args.log)
+    if not log:
+        logs = [os.path.join(args.case, n) for n in os.listdir(args.case) if n.startswith('log.') and '.' not in n[4:]]
+        if not logs:
+            print("Error: no solver log found in {}".format(args.case))
+            return 1
+        log = max(logs, key=os.path.getmtime)
+    monitors = [Monitor(name, regex, args.monitor_window, args.monitor_tolerance) for name, regex in args.monitor]
+    watcher = ConvergenceWatcher(args.case, args.field, args.window, args.oscillation_window, args.tolerance,
+                                 args.amplitude, monitors=monitors, stop=not args.dry_run, log=log)
+    print("Info: watching {}".format(log))
+    try:
+        reason = watcher.watch(args.interval)
+    except KeyboardInterrupt:
+        reason = None
+    print(reason or "Info: stopped watching without a stop request")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+# coding=utf-8
+
+from __future__ import print_function, absolute_import
+
+"""Process wide cache of parsed OpenFOAM dictionaries.
+
+An entry is valid as long as (realpath, mtime_ns, size) of the file is unchanged,
+entries are evicted in least recently used order once the estimated size of all
+parsed values exceeds `max_bytes`. Every `get()` returns a copy of the dictionaries,
+so callers can mutate the returned dictionary without affecting the cache. Arrays
+are not copied: they are returned as read only views, shared with the cache and,
+for binary files, with the mmap of the file; writable() copies one before it is
+modified in place.
+
+    from FoamCaseBuilder.dictcache import parsed_dict_cache
+    parsed_dict_cache.max_bytes = 512 * 1024 * 1024
+    print(parsed_dict_cache.stats())
+"""
+
+import os
+import sys
+import threading
+import collections
+from copy import deepcopy
+
+import numpy
+
+
+def _file_key(filepath):
+    """Return (realpath, mtime_ns, size) of the file."""
+    realpath = os.path.realpath(filepath)
+    st = os.stat(realpath)
+    mtime_ns = getattr(st, 'st_mtime_ns', None) or int(st.st_mtime * 1e9)
+    return realpath, mtime_ns, st.st_size
+
+
+def writable(array):
+    """Return the array if it can be modified in place, else a copy, e.g. of a read only cached array."""
+    return array if array.flags.writeable else array.copy()
+
+
+def _read_only(array):
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+def copy_value(value):
+    """Copy a parsed value, faster than deepcopy for dictionaries of strings; arrays become read only views."""
+    if isinstance(value, dict):
+        return value.__class__((k, copy_value(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return [copy_value(v) for v in value]
+    if isinstance(value, tuple):
+        return tuple(copy_value(v) for v in value)
+    if isinstance(value, numpy.ndarray):
+        return _read_only(value)
+    if isinstance(value, (str, bytes, int, float, type(None))):
+        return value
+    return deepcopy(value)
+
+
+def estimate_size(value):
+    """Estimate the memory used by a parsed dictionary in bytes."""
+    if isinstance(value, numpy.ndarray):
+        return value.nbytes  # also views of a mmap, the mapping stays open as long as the entry is cached
+    if isinstance(value, dict):
+        return sum(sys.getsizeof(k) + estimate_size(v) for k, v in value.items()) + sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(v) for v in value) + sys.getsizeof(value)
+    return sys.getsizeof(value)
+
+
+class ParsedDictCache(object):
+    """LRU cache of parsed files keyed by file path, validated by mtime and size.
+
+    Attributes:
+        max_bytes: Upper limit of the estimated size of all cached values.
+        hits, misses, evictions: Statistics since creation or the last clear().
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = collections.OrderedDict()  # (realpath, tag) -> (key, value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, filepath, loader, tag=None):
+        """Return a copy of the value loaded by `loader(filepath)`, loading it on miss.
+
+        Args:
+            filepath: Path of the file, symbolic links are resolved.
+            loader: Function parsing the file.
+            tag: Optional name to cache different parsed forms of the same file.
+        """
+        key = _file_key(filepath)
+        name = (key[0], tag)
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry and entry[0] == key:
+                self._entries[name] = self._entries.pop(name)  # most recently used, no move_to_end() on py2
+                self.hits += 1
+                return copy_value(entry[1])
+            self.misses += 1
+
+        value = copy_value(loader(filepath))  # the cached arrays are read only too
+        size = estimate_size(value)
+        with self._lock:
+            self._remove(name)
+            if size <= self.max_bytes:
+                self._entries[name] = (key, value, size)
+                self._bytes += size
+                self._evict()
+        return copy_value(value)
+
+    def invalidate(self, filepath):
+        """Drop all entries of the file, called after the file is written."""
+        realpath = os.path.realpath(filepath)
+        with self._lock:
+            for name in [n for n in self._entries if n[0] == realpath]:
+                self._remove(name)
+
+    def clear(self):
+        """Drop all entries and reset statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Return statistics as a dictionary."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'hit_ratio': float(self.hits) / total if total else 0.0,
+                    'entries': len(self._entries), 'bytes': self._bytes, 'max_bytes': self.max_bytes}
+
+    def _remove(self, name):
+        entry = self._entries.pop(name, None)
+        if entry:
+            self._bytes -= entry[2]
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._entries:
+            name, entry = self._entries.popitem(last=False)
+            self._bytes -= entry[2]
+            self.evictions += 1
+
+
+parsed_dict_cache = ParsedDictCache()
@@ -0,0 +1,143 @@
+# coding=utf-8
+
+from __future__ import print_function, absolute_import
+
+"""Downsampling of long plot series to a fixed number of points.
+
+lttb() picks the visually most significant points of a whole series by the
+Largest-Triangle-Three-Buckets algorithm. MinMaxDecimator is incremental: points
+are added as they arrive and kept as the min and max of buckets, the bucket width
+doubles whenever the bucket count reaches the budget, so peaks are never lost and
+the cost of adding and drawing does not grow with the length of the run. The first
+and the latest points are always drawn, so the plot ends at the current iteration.
+
+    decimator = MinMaxDecimator(budget=2000)
+    decimator.extend(iterations, residuals)
+    line.set_data(*decimator.points())
+"""
+
+import numpy
+
+
+def lttb(x, y, threshold):
+    """Downsample (x, y) to `threshold` points by Largest-Triangle-Three-Buckets.
+
+    Args:
+        x: 1D array sorted ascending.
+        y: 1D array of the same length.
+        threshold: Number of points to keep, at least 3; all points are returned if fewer.
+
+    Returns:
+        (x, y) arrays of the kept points, first and last points are always kept.
+    """
+    x = numpy.asarray(x, dtype=numpy.float64)
+    y = numpy.asarray(y, dtype=numpy.float64)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+    # bucket i covers points [edges[i], edges[i+1]), first and last points are buckets of their own
+    edges = numpy.linspace(1, n - 1, threshold - 1).astype(numpy.int64)
+    selected = numpy.empty(threshold, dtype=numpy.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):  # average of the next bucket
+            next_x, next_y = x[end:edges[i + 2]].mean(), y[end:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        area = numpy.abs((x[a] - next_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (next_y - y[a]))
+        a = start + int(numpy.argmax(area))
+        selected[i + 1] = a
+    return x[selected], y[selected]
+
+
+class MinMaxDecimator(object):
+    """Incremental min/max bucketing of a series with a fixed point budget.
+
+    Attributes:
+        budget: Maximum number of points returned by points().
+        bucket_size: Number of input points per bucket, a power of 2.
+        count: Number of input points.
+    """
+
+    def __init__(self, budget=2000):
+        self.budget = max(4, budget)
+        self._max_buckets = (self.budget - 2) // 2  # two points per bucket, plus the first and latest points
+        self.clear()
+
+    def clear(self):
+        self.bucket_size = 1
+        self.count = 0
+        self._n = 0
+        # per bucket: x and y of the min point, x and y of the max point, number of input points
+        self._buckets = numpy.empty((self._max_buckets, 4))
+        self._sizes = numpy.zeros(self._max_buckets, dtype=numpy.int64)
+        self._first = self._last = None
+
+    def __len__(self):
+        return self._n
+
+    def extend(self, x, y):
+        """Add points in ascending x order."""
+        for xi, yi in zip(numpy.asarray(x, dtype=numpy.float64).tolist(),
+                          numpy.asarray(y, dtype=numpy.float64).tolist()):
+            self.append(xi, yi)
+
+    def append(self, x, y):
+        """Add one point."""
+        n = self._n
+        if n and self._sizes[n - 1] < self.bucket_size:
+            b = self._buckets[n - 1]
+            if y < b[1]:
+                b[0], b[1] = x, y
+            if y > b[3]:
+                b[2], b[3] = x, y
+            self._sizes[n - 1] += 1
+        else:
+            if n == self._max_buckets:
+                self._merge()
+                n = self._n
+            self._buckets[n] = (x, y, x, y)
+            self._sizes[n] = 1
+            self._n += 1
+        if self._first is None:
+            self._first = (x, y)
+        self._last = (x, y)
+        self.count += 1
+
+    def _merge(self):
+        """Merge pairs of buckets, the bucket size is doubled."""
+        n = self._n // 2 * 2
+        left, right = self._buckets[0:n:2], self._buckets[1:n:2]
+        merged = left.copy()
+        use_right = right[:, 1] < left[:, 1]
+        merged[use_right, 0:2] = right[use_right, 0:2]
+        use_right = right[:, 3] > left[:, 3]
+        merged[use_right, 2:4] = right[use_right, 2:4]
+        sizes = self._sizes[0:n:2] + self._sizes[1:n:2]
+        if self._n > n:  # odd bucket count, the last one is kept as it is
+            merged = numpy.vstack([merged, self._buckets[n:self._n]])
+            sizes = numpy.append(sizes, self._sizes[n:self._n])
+        self._n = len(merged)
+        self._buckets[:self._n] = merged
+        self._sizes[:self._n] = sizes
+        self._sizes[self._n:] = 0
+        self.bucket_size *= 2
+
+    def points(self):
+        """Return (x, y) arrays of at most `budget` points in ascending x order, with the first and latest points."""
+        b = self._buckets[:self._n]
+        min_first = b[:, 0] <= b[:, 2]
+        x = numpy.where(min_first[:, None], b[:, [0, 2]], b[:, [2, 0]]).ravel()
+        y = numpy.where(min_first[:, None], b[:, [1, 3]], b[:, [3, 1]]).ravel()
+        single = numpy.repeat(self._sizes[:self._n] == 1, 2)
+        single[0::2] = False  # a single point bucket gives its point once
+        x, y = x[~single], y[~single]
+        if not len(x):
+            return x, y
+        if x[0] > self._first[0]:  # the first point is neither min nor max of its bucket
+            x, y = numpy.insert(x, 0, self._first[0]), numpy.insert(y, 0, self._first[1])
+        if x[-1] < self._last[0]:
+            x, y = numpy.append(x, self._last[0]), numpy.append(y, self._last[1])
+        return x, y
@@ -0,0 +1,152 @@
+# coding=utf-8
+
+from __future__ import print_function, absolute_import
+
+"""Atomic file writing that leaves byte identical files untouched.
+
+New content is streamed into a temporary file in the same folder while its hash
+is computed. If the existing file has the same size and hash, the temporary file
+is removed and the original keeps its mtime; otherwise it is renamed into place.
+A path ending with `.gz` is gzip compressed on the fly, the hash is taken over the
+uncompressed content, so compression level or gzip header do not matter.
+Every write is recorded in `write_report`, to be summarized per case:
+
+    write_report.clear()
+    builder.build()
+    print(write_report.summary(case_path))
+"""
+
+import os
+import gzip
+import os.path
+import hashlib
+import tempfile
+import threading
+
+_hash_chunk_size = 1 << 20
+
+
+def replace_file(src, dst):
+    """Rename src to dst, replacing dst if it exists, atomically on POSIX; os.replace() of Python 3.3+."""
+    if hasattr(os, 'replace'):
+        os.replace(src, dst)
+    else:  # Python 2: rename replaces on POSIX but not on windows
+        if os.name == 'nt' and os.path.exists(dst):
+            os.remove(dst)
+        os.rename(src, dst)
+
+
+class _HashingFile(object):
+    """File wrapper computing hash and size of everything written."""
+
+    def __init__(self, f):
+        self._f = f
+        self.hash = hashlib.sha1()
+        self.size = 0
+
+    def write(self, data):
+        if isinstance(data, str) and not isinstance(data, bytes):
+            data = data.encode('utf-8')
+        self.hash.update(data)
+        self.size += len(data)
+        self._f.write(data)
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+
+def _file_hash(filepath):
+    h = hashlib.sha1()
+    try:
+        with (gzip.open(filepath, 'rb') if filepath.endswith('.gz') else open(filepath, 'rb')) as f:
+            for chunk in iter(lambda: f.read(_hash_chunk_size), b''):
+                h.update(chunk)
+    except (OSError, EOFError):  # truncated or not a gzip file, to be replaced
+        return None
+    return h.digest()
+
+
+def write_if_changed(filepath, write, before_replace=None):
+    """Write a file by `write(f)` unless the content is unchanged.
+
+    Args:
+        filepath: Path of the file to write, gzip compressed if it ends with `.gz`.
+        write: Function writing the content to f, str is encoded as utf-8.
+        before_replace: Function called once the new content is complete, just before it replaces
+            the file, e.g. to release a mapping of the file that windows would not let be replaced.
+
+    Returns:
+        True if the file is written, False if it is byte identical and skipped.
+    """
+    folder = os.path.dirname(os.path.abspath(filepath))
+    fd, temp_path = tempfile.mkstemp(prefix='.' + os.path.basename(filepath), dir=folder)
+    try:
+        compressed = filepath.endswith('.gz')
+        with os.fdopen(fd, 'wb') as f:
+            if compressed:
+                # mtime=0 and no file name in the gzip header: same content gives same bytes
+                with gzip.GzipFile(filename='', mode='wb', fileobj=f, mtime=0) as gz:
+                    hf = _HashingFile(gz)
+                    write(hf)
+            else:
+                hf = _HashingFile(f)
+                write(hf)
+        unchanged = os.path.isfile(filepath) \
+            and (compressed or os.path.getsize(filepath) == hf.size) \
+            and _file_hash(filepath) == hf.hash.digest()
+        if unchanged:
+            os.remove(temp_path)
+        else:
+            if os.path.isfile(filepath):  # mkstemp creates the file readable by owner only
+                os.chmod(temp_path, os.stat(filepath).st_mode & 0o7777)
+            else:
+                umask = os.umask(0)
+                os.umask(umask)
+                os.chmod(temp_path, 0o666 & ~umask)
+            if before_replace:
+                before_replace()
+            replace_file(temp_path, filepath)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    write_report.record(filepath, not unchanged)
+    return not unchanged
+
+
+class WriteReport(object):
+    """Record of files written and skipped as unchanged."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records = {}  # realpath -> True if written in the last write
+
+    def record(self, filepath, written):
+        with self._lock:
+            self._records[os.path.realpath(filepath)] = written
+
+    def clear(self, case_path=None):
+        """Forget records of files inside case_path (default all)."""
+        prefix = os.path.realpath(case_path) + os.path.sep if case_path else ''
+        with self._lock:
+            for path in [p for p in self._records if p.startswith(prefix)]:
+                del self._records[path]
+
+    def report(self, case_path=None):
+        """Return {'written': [...], 'skipped': [...]} of files inside case_path (default all)."""
+        prefix = os.path.realpath(case_path) + os.path.sep if case_path else ''
+        result = {'written': [], 'skipped': []}
+        with self._lock:
+            for path, written in sorted(self._records.items()):
+                if path.startswith(prefix):
+                    result['written' if written else 'skipped'].append(path)
+        return result
+
+    def summary(self, case_path=None):
+        """Return a one line text summary, e.g. `3 files written, 12 unchanged files skipped`."""
+        r = self.report(case_path)
+        return '{} files written, {} unchanged files skipped'.format(len(r['written']), len(r['skipped']))
+
+
+write_report = WriteReport()
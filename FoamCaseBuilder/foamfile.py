@@ -6,10 +6,14 @@ from __future__ import print_function, absolute_import
 
 import os
 import os.path
-import json
+import re
+import io
+import mmap
 import collections
 from copy import deepcopy
 
+import numpy
+
 # used in header() function only, can be replaced by FoamCaseBuilder's
 #from .version import Version, Header
 
@@ -19,7 +23,143 @@ from .FoamTemplateString import getFoamFileHeader
 # used in class FoamFileZeroFolder(FoamFile), this will be removed in this adaption
 #from .utilities import get_boundary_field_from_geometries
 
-from .parser import CppDictParser
+from .parser import CppDictParser, resolve_gz_path, read_file_bytes
+from .binaryfile import BinaryFoamFile, is_binary_file, _header_pattern
+from .dictcache import parsed_dict_cache
+from .filewriter import write_if_changed
+
+# number of float64 components of OpenFOAM field types in `nonuniform List<type>`
+_field_components = {'scalar': 1, 'vector': 3, 'sphericalTensor': 1, 'symmTensor': 6, 'tensor': 9}
+_list_end_pattern = re.compile(r'\)\s*\)')
+# rows of a nonuniform list formatted or converted at a time by the writer
+_chunk_rows = 1 << 16
+
+
+def read_nonuniform_list(list_type, count, text, pos):
+    """Decode the payload of ascii `nonuniform List<type> count (...)` into numpy.ndarray.
+
+    All numbers are decoded by numpy in one pass without creating a Python object
+    per value, used as `list_reader` of CppDictParser.
+
+    Args:
+        list_type: Field type inside `List<>`, e.g. scalar or vector
+        count: Number of items in the list
+        text: Dictionary text
+        pos: Position just after the opening bracket of the list
+
+    Returns:
+        (array, end) where end is the position after the closing bracket,
+        array has shape (count,) for scalar or (count, n) for other types.
+        None if the type is not a field type or the payload can not be decoded.
+    """
+    if list_type not in _field_components:
+        return None
+    ncomp = _field_components[list_type]
+    if ncomp == 1 or count == 0:
+        end = text.find(')', pos)
+    else:
+        m = _list_end_pattern.search(text, pos)
+        end = m.end() - 1 if m else -1
+    if end < 0:
+        return None
+    payload = text[pos:end]
+    if ncomp > 1:
+        payload = payload.replace('(', ' ').replace(')', ' ')
+    try:
+        data = numpy.array(payload.split(), dtype=numpy.float64)
+    except ValueError:  # comments or other tokens which are not numbers
+        return None
+    if data.size != count * ncomp:
+        return None  # comments or other tokens inside, leave it to the parser
+    if ncomp > 1:
+        data = data.reshape(count, ncomp)
+    return data, end + 1
+
+
+def write_nonuniform_list(f, data, file_format='ascii'):
+    """Write a numpy.ndarray as `nonuniform List<type> N(...)` to a file opened in binary mode.
+
+    The array is formatted (ascii) or converted to little endian float64 (binary)
+    `_chunk_rows` rows at a time, memory use does not grow with the array size.
+    """
+    data = numpy.asarray(data)
+    ncomp = 1 if data.ndim == 1 else data.shape[1]
+    list_type = [k for k, v in _field_components.items() if v == ncomp and k != 'sphericalTensor'][0]
+    binary = file_format == 'binary'
+    f.write('nonuniform List<{}> {}\n('.format(list_type, len(data)).encode('ascii'))
+    if not binary:
+        f.write(b'\n')
+    row_format = '%r\n' if ncomp == 1 else '(' + ' '.join(['%r'] * ncomp) + ')\n'
+    for start in range(0, len(data), _chunk_rows):
+        chunk = data[start:start + _chunk_rows]
+        if binary:
+            f.write(numpy.ascontiguousarray(chunk, dtype='<f8').tobytes())
+        else:
+            values = tuple(chunk.astype(numpy.float64).ravel().tolist())
+            f.write((row_format * len(chunk) % values).encode('ascii'))
+    f.write(b')' if binary else b')\n')
+
+
+def format_value(value):
+    """Format a Python value of a dictionary entry as OpenFOAM text."""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float)):
+        return repr(value)
+    if isinstance(value, (list, tuple)):
+        return '(' + ' '.join(format_value(v) for v in value) + ')'
+    return str(value)
+
+
+def write_entries(f, values, file_format='ascii', indent=0):
+    """Write dictionary entries to a file opened in binary mode.
+
+    Nested dictionaries are written recursively and numpy arrays by
+    write_nonuniform_list(), nothing is accumulated in memory.
+    Entries with None or empty string value are skipped.
+
+    Args:
+        f: File like object with write(bytes)
+        values: Dictionary of entries
+        file_format: ascii or binary, format of the nonuniform lists
+        indent: Number of spaces to indent the entries
+    """
+    pad = ' ' * indent
+    for key, value in values.items():
+        if value is None or (isinstance(value, str) and not value):
+            continue
+        if file_format == 'binary' and isinstance(value, str) and value.startswith('nonuniform'):
+            # ascii list kept as text by the parser, it must be binary in a binary file
+            value = CppDictParser('v ' + value + ';', read_nonuniform_list).values['v']
+        if isinstance(value, LazyInternalField):
+            value.write(f)
+            f.write(b'\n')
+        elif isinstance(value, dict):
+            f.write('{}{}\n{}{{\n'.format(pad, key, pad).encode('latin-1'))
+            write_entries(f, value, file_format, indent + 4)
+            f.write('{}}}\n'.format(pad).encode('latin-1'))
+        elif isinstance(value, numpy.ndarray):
+            f.write('{}{:<15} '.format(pad, key).encode('latin-1'))
+            write_nonuniform_list(f, value, file_format)
+            f.write(b';\n')
+        elif not key or key.startswith('#'):  # keyless list or directive like `#includeEtc "file"`
+            text = key + ' ' + format_value(value) if key else format_value(value)
+            f.write('{}{}\n'.format(pad, text).encode('latin-1'))
+        else:
+            f.write('{}{:<15} {};\n'.format(pad, key, format_value(value)).encode('latin-1'))
+        if indent == 0:
+            f.write(b'\n')
+
+
+def _load_values(filepath):
+    """Parse an ascii or binary dictionary file including the FoamFile header."""
+    if is_binary_file(filepath):
+        # binary polyMesh lists like owner and points should be read by BinaryFoamFile.read_list()
+        binary_file = BinaryFoamFile(filepath)
+        values = binary_file.read_field()
+        values['FoamFile'] = binary_file.header
+        return values
+    return CppDictParser.from_file(filepath, read_nonuniform_list).values
 
 #from collections.abc import MutableMapping
 #in python2  it is in module collections, a lot of API to change,
@@ -31,11 +171,17 @@ class ParsedParameterFile(object):
         location_path, name = os.path.split(fpath)
         cls = 'dictionary'
         self.case_path, location = os.path.split(location_path)
+        self.location = location
+        from .casesession import sessionFile  # casesession imports this module
+        self._shared = sessionFile(fpath)
+        if self._shared is not None:  # open in a CaseSession: see and make its unsaved changes
+            self.foamFile = None
+            self.content = self._shared.content
+            return
         if location[0] == '0':
-            self.foamFile = FoamFileZeroFolder(name, cls, location)
+            self.foamFile = FoamFileZeroFolder.from_file(fpath)
         else:
-            self.foamFile = FoamFile(name, cls, location)
-        self.foamFile.from_file(fpath)
+            self.foamFile = FoamFile.from_file(fpath)
         self.content = self.foamFile.values
 
     def items(self):
@@ -67,7 +213,201 @@ class ParsedParameterFile(object):
     # the only API used in FoamCaseBuilder
     def writeFile(self):
         # def save(self, project_folder, sub_folder=None, overwrite=True)
-        self.foamFile.save(self.case_path)
+        if self._shared is not None:
+            return self._shared.writeFile()
+        self.foamFile.save(self.case_path, self.location)
+
+class LazyInternalField(object):
+    """Placeholder of an untouched internalField entry of LazyFieldFile.
+
+    Attributes:
+        start: Byte position of the `internalField` keyword in the file.
+        end: Byte position after the `;` closing the entry.
+    """
+
+    def __init__(self, field_file, start, end, element_type=None, count=0, payload=None):
+        self._file = field_file
+        self.start = start
+        self.end = end
+        self._list = (element_type, count, payload)  # nonuniform list type, size and payload position
+        self._data = None
+
+    def raw(self):
+        """Return the entry as bytes, exactly as it is in the file."""
+        return self._file._buffer[self.start:self.end]
+
+    def write(self, f):
+        """Copy the entry into file f in chunks."""
+        for pos in range(self.start, self.end, _copy_chunk_size):
+            f.write(self._file._buffer[pos:min(pos + _copy_chunk_size, self.end)])
+
+    def load(self):
+        """Parse the value, numpy.ndarray for nonuniform list or string for uniform value."""
+        if self._data is None:
+            if self._file._binary and self._list[0]:  # zero copy view of the payload
+                self._data = self._file._binary._array(*self._list)[0]
+            else:
+                text = self.raw().decode('latin-1')
+                self._data = CppDictParser(text, read_nonuniform_list).values['internalField']
+        return self._data
+
+    def __repr__(self):
+        if self.end - self.start < 100:
+            return self.raw().decode('latin-1').split(None, 1)[1].rstrip(';').strip()
+        return '<internalField of {} bytes in {}>'.format(self.end - self.start, self._file.filepath)
+
+
+_internal_field_pattern = re.compile(br'(?<![$\w])internalField\s')
+_lazy_list_pattern = re.compile(br'\s*nonuniform\s+List<(\w+)>\s*(\d+)\s*\(')
+_lazy_list_end_pattern = re.compile(br'\)\s*;')
+_copy_chunk_size = 1 << 24
+
+
+class LazyFieldFile(ParsedParameterFile):
+    """Field file like 0/U with internalField left in the file until it is accessed.
+
+    Only dimensions and boundaryField are parsed; `f['internalField']` is a
+    LazyInternalField placeholder unless it is replaced. On write the header and
+    the untouched internalField bytes are copied verbatim from the original file,
+    so editing boundary conditions does not depend on the mesh size.
+
+    The keyword argument `on_write` is a function called with the file by writeFile()
+    instead of saving it, used by CaseSession to defer the save.
+    """
+
+    def __init__(self, fpath, *args, **kw):
+        self._on_write = kw.get('on_write')
+        self.filepath = fpath = resolve_gz_path(fpath)
+        location_path, self.name = os.path.split(fpath)
+        if self.name.endswith('.gz'):
+            self.name = self.name[:-3]
+        self.case_path, self.location = os.path.split(location_path)
+        self._map()
+        self.content = self._parse()
+
+    def _map(self):
+        """Map the file, or read it if compressed, and parse its header."""
+        fpath = self.filepath
+        if not os.path.getsize(fpath):
+            raise ValueError('{} is an empty file'.format(fpath))
+        if is_binary_file(fpath):
+            self._binary = BinaryFoamFile(fpath)
+            self._buffer = self._binary._buffer
+            self._header_end = self._binary._header_end
+            self.header = self._binary.header
+        else:
+            self._binary = None
+            if fpath.endswith('.gz'):
+                self._buffer = read_file_bytes(fpath)
+            else:
+                with open(fpath, 'rb') as f:
+                    self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            m = _header_pattern.search(self._buffer, 0, 4096)
+            if not m:
+                raise ValueError('FoamFile header is not found in {}'.format(fpath))
+            self._header_end = m.end()
+            self.header = CppDictParser(m.group(1).decode('latin-1')).values
+        self.format = self.header.get('format', 'ascii')
+        self.cls = self.header.get('class', 'dictionary')
+        self._closed = False
+
+    def close(self):
+        """Release the mapping of the file, return False if arrays of binary lists still refer to it."""
+        if isinstance(self._buffer, mmap.mmap):
+            try:
+                self._buffer.close()
+            except BufferError:
+                return False
+            self._closed = True
+        return True
+
+    def _find_internal_field(self):
+        """Return (start, end, element type, count, payload start) of internalField entry."""
+        buf = self._buffer
+        m = _internal_field_pattern.search(buf, self._header_end)
+        if not m:
+            return None
+        lm = _lazy_list_pattern.match(buf, m.end())
+        if not lm:  # uniform value
+            end = buf.find(b';', m.end())
+            return m.start(), end + 1, None, 0, None
+        element_type, count = lm.group(1).decode('latin-1'), int(lm.group(2))
+        if self._binary:
+            data, pos = self._binary._array(element_type, count, lm.end())
+            end = buf.find(b';', pos) + 1
+        else:
+            em = _lazy_list_end_pattern.search(buf, lm.end())
+            if not em:
+                raise ValueError('end of internalField is not found in {}'.format(self.filepath))
+            end = em.end()
+        return m.start(), end, element_type, count, lm.end()
+
+    def _load(self, filepath):
+        """Parse everything except internalField, return (values, span of internalField)."""
+        span = self._find_internal_field()
+        if self._binary:
+            # binary payload is neither parsed nor copied by read_field()
+            values = self._binary.read_field()
+        else:
+            buf = self._buffer
+            if span:
+                text = buf[self._header_end:span[0]] + b'internalField 0;' + buf[span[1]:]
+            else:
+                text = buf[self._header_end:]
+            values = CppDictParser(text.decode('latin-1'), read_nonuniform_list).values
+        if span:
+            values['internalField'] = None  # keep the position of the entry
+        return values, span
+
+    def _parse(self):
+        values, span = parsed_dict_cache.get(self.filepath, self._load, 'lazy')
+        if span:
+            values['internalField'] = LazyInternalField(self, *span)
+        return values
+
+    def writeFile(self):
+        if self._on_write:
+            self._on_write(self)
+        else:
+            self.save()
+
+    def save(self, filepath=None):
+        """Write to filepath (default to the original file) through a temporary file.
+
+        The new file is renamed into place. When it replaces the mapped original file, the
+        mapping is released just before and the new file is mapped and parsed again after.
+        A filepath ending with `.gz` is gzip compressed while writing.
+
+        Returns:
+            filepath, or None if the content is unchanged and the file is not written.
+        """
+        filepath = filepath or self.filepath
+        values = self.content
+        lazy = values.get('internalField')
+        if isinstance(lazy, LazyInternalField) and lazy._file is not self:  # assigned from another file
+            values = collections.OrderedDict(values)
+            values['internalField'] = lazy.load()
+
+        def write(f):
+            f.write(self._buffer[:self._header_end])
+            f.write(b'\n\n')
+            write_entries(f, values, self.format)
+
+        mapped = isinstance(self._buffer, mmap.mmap) and os.path.realpath(filepath) == os.path.realpath(self.filepath)
+        try:
+            changed = write_if_changed(filepath, write, self.close if mapped else None)
+        finally:
+            if self._closed:  # the lazy internalField refers to positions in the new file
+                parsed_dict_cache.invalidate(self.filepath)
+                self._map()
+                values = self._parse()
+                self.content.clear()
+                self.content.update(values)
+        if not changed:
+            return None
+        parsed_dict_cache.invalidate(filepath)
+        return filepath
+
 
 class BoundaryDict(ParsedParameterFile):
     """ adapter class to simulate PyFoam API """
@@ -135,7 +475,8 @@ class FoamFile(object):
         """Create a FoamFile from a file.
 
         Args:
-            filepath: Full file path to dictionary.
+            filepath: Full file path to dictionary, `filepath.gz` is read if only
+                the compressed file exists.
             location: Optional folder name for location (0, constant or system)
         """
         def _try_get_foam_file_value(key):
@@ -151,8 +492,11 @@ class FoamFile(object):
         assert not filepath.endswith('blockMeshDict'), \
             'To parse blockMeshDict from file use BlockMeshDict.from_file()'
 
-        _values = CppDictParser.from_file(filepath).values
+        filepath = resolve_gz_path(filepath)
+        _values = parsed_dict_cache.get(filepath, _load_values)
         p, _name = os.path.split(filepath)
+        if _name.endswith('.gz'):
+            _name = _name[:-3]
 
         default = {
             'object': _name,
@@ -303,7 +647,8 @@ class FoamFile(object):
 
     def header(self):
         """Return open foam style string."""
-        return getFoamFileHeader(self.location, self.name, self.cls)
+        location = self.location.replace('"', '') if self.location else ''
+        return getFoamFileHeader(location, self.name, self.cls, self.format)
         """
         if self.location:
             return Header.header() + \
@@ -325,38 +670,17 @@ class FoamFile(object):
                 "}\n" % (self.__version, self.format, self.cls, self.name)
         """
 
-    @staticmethod
-    def _split_line(line):
-        """Split lines which ends with { to two lines."""
-        return line[4:-1] + "\n" + \
-            (len(line) - len(line.strip()) - 4) * ' ' + '{'
+    def write(self, f):
+        """Write header and body to a file opened in binary mode."""
+        f.write(self.header().encode('latin-1'))
+        f.write(b'\n')
+        write_entries(f, self.values, self.format)
 
     def body(self):
         """Return body string."""
-        # remove None values
-        def remove_none(d):
-            if isinstance(d, (dict, collections.OrderedDict)):
-                return collections.OrderedDict(
-                    (k, remove_none(v)) for k, v in d.iteritems()
-                    if v == {} or (v and remove_none(v)))
-            elif isinstance(d, (list, tuple)):
-                return [remove_none(v) for v in d if v and remove_none(v)]
-            else:
-                return d
-            return remove_none
-
-        _values = remove_none(self.values)
-
-        # make python dictionary look like c++ dictionary!!
-        of = json.dumps(_values, indent=4, separators=(";", "\t\t")) \
-            .replace('\\"', '@').replace('"\n', ";\n").replace('"', '') \
-            .replace('};', '}').replace('\t\t{', '{').replace('@', '"')
-
-        # remove first and last {} and prettify[!] the file
-        content = (line[4:] if not line.endswith('{') else self._split_line(line)
-                   for line in of.split("\n")[1:-1])
-
-        return "\n\n".join(content)
+        buf = io.BytesIO()
+        write_entries(buf, self.values, self.format)
+        return buf.getvalue().decode('latin-1')
 
     @staticmethod
     def convert_bool_value(v=True):
@@ -375,21 +699,36 @@ class FoamFile(object):
         """Return OpenFOAM string."""
         return "\n".join((self.header(), self.body()))
 
-    def save(self, project_folder, sub_folder=None, overwrite=True):
+    def save(self, project_folder, sub_folder=None, overwrite=True, compress=False):
         """Save to file.
 
         Args:
             project_folder: Path to project folder as a string.
             sub_folder: Optional input for sub_folder (default: self.location).
+            compress: Write gzip compressed `name.gz` like `writeCompression on`,
+                a file of the same name in the other form is removed.
+
+        Returns:
+            File path, or None if the file is not written because it exists
+            and overwrite is False or its content is unchanged.
         """
         sub_folder = sub_folder or self.location.replace('"', '')
         fp = os.path.join(project_folder, sub_folder, self.name)
+        stale_fp = fp
+        if compress:
+            fp += '.gz'
+        else:
+            stale_fp += '.gz'
 
         if not overwrite and os.path.isfile(fp):
             return
 
-        with open(fp, "wb") as outf:
-            outf.write(self.to_openfoam())
+        if os.path.isfile(stale_fp):
+            os.remove(stale_fp)
+            parsed_dict_cache.invalidate(stale_fp)
+        if not write_if_changed(fp, self.write):
+            return None
+        parsed_dict_cache.invalidate(fp)
         return fp
 
     def __eq__(self, other):
@@ -467,7 +806,7 @@ def foam_file_from_file(filepath, name=None, header=False):
         assert _name.lower() == name.lower(), \
             'Illegal file input {} for creating {}'.format(_name, name)
 
-    _values = CppDictParser.from_file(filepath).values
+    _values = CppDictParser.from_file(filepath, read_nonuniform_list).values
 
     if not header and 'FoamFile' in _values:
         del(_values['FoamFile'])
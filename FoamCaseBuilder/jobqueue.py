@@ -0,0 +1,412 @@
+# coding=utf-8
+
+from __future__ import print_function, absolute_import
+
+"""Persistent local queue of solver runs in an SQLite file, with a worker daemon.
+
+Jobs are queued with a case path, a shell command (default `./Allrun`), a number
+of cores and a priority. The worker starts the queued jobs of highest priority
+first, as long as the cores of all running jobs stay within the machine-wide core
+limit, and records every state transition with its time in the database:
+
+    queued -> running -> done | failed
+    queued | running -> cancelled
+
+Jobs run in a session of their own with the OpenFOAM environment snapshot, their
+output goes to `log.job<id>` in the case and their exit code to a small file, so
+they outlive the worker and the GUI that queued them. A restarted worker re-attaches
+to the jobs whose process is still alive, identified by PID and process start time,
+and collects the exit code of those that finished meanwhile.
+
+    queue = JobQueue()  # ~/.cache/FoamCaseBuilder/jobs.sqlite
+    job_id = queue.submit(case, cores=8, priority=1)
+    start_worker_daemon(max_cores=32)  # no-op if a worker is already serving the queue
+
+or from a terminal:
+
+    python -m FoamCaseBuilder.jobqueue submit /path/to/case --cores 8
+    python -m FoamCaseBuilder.jobqueue worker --cores 32
+    python -m FoamCaseBuilder.jobqueue list
+"""
+
+import os
+import sys
+import time
+import errno
+import signal
+import sqlite3
+import argparse
+import platform
+import subprocess
+import collections
+import multiprocessing
+
+try:
+    from shlex import quote as _shell_quote
+except ImportError:  # python 2
+    from pipes import quote as _shell_quote
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+_schema = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    case_path TEXT NOT NULL,
+    command TEXT NOT NULL,
+    cores INTEGER NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL,
+    pid INTEGER,
+    pid_start_time TEXT,
+    exit_code INTEGER,
+    message TEXT,
+    submitted REAL NOT NULL,
+    started REAL,
+    finished REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, priority, id);
+'''
+
+_columns = ('id', 'case_path', 'command', 'cores', 'priority', 'state', 'pid', 'pid_start_time',
+            'exit_code', 'message', 'submitted', 'started', 'finished')
+Job = collections.namedtuple('Job', _columns)
+
+
+def default_queue_path():
+    cache_dir = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_dir, 'FoamCaseBuilder', 'jobs.sqlite')
+
+
+def _exit_file(job):
+    return os.path.join(job.case_path, '.job{}.exit'.format(job.id))
+
+
+def _log_file(job):
+    return os.path.join(job.case_path, 'log.job{}'.format(job.id))
+
+
+def _remove(filepath):
+    try:
+        os.remove(filepath)
+    except OSError:
+        pass
+
+
+def _start_detached(args, **kwargs):
+    """Popen in a session of its own with stdin from /dev/null, so it outlives the calling process."""
+    with open(os.devnull, 'rb') as devnull:
+        return subprocess.Popen(args, stdin=devnull, close_fds=True, preexec_fn=os.setsid, **kwargs)
+
+
+def _process_stat(pid):
+    """(state, start time) of a process from /proc, the start time tells a live job from a reused PID."""
+    try:
+        with open('/proc/{}/stat'.format(pid)) as f:
+            # the command name in parentheses may contain spaces, fields after it are fixed
+            fields = f.read().rsplit(')', 1)[1].split()
+        return fields[0], fields[19]
+    except (IOError, OSError, IndexError):
+        return None, None
+
+
+def _process_start_time(pid):
+    return _process_stat(pid)[1]
+
+
+def _is_alive(pid, start_time):
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        if e.errno != errno.EPERM:
+            return False
+    state, current = _process_stat(pid)
+    if state == 'Z':  # exited, not yet reaped by its parent
+        return False
+    return start_time is None or current is None or current == start_time
+
+
+class JobQueue(object):
+    """SQLite backed job queue, safe to use from several processes.
+
+    Attributes:
+        filepath: Path of the SQLite database file.
+    """
+
+    def __init__(self, filepath=None):
+        self.filepath = filepath or default_queue_path()
+        folder = os.path.dirname(os.path.abspath(self.filepath))
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+        self._db = sqlite3.connect(self.filepath, timeout=30, isolation_level=None)  # explicit transactions
+        self._db.executescript(_schema)
+
+    def close(self):
+        self._db.close()
+
+    def transaction(self):
+        """Context manager of a write transaction, it blocks other writers until committed."""
+        return _Transaction(self._db)
+
+    def submit(self, case_path, command='./Allrun', cores=1, priority=0):
+        """Queue a job, return its id. Jobs of higher priority start first, then in submission order."""
+        if not os.path.isdir(case_path):
+            raise IOError('case path: `{}` does not exist'.format(case_path))
+        with self.transaction():
+            cursor = self._db.execute(
+                'INSERT INTO jobs (case_path, command, cores, priority, state, submitted) VALUES (?, ?, ?, ?, ?, ?)',
+                (os.path.abspath(case_path), command, max(1, int(cores)), int(priority), QUEUED, time.time()))
+        return cursor.lastrowid
+
+    def job(self, job_id):
+        row = self._db.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return Job(*row) if row else None
+
+    def jobs(self, states=None):
+        """List of jobs in the given states (default all), in the order they are started."""
+        query = 'SELECT * FROM jobs'
+        params = ()
+        if states:
+            query += ' WHERE state IN ({})'.format(','.join('?' * len(states)))
+            params = tuple(states)
+        rows = self._db.execute(query + ' ORDER BY priority DESC, id', params).fetchall()
+        return [Job(*row) for row in rows]
+
+    def used_cores(self):
+        """Number of cores of all running jobs."""
+        return self._db.execute('SELECT COALESCE(SUM(cores), 0) FROM jobs WHERE state = ?', (RUNNING,)).fetchone()[0]
+
+    def set_state(self, job_id, state, **values):
+        """Record a state transition, with finished time for done, failed and cancelled states."""
+        values['state'] = state
+        if state in (DONE, FAILED, CANCELLED):
+            values.setdefault('finished', time.time())
+        names = sorted(values)
+        self._db.execute('UPDATE jobs SET {} WHERE id = ?'.format(', '.join(n + ' = ?' for n in names)),
+                         tuple(values[n] for n in names) + (job_id,))
+
+    def cancel(self, job_id):
+        """Cancel a queued job, or terminate the process group of a running job. Return True if cancelled."""
+        with self.transaction():
+            job = self.job(job_id)
+            if job is None or job.state not in (QUEUED, RUNNING):
+                return False
+            if job.state == RUNNING and job.pid and _is_alive(job.pid, job.pid_start_time):
+                try:
+                    os.killpg(job.pid, signal.SIGTERM)  # the job leads its own session, mpirun ranks included
+                except OSError:
+                    pass
+            self.set_state(job_id, CANCELLED)
+        return True
+
+
+class _Transaction(object):
+    def __init__(self, db):
+        self._db = db
+
+    def __enter__(self):
+        self._db.execute('BEGIN IMMEDIATE')
+        return self._db
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self._db.execute('COMMIT' if exc_type is None else 'ROLLBACK')
+
+
+class JobWorker(object):
+    """Worker starting queued jobs within a core limit and collecting finished ones.
+
+    Attributes:
+        queue: The JobQueue served.
+        max_cores: Machine-wide limit of the cores of all running jobs.
+    """
+
+    def __init__(self, queue, max_cores=None):
+        self.queue = queue
+        self.max_cores = max_cores or multiprocessing.cpu_count()
+        self._children = {}  # job id -> Popen of jobs started by this worker
+
+    def reap(self):
+        """Update running jobs whose process has exited, return their ids.
+
+        Children of cancelled jobs are waited for as well, so they are not left as zombies.
+        """
+        finished = []
+        running = self.queue.jobs([RUNNING])
+        running_ids = set(job.id for job in running)
+        for job_id in [i for i in self._children if i not in running_ids]:
+            if self._children[job_id].poll() is not None:
+                del self._children[job_id]
+                _remove(_exit_file(self.queue.job(job_id)))  # written if the job ended before the signal
+        for job in running:
+            child = self._children.get(job.id)
+            if child is not None:
+                if child.poll() is None:
+                    continue
+                del self._children[job.id]
+            elif job.pid and _is_alive(job.pid, job.pid_start_time):
+                continue  # re-attached: started by a previous worker and still running
+            exit_code = self._read_exit_code(job)
+            with self.queue.transaction():
+                if self.queue.job(job.id).state == RUNNING:  # not cancelled meanwhile
+                    if exit_code is None:
+                        self.queue.set_state(job.id, FAILED, message='process ended without exit code')
+                    else:
+                        self.queue.set_state(job.id, DONE if exit_code == 0 else FAILED, exit_code=exit_code)
+            finished.append(job.id)
+        return finished
+
+    def _read_exit_code(self, job):
+        try:
+            with open(_exit_file(job)) as f:
+                exit_code = int(f.read().strip())
+            os.remove(_exit_file(job))
+            return exit_code
+        except (IOError, OSError, ValueError):
+            return None
+
+    def schedule(self):
+        """Start queued jobs in priority order while their cores fit in the limit, return their ids.
+
+        The job first in order waits for cores rather than being overtaken by smaller jobs, so large
+        jobs are not starved.
+        """
+        started = []
+        while True:
+            with self.queue.transaction():
+                queued = self.queue.jobs([QUEUED])
+                if not queued:
+                    break
+                job = queued[0]
+                if job.cores > self.max_cores:
+                    self.queue.set_state(job.id, FAILED, message='{} cores requested, the limit is {}'.format(
+                        job.cores, self.max_cores))
+                    continue
+                if self.queue.used_cores() + job.cores > self.max_cores:
+                    break
+                try:
+                    proc = self._start(job)
+                except (IOError, OSError) as e:
+                    self.queue.set_state(job.id, FAILED, message=str(e))
+                    continue
+                self._children[job.id] = proc
+                self.queue.set_state(job.id, RUNNING, pid=proc.pid, pid_start_time=_process_start_time(proc.pid),
+                                     started=time.time())
+            started.append(job.id)
+        return started
+
+    def _start(self, job):
+        from .utility import getFoamEnvironment  # only the worker needs OpenFOAM
+        env = getFoamEnvironment()
+        if env is None:
+            raise IOError('OpenFOAM etc/bashrc is not found or the runtime is not Posix')
+        exit_file = _exit_file(job)
+        _remove(exit_file)
+        # the exit code is written to a file, so a later worker can collect it without being the parent;
+        # the command runs in a subshell, so its `exit` does not skip writing the file
+        script = '(\n{}\n)\nstatus=$?\necho $status > {}\nexit $status\n'.format(job.command, _shell_quote(exit_file))
+        with open(_log_file(job), 'wb') as log:
+            return _start_detached(['bash', '-c', script], cwd=job.case_path, env=dict(env, PWD=job.case_path),
+                                   stdout=log, stderr=subprocess.STDOUT)
+
+    def run_once(self):
+        """Collect finished jobs and start queued ones."""
+        self.reap()
+        self.schedule()
+
+    def serve(self, poll_interval=2.0):
+        """Serve the queue until interrupted, running jobs are left running."""
+        lock = _acquire_worker_lock(self.queue.filepath)
+        if lock is None:
+            print("Error: another worker is serving {}".format(self.queue.filepath))
+            return
+        print("Info: worker serving {} with {} cores".format(self.queue.filepath, self.max_cores))
+        try:
+            while True:
+                self.run_once()
+                time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            lock.close()
+
+
+def _acquire_worker_lock(queue_path):
+    """Open and lock `<queue>.lock`, return the file object or None if another worker holds it."""
+    import fcntl
+    lock = open(queue_path + '.lock', 'a')
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except (IOError, OSError):
+        lock.close()
+        return None
+    return lock
+
+
+def start_worker_daemon(queue_path=None, max_cores=None):
+    """Start a detached worker process unless one already serves the queue, return True if started.
+
+    The worker is in a session of its own, it keeps running after the calling program exits.
+    """
+    if platform.system() == 'Windows':
+        raise NotImplementedError('the job queue worker runs on Posix only')
+    queue_path = queue_path or default_queue_path()
+    JobQueue(queue_path).close()  # create the database and its folder
+    lock = _acquire_worker_lock(queue_path)
+    if lock is None:
+        return False
+    lock.close()
+    cmd = [sys.executable, '-m', 'FoamCaseBuilder.jobqueue', '--queue', queue_path, 'worker']
+    if max_cores:
+        cmd += ['--cores', str(max_cores)]
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [package_dir, os.environ.get('PYTHONPATH')])))
+    with open(queue_path + '.worker.log', 'ab') as log:
+        _start_detached(cmd, env=env, stdout=log, stderr=subprocess.STDOUT)
+    return True
+
+
+def format_jobs(jobs):
+    lines = ['{:>5}  {:<10} {:>5} {:>8} {:>9}  {}'.format('id', 'state', 'cores', 'priority', 'exit', 'case')]
+    for job in jobs:
+        lines.append('{:>5}  {:<10} {:>5} {:>8} {:>9}  {}'.format(
+            job.id, job.state, job.cores, job.priority, '-' if job.exit_code is None else job.exit_code,
+            job.case_path))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m FoamCaseBuilder.jobqueue', description='Local queue of OpenFOAM solver runs')
+    parser.add_argument('--queue', default=None, help='SQLite file of the queue, default ' + default_queue_path())
+    commands = parser.add_subparsers(dest='action')
+    submit = commands.add_parser('submit', help='queue a case')
+    submit.add_argument('case')
+    submit.add_argument('--command', default='./Allrun')
+    submit.add_argument('--cores', type=int, default=1)
+    submit.add_argument('--priority', type=int, default=0)
+    worker = commands.add_parser('worker', help='serve the queue in the foreground')
+    worker.add_argument('--cores', type=int, default=None, help='machine-wide core limit, default all cores')
+    worker.add_argument('--interval', type=float, default=2.0)
+    commands.add_parser('list', help='list the jobs')
+    cancel = commands.add_parser('cancel', help='cancel a job')
+    cancel.add_argument('job_id', type=int)
+    args = parser.parse_args(argv)
+
+    queue = JobQueue(args.queue)
+    if args.action == 'submit':
+        print(queue.submit(args.case, args.command, args.cores, args.priority))
+    elif args.action == 'worker':
+        JobWorker(queue, args.cores).serve(args.interval)
+    elif args.action == 'cancel':
+        if not queue.cancel(args.job_id):
+            print("Error: job {} is not queued nor running".format(args.job_id))
+            return 1
+    else:
+        print(format_jobs(queue.jobs()))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
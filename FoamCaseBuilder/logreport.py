@@ -0,0 +1,181 @@
+# coding=utf-8
+
+from __future__ import print_function, absolute_import
+
+"""Wall clock profile report of a solver run from the telemetry of its log.
+
+The report tells which fields dominate the linear solver iterations, how many
+seconds a time step and a linear solver iteration take and how that trends over
+the run, and flags stalls: steps taking `stall_factor` times longer than the median
+of the `window` steps before. It is a JSON serializable dictionary, formatted as
+text by format_report() and saved as `.json` and `.txt` by save_report().
+
+    report = profile_log(case + '/log.simpleFoam')
+    print(format_report(report))
+    save_report(report, case + '/log.simpleFoam.profile')
+"""
+
+import json
+import collections
+
+import numpy
+
+from .logtelemetry import LogTelemetry
+from .filewriter import write_if_changed
+
+
+def _float(value):
+    """Python float for JSON, None for NaN."""
+    value = float(value)
+    return None if value != value else value
+
+
+def _fmt(value):
+    return '{:.4g}'.format(value) if isinstance(value, float) else str(value)
+
+
+def _step_seconds(execution_time):
+    """Execution seconds of each step, the first step includes the start up."""
+    seconds = numpy.diff(numpy.concatenate(([0.0], execution_time)))
+    seconds[seconds < 0] = numpy.nan  # restarted run in the same log
+    return seconds
+
+
+def _stalls(seconds, window, stall_factor):
+    """Return indices of steps slower than stall_factor * median of the previous window steps."""
+    if len(seconds) <= window:
+        return numpy.zeros(0, dtype=numpy.int64), numpy.zeros(0)
+    # windows of the previous steps as a view, as_strided works with numpy older than 1.20's sliding_window_view
+    seconds = numpy.ascontiguousarray(seconds, dtype=numpy.float64)
+    previous = numpy.lib.stride_tricks.as_strided(seconds, shape=(len(seconds) - window, window),
+                                                  strides=(seconds.strides[0], seconds.strides[0]), writeable=False)
+    medians = numpy.nanmedian(previous, axis=1) if numpy.isnan(previous).any() else numpy.median(previous, axis=1)
+    current = seconds[window:]
+    with numpy.errstate(invalid='ignore'):
+        slow = numpy.nonzero(current > stall_factor * medians)[0]
+    return slow + window, medians[slow]
+
+
+def profile_columns(columns, window=20, stall_factor=3.0, slowdown_factor=1.5, max_events=100):
+    """Build the profile report from the columns of LogTelemetry or load_telemetry().
+
+    Args:
+        columns: Dictionary of telemetry columns.
+        window: Number of steps of the moving median and of the trend windows.
+        stall_factor: A step slower than this factor times the moving median is a stall.
+        slowdown_factor: The run is slowing down if the seconds per iteration of the
+            last window exceed this factor times those of the first window.
+        max_events: Maximum number of stall events listed in the report.
+
+    Returns:
+        Report as a dictionary, NaN values are None.
+    """
+    times = columns['time']
+    nsteps = len(times)
+    fields = [str(f) for f in columns['fields']]
+    solvers = [str(s) for s in columns['solvers']]
+    step_iterations = numpy.zeros(nsteps, dtype=numpy.int64)
+    for field in fields:
+        step_iterations += columns['iterations/' + field]
+    total_iterations = int(step_iterations.sum())
+
+    report = collections.OrderedDict()
+    report['steps'] = nsteps
+    report['time_range'] = [_float(times[0]), _float(times[-1])] if nsteps else None
+    report['execution_time'] = _float(numpy.nanmax(columns['execution_time'])) \
+        if nsteps and not numpy.isnan(columns['execution_time']).all() else None
+    report['clock_time'] = _float(numpy.nanmax(columns['clock_time'])) \
+        if nsteps and not numpy.isnan(columns['clock_time']).all() else None
+    report['linear_iterations'] = total_iterations
+
+    solve_counts = numpy.bincount(columns['solves_field'], minlength=len(fields))
+    field_report = []
+    for i, field in enumerate(fields):
+        iterations = columns['iterations/' + field]
+        solved = columns['solves_field'] == i
+        field_report.append(collections.OrderedDict([
+            ('field', field),
+            ('iterations', int(iterations.sum())),
+            ('share', _float(iterations.sum() / float(total_iterations)) if total_iterations else None),
+            ('solves', int(solve_counts[i])),
+            ('iterations_per_step', _float(iterations.mean()) if nsteps else None),
+            ('max_iterations_per_solve', int(columns['solves_iterations'][solved].max()) if solved.any() else 0),
+        ]))
+    report['fields'] = sorted(field_report, key=lambda f: -f['iterations'])
+    report['solvers'] = collections.OrderedDict(
+        (s, int(columns['solver_iterations/' + s].sum())) for s in solvers)
+
+    seconds = _step_seconds(columns['execution_time'])
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        per_iteration = numpy.where(step_iterations > 0, seconds / step_iterations, numpy.nan)
+    trend = collections.OrderedDict()
+    valid = numpy.nonzero(~numpy.isnan(per_iteration))[0]
+    trend['seconds_per_step'] = _float(numpy.nanmean(seconds)) if nsteps and not numpy.isnan(seconds).all() else None
+    trend['seconds_per_iteration'] = _float(per_iteration[valid].mean()) if len(valid) else None
+    if len(valid) >= 2:
+        # change of seconds per iteration per 1000 steps, by least squares
+        trend['slope_per_1000_steps'] = _float(numpy.polyfit(valid, per_iteration[valid], 1)[0] * 1000)
+    else:
+        trend['slope_per_1000_steps'] = None
+    first, last = per_iteration[valid[:window]], per_iteration[valid[-window:]]
+    trend['first_window'] = _float(first.mean()) if len(first) else None
+    trend['last_window'] = _float(last.mean()) if len(last) else None
+    trend['slowdown'] = bool(len(valid) >= 2 * window and first.mean() > 0
+                             and last.mean() > slowdown_factor * first.mean())
+    report['trend'] = trend
+
+    stall_steps, medians = _stalls(seconds, window, stall_factor)
+    stalls = collections.OrderedDict()
+    stalls['count'] = len(stall_steps)
+    stalls['stalled'] = bool(len(stall_steps) and stall_steps[-1] == nsteps - 1)  # the last step is a stall
+    stalls['events'] = [collections.OrderedDict([('step', int(i)), ('time', _float(times[i])),
+                                                 ('seconds', _float(seconds[i])), ('median', _float(m))])
+                        for i, m in zip(stall_steps[:max_events], medians[:max_events])]
+    report['stalls'] = stalls
+    return report
+
+
+def profile_log(logpath, **kw):
+    """Parse a solver log and return its profile report, see profile_columns() for options."""
+    report = profile_columns(LogTelemetry(logpath).columns(), **kw)
+    report['log'] = logpath
+    return report
+
+
+def format_report(report):
+    """Format the report as a text summary."""
+    lines = []
+    if report.get('log'):
+        lines.append('Profile of {}'.format(report['log']))
+    time_range = report['time_range'] or [None, None]
+    lines.append('{} time steps from {} to {}, ExecutionTime {} s, ClockTime {} s'.format(
+        report['steps'], _fmt(time_range[0]), _fmt(time_range[1]),
+        _fmt(report['execution_time']), _fmt(report['clock_time'])))
+    lines.append('{} linear solver iterations:'.format(report['linear_iterations']))
+    for f in report['fields']:
+        lines.append('    {:<15} {:>10} iterations {:>6.1%} in {} solves, max {} per solve'.format(
+            f['field'], f['iterations'], f['share'] or 0.0, f['solves'], f['max_iterations_per_solve']))
+    if report['solvers']:
+        lines.append('linear solvers: ' + ', '.join('{} {}'.format(s, n) for s, n in report['solvers'].items()))
+    trend = report['trend']
+    lines.append('seconds per step {}, per iteration {} (first window {}, last window {}, {} per 1000 steps)'.format(
+        *[_fmt(trend[k]) for k in ('seconds_per_step', 'seconds_per_iteration', 'first_window',
+                                   'last_window', 'slope_per_1000_steps')]))
+    if trend['slowdown']:
+        lines.append('Warning: the run is slowing down')
+    stalls = report['stalls']
+    lines.append('{} stalled steps'.format(stalls['count']))
+    for e in stalls['events']:
+        lines.append('    step {} at time {}: {} s, median {} s'.format(
+            e['step'], _fmt(e['time']), _fmt(e['seconds']), _fmt(e['median'])))
+    if stalls['stalled']:
+        lines.append('Warning: the last time step is stalled')
+    return '\n'.join(lines) + '\n'
+
+
+def save_report(report, filepath):
+    """Write the report to `filepath.json` and `filepath.txt`, return both paths."""
+    json_path, text_path = filepath + '.json', filepath + '.txt'
+    write_if_changed(json_path, lambda f: f.write(json.dumps(report, indent=2)))
+    write_if_changed(text_path, lambda f: f.write(format_report(report)))
+    return json_path, text_path
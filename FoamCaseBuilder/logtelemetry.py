@@ -0,0 +1,226 @@
+# coding=utf-8
+
+from __future__ import print_function, absolute_import
+
+"""Extraction of per time step telemetry from solver logs into columns.
+
+Every `Solving for` line (linear solver, initial and final residual, iterations),
+continuity errors, Courant number mean and max, deltaT, ExecutionTime and ClockTime
+are collected into numpy arrays, one row per time step, and saved as a compressed
+`.npz` next to the log, so many runs can be compared without parsing text again.
+
+    telemetry = LogTelemetry(case + '/log.pimpleFoam')
+    telemetry.save()  # case/log.pimpleFoam.npz
+    columns = load_telemetry(case + '/log.pimpleFoam.npz')
+    columns['time'], columns['courant_max'], columns['solver_iterations/GAMG']
+
+Columns of the step table (NaN if not printed in a step):
+    time, deltaT, courant_mean, courant_max, continuity_local, continuity_global,
+    continuity_cumulative, execution_time, clock_time
+    initial/<field>: initial residual of the first solve of the field in the step
+    final/<field>: final residual of the last solve of the field in the step
+    iterations/<field>: linear solver iterations of the field summed over the step
+    solver_iterations/<solver>: iterations of a linear solver like GAMG or PCG summed over the step
+Columns of the solve table, one row per `Solving for` line:
+    solves_step, solves_field, solves_solver, solves_initial, solves_final, solves_iterations,
+    where field and solver are indices into the `fields` and `solvers` name arrays.
+"""
+
+import re
+import os
+import os.path
+import tempfile
+import collections
+
+import numpy
+
+from .parser import GrowableArray
+from .filewriter import replace_file
+
+_step_columns = ('time', 'deltaT', 'courant_mean', 'courant_max', 'continuity_local', 'continuity_global',
+                 'continuity_cumulative', 'execution_time', 'clock_time')
+
+_line_pattern = re.compile(br'''^(?:
+    Time\ =\ (?P<time>[-+.\deE]+)[\ \t\r]*$
+    |Courant\ Number\ mean:\ (?P<courant_mean>[-+.\deE]+)\ max:\ (?P<courant_max>[-+.\deE]+)
+    |deltaT\ =\ (?P<deltaT>[-+.\deE]+)
+    |[\ \t]*(?P<solver>\w+):\s+Solving\ for\ (?P<field>[\w.:]+),\ Initial\ residual\ =\ (?P<initial>[-+.\w]+),
+        \ Final\ residual\ =\ (?P<final>[-+.\w]+),\ No\ Iterations\ (?P<iterations>\d+)
+    |time\ step\ continuity\ errors\ :\ sum\ local\ =\ (?P<continuity_local>[-+.\deE]+),
+        \ global\ =\ (?P<continuity_global>[-+.\deE]+),\ cumulative\ =\ (?P<continuity_cumulative>[-+.\deE]+)
+    |ExecutionTime\ =\ (?P<execution_time>[-+.\deE]+)\ s\s+ClockTime\ =\ (?P<clock_time>[-+.\deE]+)\ s
+    )''', re.MULTILINE | re.VERBOSE)
+# values of the other lines by the name of their last group
+_line_values = {'courant_max': ('courant_mean', 'courant_max'), 'deltaT': ('deltaT',),
+                'continuity_cumulative': ('continuity_local', 'continuity_global', 'continuity_cumulative'),
+                'clock_time': ('execution_time', 'clock_time')}
+
+
+class LogTelemetry(object):
+    """Incremental extractor of solver log telemetry.
+
+    parse() reads the bytes appended to the log since the last call, feed() takes
+    text from another source like the output of a running solver process.
+    Courant number and deltaT printed after the ExecutionTime of a step, like
+    pimpleFoam with adjustTimeStep does, belong to the next time step.
+
+    Attributes:
+        filepath: Full path of the log file, None if only feed() is used.
+        offset: Byte offset in the log file up to which it is parsed.
+        fields: Names of solved fields in the order of first appearance.
+        solvers: Names of linear solvers in the order of first appearance.
+    """
+
+    _read_size = 1 << 24
+
+    def __init__(self, filepath=None, parse=True):
+        self.filepath = filepath
+        self.offset = 0
+        self.fields = []
+        self.solvers = []
+        self._steps = collections.OrderedDict((name, GrowableArray(numpy.float64)) for name in _step_columns)
+        self._solves = collections.OrderedDict((name, GrowableArray(dtype)) for name, dtype in (
+            ('step', numpy.int64), ('field', numpy.int32), ('solver', numpy.int32),
+            ('initial', numpy.float64), ('final', numpy.float64), ('iterations', numpy.int64)))
+        self._row = None  # values of the current time step
+        self._closed = False  # ExecutionTime of the current step is seen
+        self._pending = {}  # values printed before the `Time =` line of the next step
+        self._partial = b''  # incomplete last line given to feed()
+        self._field_index = {}  # field name in bytes -> index into fields
+        self._solver_index = {}
+        if filepath and parse:
+            self.parse()
+
+    def parse(self):
+        """Parse the bytes appended to the log file since the last call, return number of new steps."""
+        nsteps = len(self)
+        with open(self.filepath, 'rb') as f:
+            f.seek(self.offset)
+            while True:
+                data = f.read(self._read_size)
+                end = data.rfind(b'\n') + 1
+                if not end:
+                    break
+                self._parse_lines(data, end)
+                self.offset += end
+                f.seek(self.offset)
+        return len(self) - nsteps
+
+    def feed(self, text):
+        """Parse a chunk of log text, an incomplete last line is kept for the next chunk."""
+        if not isinstance(text, bytes):
+            text = text.encode('utf-8')
+        data = self._partial + text
+        end = data.rfind(b'\n') + 1
+        self._partial = data[end:]
+        if end:
+            self._parse_lines(data, end)
+
+    def __len__(self):
+        """Number of time steps."""
+        return len(self._steps['time']) + (self._row is not None)
+
+    @staticmethod
+    def _index(names, index, name):
+        if name not in index:
+            index[name] = len(names)
+            names.append(name.decode('latin-1'))
+        return index[name]
+
+    def _flush_row(self):
+        for name, column in self._steps.items():
+            column.append(self._row.get(name, numpy.nan))
+
+    def _parse_lines(self, data, end):
+        solves = []
+        for m in _line_pattern.finditer(data, 0, end):
+            kind = m.lastgroup
+            if kind == 'time':
+                if self._row is not None:
+                    self._flush_row()
+                self._row, self._pending, self._closed = self._pending, {}, False
+                self._row['time'] = float(m.group('time'))
+            elif kind == 'iterations':
+                if self._row is None:  # solves before the first time step, like potentialFoam
+                    continue
+                try:
+                    initial, final = float(m.group('initial')), float(m.group('final'))
+                except ValueError:  # e.g. coupled vector solver `Initial residual = (1 1 1)`
+                    continue
+                solves.append((len(self._steps['time']),
+                               self._index(self.fields, self._field_index, m.group('field')),
+                               self._index(self.solvers, self._solver_index, m.group('solver')),
+                               initial, final, int(m.group('iterations'))))
+            else:
+                row = self._pending if self._row is None or self._closed else self._row
+                for name in _line_values[kind]:
+                    row[name] = float(m.group(name))
+                if kind == 'clock_time' and row is self._row:
+                    self._closed = True
+        for column, values in zip(self._solves.values(), zip(*solves)):
+            column.extend(values)
+
+    def columns(self):
+        """Return an OrderedDict of all columns, see the module documentation."""
+        nsteps = len(self)
+        columns = collections.OrderedDict()
+        for name, column in self._steps.items():
+            values = column.values
+            if self._row is not None:
+                values = numpy.append(values, self._row.get(name, numpy.nan))
+            columns[name] = values
+        columns['fields'] = numpy.array(self.fields, dtype=str)
+        columns['solvers'] = numpy.array(self.solvers, dtype=str)
+        solves = collections.OrderedDict((name, column.values.copy()) for name, column in self._solves.items())
+        for name, values in solves.items():
+            columns['solves_' + name] = values
+
+        step, iterations = solves['step'], solves['iterations']
+        for i, field in enumerate(self.fields):
+            mask = solves['field'] == i
+            field_step = step[mask]
+            first = numpy.ones(len(field_step), dtype=bool)
+            first[1:] = field_step[1:] != field_step[:-1]
+            last = numpy.roll(first, -1)
+            initial = numpy.full(nsteps, numpy.nan)
+            initial[field_step[first]] = solves['initial'][mask][first]
+            final = numpy.full(nsteps, numpy.nan)
+            final[field_step[last]] = solves['final'][mask][last]
+            columns['initial/' + field] = initial
+            columns['final/' + field] = final
+            columns['iterations/' + field] = numpy.bincount(field_step, iterations[mask], nsteps).astype(numpy.int64)
+        for i, solver in enumerate(self.solvers):
+            mask = solves['solver'] == i
+            columns['solver_iterations/' + solver] = \
+                numpy.bincount(step[mask], iterations[mask], nsteps).astype(numpy.int64)
+        return columns
+
+    def save(self, filepath=None):
+        """Write all columns to a compressed npz file, default to `<log file>.npz`.
+
+        Returns:
+            The npz file path.
+        """
+        filepath = filepath or self.filepath + '.npz'
+        fd, temp_path = tempfile.mkstemp(prefix='.' + os.path.basename(filepath),
+                                         dir=os.path.dirname(os.path.abspath(filepath)))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                numpy.savez_compressed(f, **self.columns())
+            replace_file(temp_path, filepath)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return filepath
+
+
+def load_telemetry(filepath):
+    """Load the columns saved by LogTelemetry.save() into an OrderedDict of arrays."""
+    with numpy.load(filepath) as data:
+        return collections.OrderedDict((name, data[name]) for name in data.files)
+
+
+def extract_telemetry(logpath, filepath=None):
+    """Parse a whole solver log and save its telemetry, return the npz file path."""
+    return LogTelemetry(logpath).save(filepath)
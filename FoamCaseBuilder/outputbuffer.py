@@ -0,0 +1,100 @@
+# coding=utf-8
+
+from __future__ import print_function, absolute_import
+
+"""Bounded capture of the output stream of a long running process.
+
+A solver can print a megabyte per second for hours, so its output is not kept
+as one growing string. OutputBuffer takes the chunks as they are read from the
+pipe and
+    writes every byte to the log file, which is the only full copy of the stream,
+    keeps a ring buffer of the latest complete lines for display,
+    collects the lines since the last take() as one batch for the hooks,
+    and cuts the console echo of a batch down to its last lines at high output rates.
+
+    buffer = OutputBuffer(capacity=2000, echo_lines=100, log=open('log.simpleFoam', 'wb'))
+    buffer.feed(process.readAllStandardOutput().data())
+    ...  # on a timer
+    text, echo = buffer.take()
+    hook(text)
+    print(echo, end='')
+"""
+
+import collections
+
+
+class OutputBuffer(object):
+    """Ring buffer of the latest lines of a stream, with batches of new lines and a throttled echo.
+
+    Attributes:
+        capacity: Number of latest lines kept by the ring buffer.
+        echo_lines: Largest number of lines echoed per batch, 0 for no limit.
+        log: Binary file object receiving the whole stream, None for no log.
+        lines: Deque of the latest complete lines as str, with line endings.
+        total_lines: Number of complete lines fed so far.
+        total_bytes: Number of bytes fed so far.
+        skipped_lines: Number of lines left out of the echo so far.
+    """
+
+    def __init__(self, capacity=2000, echo_lines=100, log=None):
+        self.capacity = capacity
+        self.echo_lines = echo_lines
+        self.log = log
+        self.clear()
+
+    def clear(self):
+        self.lines = collections.deque(maxlen=self.capacity)
+        self.total_lines = 0
+        self.total_bytes = 0
+        self.skipped_lines = 0
+        self._partial = b''
+        self._pending = []  # complete lines since the last take()
+
+    def feed(self, data):
+        """Take a chunk of the stream in bytes or str, an incomplete last line waits for the next chunk."""
+        if not data:
+            return
+        if not isinstance(data, bytes):
+            data = data.encode('utf-8')
+        if self.log:
+            self.log.write(data)
+        self.total_bytes += len(data)
+        data = self._partial + data
+        end = data.rfind(b'\n') + 1
+        self._partial = data[end:]
+        if end:
+            self._add(data[:end].decode('utf-8', 'replace').splitlines(True))
+
+    def flush(self):
+        """Complete the last line without line ending, at the end of the stream."""
+        if self._partial:
+            line, self._partial = self._partial, b''
+            self._add([line.decode('utf-8', 'replace')])
+        if self.log:
+            self.log.flush()
+
+    def _add(self, lines):
+        self.lines.extend(lines)
+        self._pending.extend(lines)
+        self.total_lines += len(lines)
+
+    def take(self):
+        """Return (text, echo) of the lines since the last call.
+
+        text has all the lines, for the hooks. echo has at most `echo_lines` of the last lines, led by a
+        note on the number of lines left out, for the console; it is text itself at low output rates.
+        """
+        lines, self._pending = self._pending, []
+        text = ''.join(lines)
+        if not self.echo_lines or len(lines) <= self.echo_lines:
+            return text, text
+        skipped = len(lines) - self.echo_lines
+        self.skipped_lines += skipped
+        note = '... {} lines not shown{} ...\n'.format(
+            skipped, ', see ' + self.log.name if getattr(self.log, 'name', None) else '')
+        return text, note + ''.join(lines[-self.echo_lines:])
+
+    def recent(self, count=None):
+        """Text of the latest `count` lines kept by the ring buffer, all of them by default."""
+        lines = list(self.lines)
+        return ''.join(lines[-count:] if count else lines)
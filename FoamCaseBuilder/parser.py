@@ -1,13 +1,293 @@
 """OpenFOAM/c++ dictionary parser."""
 import re
+import gzip
+import bisect
+import struct
+import hashlib
+import os.path
+import itertools
+from array import array
 from collections import OrderedDict
 
+import numpy
+
+
+def resolve_gz_path(filepath):
+    """Return `filepath.gz` if only the compressed file written by `writeCompression on` exists."""
+    if not os.path.exists(filepath) and os.path.exists(filepath + '.gz'):
+        return filepath + '.gz'
+    return filepath
+
+
+def read_file_bytes(filepath):
+    """Read the whole file as bytes, `.gz` files are decompressed while reading."""
+    filepath = resolve_gz_path(filepath)
+    with (gzip.open(filepath, 'rb') if filepath.endswith('.gz') else open(filepath, 'rb')) as f:
+        return f.read()
+
 
 class CppDictParser(object):
     """Parse OpenFOAM dictionary to Python dictionary.
 
     Use values property to get the dictionary.
 
+    The text is tokenized in a single pass (comments, strings, braces,
+    parentheses and `;`), sub-dictionaries become nested dictionaries and
+    every other entry is kept as a whitespace normalized string, e.g.
+    `internalField uniform (0 0 0);` -> {'internalField': 'uniform (0 0 0)'}.
+    A keyless list of dictionaries, like the content of polyMesh/boundary,
+    is merged into the enclosing dictionary; any other keyless list is kept
+    as a string under the empty key ''.
+
+    Attributes:
+        text: OpenFOAM dictionary as a single multiline string.
+        list_reader: Optional callable to decode `List<type> N (...)` payload,
+            called as list_reader(type, N, text, pos) with pos just after `(`,
+            it returns (value, end) or None to keep the list as a string.
+    """
+
+    # one token per match, leading whitespace is skipped by the same match
+    _token_pattern = re.compile(r'''\s*(?:
+        (?P<comment>/\*.*?\*/|//[^\n]*)
+        |(?P<string>"(?:[^"\\]|\\.)*")
+        |(?P<punct>[{}();])
+        |(?P<word>(?:[^\s{}();"/]|/(?![/*]))+)
+        )''', re.VERBOSE | re.DOTALL)
+    # whitespace and comments before an entry, matched on their own so that a failed entry
+    # match can not backtrack into a `//` comment and take its text as a key
+    _skip_pattern = re.compile(r'(?:\s+|//[^\n]*|/\*.*?\*/)*', re.DOTALL)
+    # most entries are `key value;` or `key {` with at most one level of brackets in value,
+    # they are matched as a whole, anything else is left to the tokenizer
+    _entry_pattern = re.compile(r'''(?:
+        (?P<key>[A-Za-z_][^\s{}();"/]*)\s+(?P<value>(?:[^{}();"/]|\([^(){}";/]*\))*);
+        |(?P<dict>[A-Za-z_][^\s{}();"/]*)\s*\{
+        |(?P<close>\})
+        )''', re.VERBOSE | re.DOTALL)
+    # list of numbers or words with at most one level of nested lists, matched until `)`
+    _simple_list_pattern = re.compile(r'(?:[^(){}";/]|\([^(){}";/]*\))*\)')
+    # run of characters inside a list which needs no attention
+    _list_run_pattern = re.compile(r'[^(){}";/]+')
+    _list_skip_pattern = re.compile(r'/\*.*?\*/|//[^\n]*|"(?:[^"\\]|\\.)*"', re.DOTALL)
+    _comment_pattern = re.compile(r'/\*.*?\*/|//[^\n]*', re.DOTALL)
+    # bracket, or a string or comment skipped as a whole, the text between them is skipped by search
+    _bracket_pattern = re.compile(r'[()]|"(?:[^"\\]|\\.)*"|/\*.*?\*/|//[^\n]*', re.DOTALL)
+
+    def __init__(self, text, list_reader=None):
+        """Init an OpenFOAMDictParser."""
+        self._text = text
+        self._list_reader = list_reader
+        self.__values = self._parse_entries(0, None)[0]
+        del self._text
+
+    @classmethod
+    def from_file(cls, filepath, list_reader=None):
+        """Create a parser from an OpenFOAM file, plain or gzip compressed."""
+        return cls(read_file_bytes(filepath).decode('latin-1'), list_reader)
+
+    @property
+    def values(self):
+        """Get OpenFOAM dictionary values as a python dictionary."""
+        return self.__values
+
+    @staticmethod
+    def remove_comments(code):
+        """Remove comments from c++ codes."""
+        # remove all occurance streamed comments (/*COMMENT */) from string
+        text = re.sub(re.compile('/\*.*?\*/', re.DOTALL), '', code)
+        # remove all occurance singleline comments (//COMMENT\n ) from string
+        return re.sub(re.compile('//.*?\n'), '', text)
+
+    def _next_token(self, pos):
+        """Return (kind, value, end) of the token at pos, kind is None at the end of text."""
+        text = self._text
+        while True:
+            m = self._token_pattern.match(text, pos)
+            if m is None:
+                if text[pos:].strip():
+                    raise ValueError('error: unexpected character at {}: {}'.format(pos, text[pos:pos + 20]))
+                return None, None, len(text)
+            pos = m.end()
+            kind = m.lastgroup
+            if kind == 'comment':
+                continue
+            value = m.group(kind)
+            if kind == 'word' and value[0].isalpha() and pos < len(text) and text[pos] == '(':
+                # keyword with attached brackets like `div(phi,U)`
+                pos = self._match_bracket(pos)
+                value = text[m.start(kind):pos]
+            return kind, value, pos
+
+    def _match_bracket(self, pos):
+        """Return the position after the bracket closing the one at pos."""
+        depth = 0
+        for m in self._bracket_pattern.finditer(self._text, pos):
+            c = m.group()
+            if c == '(':
+                depth += 1
+            elif c == ')':
+                depth -= 1
+                if depth == 0:
+                    return m.end()
+        raise ValueError('error: closing bracket is missing')
+
+    def _parse_entries(self, pos, closing):
+        """Parse dictionary entries from pos until `closing` or the end of text."""
+        d = OrderedDict()
+        words = []
+        text = self._text
+        entry_match = self._entry_pattern.match
+        skip_match = self._skip_pattern.match
+        while True:
+            if not words:
+                pos = skip_match(text, pos).end()
+                m = entry_match(text, pos)
+                if m and self._list_reader and 'List<' in (m.group('value') or ''):
+                    m = None  # leave `nonuniform List<type> N(...)` to the list reader
+                if m:
+                    pos = m.end()
+                    kind = m.lastgroup
+                    if kind == 'value':
+                        d[m.group('key')] = ' '.join(m.group('value').split())
+                    elif kind == 'dict':
+                        d[m.group('dict')], pos = self._parse_entries(pos, '}')
+                    elif closing == '}':
+                        break
+                    else:
+                        raise ValueError('error: opening bracket is missing')
+                    continue
+            kind, value, pos = self._next_token(pos)
+            if kind is None:
+                if closing:
+                    raise ValueError('error: closing bracket is missing')
+                break
+            if kind == 'punct':
+                if value == ';':
+                    self._store(d, words)
+                    words = []
+                elif value == '{':
+                    sub, pos = self._parse_entries(pos, '}')
+                    d[' '.join(words)] = sub
+                    words = []
+                elif value == '(':
+                    attached = pos > 1 and not self._text[pos - 2].isspace()
+                    keyless = not words or (len(words) == 1 and words[0].isdigit())
+                    if self._list_reader and len(words) > 2 and words[-2].startswith('List<') \
+                            and words[-1].isdigit():
+                        decoded = self._list_reader(words[-2][5:-1], int(words[-1]), text, pos)
+                        if decoded is not None:
+                            words[1:], pos = [decoded[0]], decoded[1]
+                            continue
+                    list_value, pos = self._parse_list(pos)
+                    if isinstance(list_value, dict):
+                        if keyless:  # `N ( name {...} ... )` like polyMesh/boundary
+                            d.update(list_value)
+                        else:
+                            d[words[0]] = list_value
+                        words = []
+                    else:
+                        if attached and words:  # `3(1 2 3)` is kept as it is
+                            words[-1] += list_value
+                        else:
+                            words.append(list_value)
+                        if keyless:
+                            d[''] = ' '.join(words)
+                            words = []
+                elif value == closing:
+                    break
+                else:
+                    raise ValueError('error: opening bracket is missing')
+            elif kind == 'word' and value[0] == '#' and not words:
+                # directive like `#include "file"`, `#includeEtc "file"` or `#inputMode merge`
+                kind, arg, pos = self._next_token(pos)
+                d[value] = arg
+            else:
+                words.append(value)
+        self._store(d, words)  # last entry without `;`
+        return d, pos
+
+    @staticmethod
+    def _store(d, words):
+        """Store the entry of key and value words, a decoded list is stored as it is."""
+        if len(words) == 2 and not isinstance(words[1], str):
+            d[words[0]] = words[1]
+        elif words:
+            d[words[0]] = ' '.join(words[1:])
+
+    def _parse_list(self, pos):
+        """Parse a list after its opening bracket at pos-1.
+
+        Returns:
+            (value, pos), value is the list text if it contains no dictionary,
+            otherwise a dictionary of the named sub-dictionaries in the list.
+        """
+        text = self._text
+        start = pos - 1
+        m = self._simple_list_pattern.match(text, pos)
+        if m:
+            return ' '.join(text[start:m.end()].split()), m.end()
+        depth = 1
+        has_comment = False
+        entries = OrderedDict()
+        words = []
+        while True:
+            m = self._list_run_pattern.match(text, pos)
+            if m:
+                if depth == 1:
+                    words = m.group().split()[-1:]
+                pos = m.end()
+            if pos >= len(text):
+                raise ValueError('error: closing bracket is missing')
+            c = text[pos]
+            if c == '(':
+                depth += 1
+                pos += 1
+            elif c == ')':
+                depth -= 1
+                pos += 1
+                if depth == 0:
+                    break
+            elif c == '{':
+                if depth != 1:
+                    raise ValueError('error: dictionary in nested list is not supported')
+                sub, pos = self._parse_entries(pos + 1, '}')
+                entries[' '.join(words)] = sub
+                words = []
+            elif c == '}':
+                raise ValueError('error: opening bracket is missing')
+            else:  # string, comment, `/` or `;`
+                m = self._list_skip_pattern.match(text, pos)
+                if m:
+                    if c == '"':
+                        words = [m.group()]
+                    else:
+                        has_comment = True
+                    pos = m.end()
+                else:
+                    pos += 1
+        if entries:
+            return entries, pos
+        value = text[start:pos]
+        if has_comment:
+            value = self._comment_pattern.sub(' ', value)
+        return ' '.join(value.split()), pos
+
+    def ToString(self):
+        """Overwrite ToString method."""
+        return self.__repr__()
+
+    def __repr__(self):
+        """Class representation."""
+        return '{}'.format(self.values)
+
+
+class RegexCppDictParser(object):
+    """Parse OpenFOAM dictionary to Python dictionary by regular expressions.
+
+    This is the original parser replaced by CppDictParser, kept as reference
+    for benchmark. It can not parse lists and `( )` blocks.
+
+    Use values property to get the dictionary.
+
     Attributes:
         text: OpenFOAM dictionary as a single multiline string.
     """
@@ -96,85 +376,397 @@ class CppDictParser(object):
         return '{}'.format(self.values)
 
 
+class GrowableArray(object):
+    """1D numpy array with amortized O(1) append, capacity is doubled when full.
+
+    Attributes:
+        values: View of the filled part, valid until the next append.
+    """
+
+    def __init__(self, dtype=numpy.float64, capacity=1024):
+        self._data = numpy.empty(capacity, dtype=dtype)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def values(self):
+        return self._data[:self._size]
+
+    def extend(self, values):
+        """Append a sequence of values."""
+        n = len(values)
+        if self._size + n > len(self._data):
+            data = numpy.empty(max(2 * len(self._data), self._size + n), dtype=self._data.dtype)
+            data[:self._size] = self._data[:self._size]
+            self._data = data
+        self._data[self._size:self._size + n] = values
+        self._size += n
+
+    def append(self, value):
+        self.extend((value,))
+
+    def clear(self):
+        self._size = 0
+
+
+def find_time_lines(data, pos=0, end=None):
+    """Yield (line start, time value, line end) of every `Time = t` line in bytes data[pos:end]."""
+    end = len(data) if end is None else end
+
+    def next_line(p):
+        i = data.find(b'\nTime = ', p, end)
+        return i + 1 if i >= 0 else -1
+
+    start = pos if data.startswith(b'Time = ', pos, end) else next_line(pos)
+    while start >= 0:
+        line_end = data.find(b'\n', start, end)
+        line_end = end if line_end < 0 else line_end
+        try:
+            yield start, float(data[start + 7:line_end]), line_end
+        except ValueError:  # e.g. `Time = 0.1s` of a function object, not a time step
+            pass
+        start = next_line(line_end)
+
+
+class LogIndex(object):
+    """Sidecar index of the time steps of a solver log, e.g. log.pimpleFoam.index.
+
+    The index maps the value of every `Time = t` line to its byte offset in the log,
+    so a time window of a multi GB log can be read without scanning it. The file has
+    a 48 byte header (magic, number of log bytes covered, length and sha1 of the log
+    prefix to detect an overwritten log), followed by one 16 byte record per time
+    step: time as array('d') item and offset as array('q') item, native byte order.
+
+    Attributes:
+        logpath: Full path of the log file.
+        indexpath: Full path of the index file.
+        times: array('d') of time values.
+        offsets: array('q') of byte offsets of the `Time = ` lines.
+        covered: Number of log bytes the index is complete for.
+    """
+
+    _magic = b'FCBLIDX1'
+    _header_size = 48
+    _signature_size = 4096  # bytes of the log start to identify the run
+
+    def __init__(self, logpath):
+        self.logpath = logpath
+        self.indexpath = logpath + '.index'
+        self._clear()
+        self.load()
+
+    def _clear(self):
+        self.times = array('d')
+        self.offsets = array('q')
+        self.covered = 0
+        self._signature = (0, b'\0' * 20)
+        self._rewrite = True  # the index file is missing or stale, it is written anew by extend()
+
+    def _log_signature(self, size=None):
+        with open(self.logpath, 'rb') as f:
+            data = f.read(self._signature_size if size is None else size)
+        return len(data), hashlib.sha1(data).digest()
+
+    def load(self):
+        """Load the index file, it is ignored if the log is overwritten since."""
+        self._clear()
+        if not os.path.exists(self.indexpath) or not os.path.exists(self.logpath):
+            return
+        with open(self.indexpath, 'rb') as f:
+            data = f.read()
+        if len(data) < self._header_size or not data.startswith(self._magic):
+            return
+        covered, signature_size = struct.unpack('qq', data[8:24])
+        signature = (signature_size, data[24:44])
+        if covered > os.path.getsize(self.logpath) or self._log_signature(signature_size) != signature:
+            return
+        records = data[self._header_size:]
+        records = records[:len(records) // 16 * 16]
+        times, offsets = array('d'), array('q')
+        times.frombytes(records)
+        offsets.frombytes(records)
+        self.times, self.offsets = times[0::2], offsets[1::2]
+        self.covered = covered
+        self._signature = signature
+        self._rewrite = covered == 0
+
+    def clear(self):
+        """Forget all records and remove the index file."""
+        self._clear()
+        if os.path.exists(self.indexpath):
+            os.remove(self.indexpath)
+
+    @staticmethod
+    def _pack(records):
+        """Records as 16 byte time and offset pairs."""
+        data = array('d')
+        for t, offset in records:
+            data.append(t)
+            data.frombytes(array('q', (offset,)).tobytes())
+        return data
+
+    def extend(self, records, covered):
+        """Append (time, offset) records found in the log up to byte `covered`."""
+        records = [r for r in records if r[1] >= self.covered]
+        if covered <= self.covered and not records:
+            return
+        for t, offset in records:
+            self.times.append(t)
+            self.offsets.append(offset)
+        self.covered = max(covered, self.covered)
+        if self._signature[0] < self._signature_size:
+            # the signature grows with a short log, as long as the log is not overwritten since;
+            # otherwise the old signature makes the next load() reject this index
+            if not self._signature[0] or self._log_signature(self._signature[0]) == self._signature:
+                self._signature = self._log_signature()
+        header = self._magic + struct.pack('qq', self.covered, self._signature[0]) + self._signature[1]
+        try:
+            if self._rewrite or not os.path.exists(self.indexpath):
+                # write all records, a stale index file of an overwritten log is truncated
+                with open(self.indexpath, 'wb') as f:
+                    f.write(header.ljust(self._header_size, b'\0'))
+                    self._pack(zip(self.times, self.offsets)).tofile(f)
+                self._rewrite = False
+                return
+            with open(self.indexpath, 'r+b') as f:
+                f.write(header)
+                f.seek(0, os.SEEK_END)
+                self._pack(records).tofile(f)
+        except (IOError, OSError) as e:  # e.g. read only case folder, index is kept in memory
+            print('Warning: failed to write log index {}: {}'.format(self.indexpath, e))
+
+    def update(self, read_size=1 << 24):
+        """Scan the log bytes after `covered` for `Time = ` lines only."""
+        with open(self.logpath, 'rb') as f:
+            f.seek(self.covered)
+            while True:
+                base = self.covered
+                data = f.read(read_size)
+                end = data.rfind(b'\n') + 1
+                if not end:
+                    break
+                self.extend([(t, base + i) for i, t, _ in find_time_lines(data, 0, end)], base + end)
+                f.seek(self.covered)
+
+    def window(self, t0, t1):
+        """Return byte range (start, end) of the log containing time steps t0 <= t <= t1."""
+        i0 = bisect.bisect_left(self.times, t0)
+        i1 = bisect.bisect_right(self.times, t1)
+        start = self.offsets[i0] if i0 < len(self.offsets) else self.covered
+        end = self.offsets[i1] if i1 < len(self.offsets) else self.covered
+        return start, max(start, end)
+
+
 class ResidualParser(object):
-    """Paeser for residual values from a log file.
+    """Incremental parser of residuals in a solver log file like log.simpleFoam.
+
+    Every parse() continues from the byte offset where the previous call stopped,
+    so polling a growing log costs only the bytes appended since the last poll.
+    An incomplete last line is left for the next call. All solves of a field are
+    kept in numpy arrays, including repeated solves within a time step (PISO/PIMPLE
+    correctors), each referring to its time step by index into `times`.
+
+    While parsing, the byte offset of each time step is saved to a LogIndex next
+    to the log, parse_window() then reads only the slice of a time window.
+
+        parser = ResidualParser(case + '/log.simpleFoam')
+        while running:
+            if parser.parse():
+                plot(parser.times, parser.get_residuals('p'))
+        window = parser.parse_window(0.5, 0.6)
+
+    Text read from a pipe, like the stdout of a running solver, is fed instead:
+
+        parser = ResidualParser(None, parse=False, index=False)
+        parser.feed(text)
 
     Attributes:
-        filepath: Full file path to .log file.
-        parser: If ture Parser will start parsing the values once initiated.
+        filepath: Full file path to the log file.
+        offset: Byte offset in the file up to which the log is parsed.
+        quantities: Names of the solved fields in the order of first appearance.
+        index: LogIndex of the log file, None if disabled.
     """
 
-    def __init__(self, filepath, parse=True):
-        """Init residual parser."""
+    _solve_pattern = re.compile(br'Solving for (\w+), Initial residual = ([-+.\w]+), '
+                                br'Final residual = ([-+.\w]+), No Iterations (\d+)')
+    _read_size = 1 << 24  # bytes parsed at a time
+
+    def __init__(self, filepath, parse=True, index=True):
+        """Init residual parser.
+
+        Args:
+            filepath: Full file path to the log file.
+            parse: If True parse the existing content of the log file at once.
+            index: If True maintain the sidecar LogIndex while parsing.
+        """
         self.filepath = filepath
-        self.__residuals = OrderedDict()
+        self.index = LogIndex(filepath) if index else None
+        self.reset()
         if parse:
             self.parse()
 
+    def reset(self):
+        """Forget all parsed values and start again from the beginning of the file."""
+        self.offset = 0
+        self.quantities = []
+        self._partial = b''  # incomplete last line of fed text
+        self._times = GrowableArray(numpy.float64)
+        self._series = OrderedDict()  # field -> (time index, initial, final, iterations)
+
     def parse(self):
-        """Parse the log file."""
-        # open the file
-        # try to find the first line with Time =
-        # send the file to a recursive residualParser
-        try:
-            with open(self.filepath, 'rb') as f:
-                for line in f:
-                    if line.startswith('Time ='):
-                        self.timestep = self.__get_time(line)
-                        self.__residuals[self.timestep] = {}
-                        self.__parse_residuals(f)
-        except Exception as e:
-            raise 'Failed to parse {}:\n\t{}'.format(self.filepath, e)
+        """Parse the lines appended to the log file since the last call.
+
+        The log is parsed again from the start if it is shorter than the offset,
+        i.e. it is overwritten by a new run.
+
+        Returns:
+            Number of new time steps.
+        """
+        size = os.path.getsize(self.filepath)
+        if size < self.offset:
+            self.reset()
+            if self.index:
+                self.index.clear()
+        ntimes = len(self._times)
+        self._parse_range(self.offset, size)
+        return len(self._times) - ntimes
+
+    def feed(self, text):
+        """Parse log text not read from the file, an incomplete last line is kept for the next call.
+
+        Returns:
+            Number of new time steps.
+        """
+        if not isinstance(text, bytes):
+            text = text.encode('utf-8')
+        data = self._partial + text
+        nbytes = data.rfind(b'\n') + 1
+        self._partial = data[nbytes:]
+        ntimes = len(self._times)
+        if nbytes:
+            self._parse_lines(data, nbytes)
+            self.offset += nbytes
+        return len(self._times) - ntimes
+
+    def parse_window(self, t0, t1):
+        """Parse only the time steps t0 <= t <= t1 by seeking with the log index.
+
+        Returns:
+            A new ResidualParser holding the time steps of the window.
+        """
+        index = self.index or LogIndex(self.filepath)
+        index.update(self._read_size)
+        start, end = index.window(t0, t1)
+        window = ResidualParser(self.filepath, parse=False, index=False)
+        window._parse_range(start, end)
+        return window
+
+    def _parse_range(self, start, end):
+        """Parse complete lines of the log bytes [start, end) and set offset after the last one."""
+        self.offset = start
+        with open(self.filepath, 'rb') as f:
+            f.seek(start)
+            while self.offset < end:
+                data = f.read(min(self._read_size, end - self.offset))
+                nbytes = data.rfind(b'\n') + 1
+                if not nbytes:  # no complete line
+                    break
+                self._parse_lines(data, nbytes)
+                self.offset += nbytes
+                f.seek(self.offset)
+
+    def _parse_lines(self, data, end):
+        times, records = [], []
+        solves = OrderedDict()  # field -> rows of (time index, initial, final, iterations)
+        itime = len(self._times) - 1
+        pos = 0
+        for line_start, t, line_end in itertools.chain(find_time_lines(data, 0, end), [(end, None, end)]):
+            # solves before the first time step, like potentialFoam, are ignored
+            if itime >= 0:
+                for field, initial, final, iterations in self._solve_pattern.findall(data, pos, line_start):
+                    try:
+                        row = (itime, float(initial), float(final), int(iterations))
+                    except ValueError:
+                        continue
+                    solves.setdefault(field, []).append(row)
+            if t is not None:
+                times.append(t)
+                records.append((t, self.offset + line_start))
+                itime += 1
+            pos = line_end
+        self._times.extend(times)
+        if self.index is not None:
+            self.index.extend(records, self.offset + end)
+        for field, rows in solves.items():
+            field = field.decode('latin-1')
+            if field not in self._series:
+                self.quantities.append(field)
+                self._series[field] = (GrowableArray(numpy.int64), GrowableArray(numpy.float64),
+                                       GrowableArray(numpy.float64), GrowableArray(numpy.int64))
+            for array_, column in zip(self._series[field], zip(*rows)):
+                array_.extend(column)
 
     @property
-    def residuals(self):
-        """Get residuals as a dictionary."""
-        return self.__residuals
+    def times(self):
+        """numpy array of the time values."""
+        return self._times.values
 
     @property
     def time_range(self):
         """Get time range as a tuple."""
-        _times = self.get_times()
+        _times = self.times
         return _times[0], _times[-1]
 
-    def get_times(self):
-        """Get time steps."""
-        return self.__residuals.keys()
-
-    def get_residuals(self, quantity, time_range):
-        """Get residuals for a quantity."""
-        if quantity not in self.quantities:
-            print ('Invalid quantity [{}]. Try from the list below:\n{}'
-                   .format(quantity, self.quantities))
-            return ()
+    def get_times(self, time_range=None):
+        """Get time steps, optionally within time_range (t0, t1) inclusive."""
+        return self.times[self._time_slice(time_range)]
 
+    def _time_slice(self, time_range):
         if not time_range:
-            return (v[quantity] for v in self.__residuals.itervalues())
-        else:
-            available_time_range = self.time_range
-            try:
-                t0 = max(available_time_range[0], time_range[0])
-                t1 = min(available_time_range[1], time_range[1])
-            except IndexError as e:
-                raise ValueError('Failed to read time_range:\n{}'.format(e))
+            return slice(0, len(self._times))
+        times = self.times
+        return slice(numpy.searchsorted(times, time_range[0], 'left'),
+                     numpy.searchsorted(times, time_range[1], 'right'))
 
-            return (self.__residuals[int(t)][quantity] for t in xrange(t0, t1))
+    def get_series(self, quantity):
+        """Return all solves of a quantity as a dictionary of numpy arrays.
 
-    @staticmethod
-    def __get_time(line):
-        return int(line.split('Time =')[-1])
-
-    def __parse_residuals(self, f):
-        for line in f:
-            if not line.startswith('Time ='):
-                try:
-                    # quantity, Initial residual, Final residual, No Iterations
-                    q, ir, fr, ni = line.split(':  Solving for ')[1].split(',')
-                    self.__residuals[self.timestep][q] = ir.split('= ')[-1]
-                except IndexError:
-                    pass
-            else:
-                self.timestep = self.__get_time(line)
-                self.__residuals[self.timestep] = {}
+        Keys are time_index (index into times), initial, final and iterations.
+        """
+        arrays = self._series[quantity]
+        return OrderedDict(zip(('time_index', 'initial', 'final', 'iterations'), (a.values for a in arrays)))
+
+    def get_residuals(self, quantity, time_range=None, kind='initial'):
+        """Get residuals of a quantity aligned with get_times(time_range).
 
-        self.quantities = self.__residuals[self.timestep].keys()
+        The first solve of each time step is taken, NaN if the quantity is not solved in a step.
+
+        Args:
+            quantity: Field name like p or Ux.
+            time_range: Optional (t0, t1) inclusive.
+            kind: initial, final or iterations.
+        """
+        if quantity not in self._series:
+            print('Invalid quantity [{}]. Try from the list below:\n{}'
+                  .format(quantity, self.quantities))
+            return numpy.empty(0)
+        series = self.get_series(quantity)
+        time_index = series['time_index']
+        first = numpy.ones(len(time_index), dtype=bool)
+        first[1:] = time_index[1:] != time_index[:-1]
+        values = numpy.full(len(self._times), numpy.nan)
+        values[time_index[first]] = series[kind][first]
+        return values[self._time_slice(time_range)]
+
+    @property
+    def residuals(self):
+        """Get initial residuals as a dictionary of {time: {quantity: value}}."""
+        residuals = OrderedDict((t, {}) for t in self.times.tolist())
+        times = self.times
+        for quantity in self.quantities:
+            for t, value in zip(times.tolist(), self.get_residuals(quantity).tolist()):
+                if value == value:  # not NaN
+                    residuals[t][quantity] = value
+        return residuals
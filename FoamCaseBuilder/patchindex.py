@@ -0,0 +1,159 @@
+# coding=utf-8
+
+from __future__ import print_function, absolute_import
+
+"""Compact index of the patches in constant/polyMesh/boundary.
+
+Only name, type, nFaces, startFace and inGroups of each patch are extracted by a
+single regex scan, nFaces and startFace are stored in numpy arrays and the row of
+a patch is found by name in O(1). The index is cached per (realpath, mtime_ns, size)
+of the boundary file, like the parsed dictionaries of dictcache. Changing the type of
+a patch replaces only the bytes of that `type` value in the file, the other patches
+are not parsed nor reformatted. A cached index is shared by all threads, it is
+locked while it is validated or edited.
+
+    index = PatchIndex.from_case(case)
+    index.names, index.nFaces[index.row('inlet')]
+    index.setTypes({'inlet': 'patch', 'walls': 'wall'})
+"""
+
+import re
+import os
+import os.path
+import threading
+
+import numpy
+
+from .binaryfile import _header_pattern
+from .dictcache import _file_key
+from .filewriter import write_if_changed
+
+_comment_pattern = re.compile(br'//[^\n]*|/\*.*?\*/', re.DOTALL)
+# patch dictionaries do not nest, so a patch is `name { entries }`
+_patch_pattern = re.compile(br'("[^"]*"|[^\s{}()";]+)\s*\{([^{}]*)\}')
+_entry_pattern = re.compile(br'(\w+)\s+([^;]*?)\s*;')
+_group_pattern = re.compile(br'\(([^()]*)\)')
+
+_cache = {}  # boundary file realpath -> PatchIndex
+_cache_lock = threading.Lock()
+
+
+def _boundary_path(case):
+    return os.path.join(case, 'constant', 'polyMesh', 'boundary')
+
+
+class PatchIndex(object):
+    """Table of patches of a polyMesh boundary file.
+
+    Attributes:
+        filepath: Path of the boundary file.
+        names: Patch names in file order.
+        types: Patch types.
+        nFaces: numpy int64 array of face counts.
+        startFace: numpy int64 array of the first face labels.
+        inGroups: Tuple of group names of each patch, empty if not in any group.
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self._lock = threading.RLock()
+        self._load()
+
+    def _load(self):
+        # the key is taken before reading, a change while reading makes the next validation fail
+        self._key = _file_key(self.filepath)
+        with open(self.filepath, 'rb') as f:
+            data = f.read()
+        self._data = data
+        m = _header_pattern.search(data, 0, 4096)
+        # blank out comments, keeping byte positions of the entries
+        text = _comment_pattern.sub(lambda c: b' ' * len(c.group(0)), data)
+        names, types, type_spans, nfaces, start_faces, groups = [], [], [], [], [], []
+        for pm in _patch_pattern.finditer(text, m.end() if m else 0):
+            entries = {}
+            body_start = pm.start(2)
+            for em in _entry_pattern.finditer(pm.group(2)):
+                entries[em.group(1)] = (em.group(2), body_start + em.start(2), body_start + em.end(2))
+            if b'type' not in entries:
+                continue
+            names.append(pm.group(1).decode('latin-1'))
+            types.append(entries[b'type'][0].decode('latin-1'))
+            type_spans.append(entries[b'type'][1:])
+            nfaces.append(int(entries.get(b'nFaces', (b'0',))[0]))
+            start_faces.append(int(entries.get(b'startFace', (b'0',))[0]))
+            gm = _group_pattern.search(entries[b'inGroups'][0]) if b'inGroups' in entries else None
+            groups.append(tuple(gm.group(1).decode('latin-1').split()) if gm else ())
+        self.names = names
+        self.types = types
+        self.nFaces = numpy.array(nfaces, dtype=numpy.int64)
+        self.startFace = numpy.array(start_faces, dtype=numpy.int64)
+        self.inGroups = groups
+        self._type_spans = type_spans
+        self._rows = dict((name, i) for i, name in enumerate(names))
+
+    @classmethod
+    def from_case(cls, case):
+        """Return the cached index of the case, re-read if the boundary file is changed."""
+        filepath = os.path.realpath(_boundary_path(case))
+        with _cache_lock:
+            index = _cache.get(filepath)
+            if index is None:
+                index = _cache[filepath] = cls(filepath)
+        index._validate()
+        return index
+
+    def _validate(self):
+        """Re-read the file if it is changed since it was read or written by this index."""
+        with self._lock:
+            if self._key != _file_key(self.filepath):
+                self._load()
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self._rows
+
+    def row(self, name):
+        """Row number of the patch, raise KeyError if not found."""
+        return self._rows[name]
+
+    def patch(self, name):
+        """Return the patch as a dictionary of name, type, nFaces, startFace and inGroups."""
+        i = self._rows[name]
+        return {'name': name, 'type': self.types[i], 'nFaces': int(self.nFaces[i]),
+                'startFace': int(self.startFace[i]), 'inGroups': self.inGroups[i]}
+
+    def setType(self, name, patch_type):
+        """Change the type of one patch in the file, see setTypes()."""
+        return self.setTypes({name: patch_type})
+
+    def setTypes(self, patch_types):
+        """Change types of patches in the file in place, return True if the file is written.
+
+        Args:
+            patch_types: Dictionary of patch name and new type.
+        """
+        with self._lock:
+            self._validate()  # spans of a changed file are stale
+            edits = sorted((self._type_spans[self._rows[name]], name, str(t)) for name, t in patch_types.items())
+            pieces, pos = [], 0
+            for (start, end), name, patch_type in edits:
+                pieces += [self._data[pos:start], patch_type.encode('latin-1')]
+                pos = end
+            pieces.append(self._data[pos:])
+            self._data = b''.join(pieces)
+
+            # type values behind an edited one move by the change of its length
+            shifts = [(start, len(t) - (end - start)) for (start, end), name, t in edits]
+            new_types = dict((name, t) for span, name, t in edits)
+            for i, (start, end) in enumerate(self._type_spans):
+                shift = sum(delta for s, delta in shifts if s < start)
+                if self.names[i] in new_types:
+                    self.types[i] = new_types[self.names[i]]
+                    end = start + len(self.types[i])
+                self._type_spans[i] = (start + shift, end + shift)
+
+            written = write_if_changed(self.filepath, lambda f: f.write(self._data))
+            self._key = _file_key(self.filepath)
+        return written
@@ -0,0 +1,80 @@
+# coding=utf-8
+
+from __future__ import print_function, absolute_import
+
+"""Pipeline of case steps run concurrently with step caching, needs Python 3.7+.
+
+The steps, their dependencies and the step caching are those of casesteps.CaseSteps.
+Steps run as soon as the steps they depend on are done, so independent steps run
+concurrently, and a step is skipped if it is up to date. The hash of the inputs is
+taken after the run, so steps changing their inputs in place, like transformPoints,
+are skipped on the next run as well.
+
+    pipeline = case_pipeline(case, 'simpleFoam', mesh_file='mesh.unv', scale=0.001,
+                             init_potential=True, run_parallel=True, num_proc=4)
+    pipeline.write_allrun()  # bash script of the same steps for portability
+    results = asyncio.run(pipeline.run())  # {'ideasUnvToFoam': 0, 'transformPoints': 'skipped', ...}
+"""
+
+import os
+import asyncio
+import collections
+
+from .runner import run_foam_application
+from .casesteps import Step, CaseSteps, case_steps, SKIPPED
+
+
+class Pipeline(CaseSteps):
+    """Case steps run by asyncio, see the module documentation."""
+
+    ############################ execution ############################
+    async def _run_step(self, name, done, results, force, stdout_callback):
+        deps = self.dependencies(name)
+        await asyncio.gather(*[done[d] for d in deps])
+        if any(results[d] not in (0, SKIPPED) for d in deps):
+            print("Warning: pipeline step {} is not run as a step it depends on failed".format(name))
+            results[name] = None
+            return
+        loop = asyncio.get_event_loop()
+        # hashing may read large mesh files, keep the event loop streaming the output of other steps
+        if not force and await loop.run_in_executor(None, self.is_up_to_date, name):
+            print("Info: pipeline step {} is up to date, skipped".format(name))
+            results[name] = SKIPPED
+            return
+        step = self.steps[name]
+        print("Running pipeline step {}: {}".format(name, step.command_line()))
+        self._keys.pop(name, None)
+        exit_code = await run_foam_application(step.command_line(), self.case, stdout_callback=stdout_callback,
+                                               log=os.path.join(self.case, 'log.' + name))
+        if exit_code == 0:
+            self._keys[name] = await loop.run_in_executor(None, self.input_key, name)
+        results[name] = exit_code
+
+    async def run(self, force=False, stdout_callback=None):
+        """Run the steps that are not up to date, independent steps concurrently.
+
+        Args:
+            force: Run all steps even if they are up to date.
+            stdout_callback: Function called with each output line of every step.
+
+        Returns:
+            OrderedDict of step name and exit code, `SKIPPED` if up to date, or None
+            if not run because a step it depends on failed.
+        """
+        self._load_state()
+        results = collections.OrderedDict((name, None) for name in self.steps)
+        done = {}
+        try:
+            for name in self.steps:  # dependencies are earlier steps, their futures exist
+                done[name] = asyncio.ensure_future(self._run_step(name, done, results, force, stdout_callback))
+            await asyncio.gather(*done.values())
+        finally:
+            for future in done.values():
+                future.cancel()
+            self._save_state()
+        return results
+
+
+def case_pipeline(case, solver_name, **kwargs):
+    """Standard Pipeline of a case, see casesteps.case_steps() for the arguments."""
+    return case_steps(case, solver_name, cls=Pipeline, **kwargs)
@@ -0,0 +1,362 @@
+# coding=utf-8
+
+from __future__ import print_function, absolute_import
+
+"""Per rank CPU, memory and I/O time series of a running solver, read from /proc.
+
+ResourceSampler walks the process tree below a root process, e.g. the bash of
+Allrun or mpirun, at a fixed interval in a background thread. For each solver
+process, a rank of `mpirun -np N <solver> -parallel` or the single serial process,
+it records CPU%, resident memory and the bytes read from and written to storage.
+The rank number is taken from the MPI environment of the process
+(OMPI_COMM_WORLD_RANK, PMI_RANK, PMIX_RANK), otherwise ranks are numbered in
+the order they are found. No external service is used, only Linux /proc.
+
+The series is saved as `log.<solver>.resources.npz` in the case, with columns
+time, rank, pid, cpu_percent, rss, read_bytes, write_bytes (one row per rank and
+sample), and a load imbalance summary as `.json` and `.txt` next to it:
+
+    sampler = ResourceSampler(process.pid, case, 'simpleFoam', interval=1.0)
+    sampler.start()
+    ...  # wait for the process
+    summary = sampler.stop()  # saves series and summary
+    print(format_summary(summary))
+
+MPI libraries busy-wait by default, so a rank waiting for its neighbours still
+shows close to 100% CPU; the imbalance of CPU% is telling for ranks blocked in I/O
+or with polling disabled, the imbalance of memory tells an uneven decomposition.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import collections
+
+import numpy
+
+from .parser import GrowableArray
+from .filewriter import write_if_changed
+
+_proc = '/proc'
+# processes of the tree which are not solver ranks when no solver name is given
+_launchers = ('bash', 'sh', 'dash', 'zsh', 'tee', 'mpirun', 'mpiexec', 'orterun', 'orted', 'prterun', 'prted',
+              'hydra_pmi_proxy', 'mpiexec.hydra', 'srun', 'time', 'env')
+_rank_variables = (b'OMPI_COMM_WORLD_RANK', b'PMI_RANK', b'PMIX_RANK')
+_columns = (('time', numpy.float64), ('rank', numpy.int32), ('pid', numpy.int64), ('cpu_percent', numpy.float64),
+            ('rss', numpy.int64), ('read_bytes', numpy.int64), ('write_bytes', numpy.int64))
+
+
+def is_supported():
+    """True if /proc of Linux is available."""
+    return os.path.isfile(os.path.join(_proc, 'self', 'stat'))
+
+
+def _read(path, mode='r'):
+    try:
+        with open(path, mode) as f:
+            return f.read()
+    except (IOError, OSError):  # the process has exited or is not readable
+        return None
+
+
+def read_stat(pid):
+    """(ppid, state, cpu ticks of user and system, start time in ticks, rss pages) from /proc/<pid>/stat."""
+    text = _read('{}/{}/stat'.format(_proc, pid))
+    if not text:
+        return None
+    # the command name in parentheses may contain spaces, fields after it are fixed
+    fields = text.rsplit(')', 1)[1].split()
+    return int(fields[1]), fields[0], int(fields[11]) + int(fields[12]), int(fields[19]), int(fields[21])
+
+
+def read_io(pid):
+    """(read_bytes, write_bytes) of storage I/O from /proc/<pid>/io, (0, 0) if it is not readable."""
+    text = _read('{}/{}/io'.format(_proc, pid))
+    values = {}
+    for line in (text or '').splitlines():
+        name, _, value = line.partition(':')
+        values[name] = value.strip()
+    return int(values.get('read_bytes', 0)), int(values.get('write_bytes', 0))
+
+
+def read_name(pid):
+    """Base name of the executable from the command line, the `comm` of stat is cut to 15 characters."""
+    cmdline = _read('{}/{}/cmdline'.format(_proc, pid), 'rb')
+    if not cmdline:
+        return None
+    return os.path.basename(cmdline.split(b'\0', 1)[0].decode('utf-8', 'replace'))
+
+
+def read_rank(pid):
+    """MPI rank of the process from its environment, None for a serial process."""
+    environ = _read('{}/{}/environ'.format(_proc, pid), 'rb')
+    for entry in (environ or b'').split(b'\0'):
+        name, _, value = entry.partition(b'=')
+        if name in _rank_variables and value.isdigit():
+            return int(value)
+    return None
+
+
+def application_name(cmd):
+    """Name of the application of a command line, skipping launchers like mpirun and their options."""
+    args = cmd if isinstance(cmd, (list, tuple)) else [cmd]
+    for arg in ' '.join(args).split():  # also a command line given to `bash -c`
+        name = os.path.basename(arg.strip('\'"'))
+        if name and name not in _launchers and not name.startswith('-') and not name.isdigit():
+            return name
+    return None
+
+
+def process_tree(root_pid):
+    """Return the PIDs of root_pid and all its descendants, root first."""
+    children = collections.defaultdict(list)
+    for name in os.listdir(_proc):
+        if name.isdigit():
+            stat = read_stat(name)
+            if stat:
+                children[stat[0]].append(int(name))
+    tree, pending = [], [root_pid]
+    while pending:
+        pid = pending.pop()
+        tree.append(pid)
+        pending.extend(children.get(pid, ()))
+    return tree
+
+
+class ResourceSampler(object):
+    """Sample CPU, RSS and I/O of the solver ranks below a root process in a background thread.
+
+    Attributes:
+        root_pid: PID of the root of the process tree, e.g. QProcess or asyncio subprocess.
+        case: Case path, the series and summary are saved there by stop().
+        solver: Name of the solver executable, None to take every process that is not a launcher.
+        interval: Seconds between samples.
+        ranks: OrderedDict of (pid, start time) -> rank number of the processes found so far.
+    """
+
+    def __init__(self, root_pid, case=None, solver=None, interval=1.0):
+        self.root_pid = root_pid
+        self.case = case
+        self.solver = solver
+        self.interval = interval
+        self.ranks = collections.OrderedDict()
+        self._columns = collections.OrderedDict((name, GrowableArray(dtype)) for name, dtype in _columns)
+        self._last = {}  # (pid, start time) -> (sample time, cpu ticks) of the previous sample
+        self._start = None
+        self._thread = None
+        self._stopping = threading.Event()
+        self._tick = float(os.sysconf('SC_CLK_TCK')) if hasattr(os, 'sysconf') else 100.0
+        self._page = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+    def _is_rank(self, pid):
+        # not cached: a forked launcher becomes the solver by exec, with the same PID and start time
+        name = read_name(pid)
+        if name is None:
+            return False
+        return name == self.solver if self.solver else name not in _launchers
+
+    def sample(self):
+        """Take one sample of all ranks, return the number of ranks alive."""
+        now = time.time()
+        if self._start is None:
+            self._start = now
+        count = 0
+        for pid in process_tree(self.root_pid):
+            stat = read_stat(pid)
+            if stat is None or stat[1] == 'Z':
+                continue
+            key = (pid, stat[3])
+            if key not in self.ranks:
+                if not self._is_rank(pid):
+                    continue
+                rank = read_rank(pid)
+                self.ranks[key] = rank if rank is not None else len(self.ranks)
+            previous = self._last.get(key)
+            cpu = numpy.nan
+            if previous and now > previous[0]:
+                cpu = 100.0 * (stat[2] - previous[1]) / self._tick / (now - previous[0])
+            self._last[key] = (now, stat[2])
+            read_bytes, write_bytes = read_io(pid)
+            for column, value in zip(self._columns.values(), (now - self._start, self.ranks[key], pid, cpu,
+                                                               stat[4] * self._page, read_bytes, write_bytes)):
+                column.append(value)
+            count += 1
+        return count
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self.sample()
+            stat = read_stat(self.root_pid)
+            if stat is None or stat[1] == 'Z':  # the root has exited
+                break
+            self._stopping.wait(self.interval)
+
+    def start(self):
+        """Sample in a daemon thread until stop() is called or the root process exits."""
+        if not is_supported():
+            print("Warning: /proc is not available, resources of the solver are not sampled")
+            return self
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='ResourceSampler')
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def wait(self, timeout=None):
+        """Wait until sampling ends with the root process, return True if it has ended."""
+        if self._thread:
+            self._thread.join(timeout)
+            return not self._thread.is_alive()
+        return True
+
+    def stop(self, save=True):
+        """Stop sampling, save series and summary to the case if there is one, return the summary."""
+        self._stopping.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        summary = self.summary()
+        if save and self.case and len(self._columns['time']):
+            self.save(summary=summary)
+        return summary
+
+    def columns(self):
+        """Return an OrderedDict of the columns of the series, one row per rank and sample."""
+        return collections.OrderedDict((name, column.values.copy()) for name, column in self._columns.items())
+
+    def summary(self):
+        return resource_summary(self.columns())
+
+    def filepath(self):
+        """Base path `<case>/log.<solver>.resources` of the saved files."""
+        return os.path.join(self.case, 'log.{}.resources'.format(self.solver or 'solver'))
+
+    def save(self, filepath=None, summary=None):
+        """Write the series as `.npz` and the summary as `.json` and `.txt`, return the npz path."""
+        filepath = filepath or self.filepath()
+        columns = self.columns()
+        data = io.BytesIO()  # numpy needs a seekable file for the zip archive
+        numpy.savez_compressed(data, **columns)
+        write_if_changed(filepath + '.npz', lambda f: f.write(data.getvalue()))
+        save_summary(summary or resource_summary(columns), filepath)
+        return filepath + '.npz'
+
+
+def _float(value):
+    """Python float for JSON, None for NaN."""
+    value = float(value)
+    return None if value != value else value
+
+
+def _imbalance(values):
+    """max / mean of the per rank values, 1 for perfectly balanced ranks."""
+    values = numpy.asarray([v for v in values if v == v], dtype=numpy.float64)
+    if not len(values) or not values.mean():
+        return None
+    return float(values.max() / values.mean())
+
+
+def resource_summary(columns):
+    """Per rank statistics and load imbalance from the columns of ResourceSampler or a saved npz.
+
+    Imbalance factors are max / mean over the ranks of mean CPU%, peak RSS and I/O bytes,
+    1.0 for balanced ranks; (1 - 1 / factor) is the share of the time or memory the
+    other ranks would wait or leave unused.
+    """
+    rank_column = numpy.asarray(columns['rank'])
+    ranks = []
+    for rank in numpy.unique(rank_column):
+        mask = rank_column == rank
+        cpu = numpy.asarray(columns['cpu_percent'])[mask]
+        cpu = cpu[~numpy.isnan(cpu)]
+        ranks.append(collections.OrderedDict([
+            ('rank', int(rank)),
+            ('pid', int(numpy.asarray(columns['pid'])[mask][-1])),
+            ('samples', int(mask.sum())),
+            ('cpu_mean', _float(cpu.mean()) if len(cpu) else None),
+            ('cpu_max', _float(cpu.max()) if len(cpu) else None),
+            ('rss_max', int(numpy.asarray(columns['rss'])[mask].max())),
+            ('read_bytes', int(numpy.asarray(columns['read_bytes'])[mask].max())),
+            ('write_bytes', int(numpy.asarray(columns['write_bytes'])[mask].max())),
+        ]))
+    times = numpy.asarray(columns['time'])
+    summary = collections.OrderedDict([
+        ('ranks', ranks),
+        ('duration', _float(times.max()) if len(times) else 0.0),
+        ('cpu_imbalance', _imbalance([r['cpu_mean'] if r['cpu_mean'] is not None else numpy.nan for r in ranks])),
+        ('rss_imbalance', _imbalance([r['rss_max'] for r in ranks])),
+        ('io_imbalance', _imbalance([r['read_bytes'] + r['write_bytes'] for r in ranks])),
+    ])
+    cpu_means = [(r['cpu_mean'], r['rank']) for r in ranks if r['cpu_mean'] is not None]
+    summary['slowest_rank'] = min(cpu_means)[1] if len(cpu_means) > 1 else None
+    summary['largest_rank'] = max((r['rss_max'], r['rank']) for r in ranks)[1] if len(ranks) > 1 else None
+    return summary
+
+
+def _megabytes(value):
+    return '{:.1f}'.format(value / 1048576.0)
+
+
+def format_summary(summary):
+    """Format the summary as a text table of the ranks and the imbalance factors."""
+    lines = ['{} ranks sampled over {:.1f} s'.format(len(summary['ranks']), summary['duration'] or 0.0),
+             '{:>6} {:>8} {:>8} {:>8} {:>9} {:>9} {:>9}'.format(
+                 'rank', 'pid', 'cpu%', 'max cpu%', 'RSS MB', 'read MB', 'write MB')]
+    for r in summary['ranks']:
+        lines.append('{:>6} {:>8} {:>8} {:>8} {:>9} {:>9} {:>9}'.format(
+            r['rank'], r['pid'],
+            '-' if r['cpu_mean'] is None else '{:.1f}'.format(r['cpu_mean']),
+            '-' if r['cpu_max'] is None else '{:.1f}'.format(r['cpu_max']),
+            _megabytes(r['rss_max']), _megabytes(r['read_bytes']), _megabytes(r['write_bytes'])))
+    for name in ('cpu', 'rss', 'io'):
+        factor = summary[name + '_imbalance']
+        lines.append('{} imbalance (max / mean): {}'.format(
+            name.upper() if name != 'rss' else 'RSS', '-' if factor is None else '{:.3f}'.format(factor)))
+    if summary['slowest_rank'] is not None:
+        lines.append('lowest CPU% on rank {}, largest memory on rank {}'.format(
+            summary['slowest_rank'], summary['largest_rank']))
+    return '\n'.join(lines) + '\n'
+
+
+def save_summary(summary, filepath):
+    """Write the summary to `filepath.json` and `filepath.txt`, return both paths."""
+    json_path, text_path = filepath + '.json', filepath + '.txt'
+    write_if_changed(json_path, lambda f: f.write(json.dumps(summary, indent=2)))
+    write_if_changed(text_path, lambda f: f.write(format_summary(summary)))
+    return json_path, text_path
+
+
+def load_resources(filepath):
+    """Load the columns saved by ResourceSampler.save() as a dict of arrays."""
+    with numpy.load(filepath) as data:
+        return collections.OrderedDict((name, data[name]) for name in data.files)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m FoamCaseBuilder.procmonitor',
+                                     description='Sample CPU, memory and I/O of the ranks of a running solver')
+    parser.add_argument('pid', type=int, help='root process, e.g. the bash of Allrun or mpirun')
+    parser.add_argument('case', help='case to save the series and summary in')
+    parser.add_argument('--solver', default=None, help='solver executable, default every non launcher process')
+    parser.add_argument('--interval', type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    if not is_supported():
+        print("Error: /proc is not available")
+        return 1
+    sampler = ResourceSampler(args.pid, args.case, args.solver, args.interval).start()
+    try:
+        while not sampler.wait(0.5):
+            pass
+    except KeyboardInterrupt:
+        pass
+    print(format_summary(sampler.stop()), end='')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
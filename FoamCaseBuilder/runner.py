@@ -0,0 +1,165 @@
+# coding=utf-8
+
+from __future__ import print_function, absolute_import
+
+"""asyncio runner of OpenFOAM applications, independent of Qt, needs Python 3.7+.
+
+Applications are started with the OpenFOAM environment snapshot of
+utility.getFoamEnvironment() in a process group of their own, stdout and stderr
+are read concurrently and passed line by line to callbacks while being written to
+`log.<application>` by Python. A timeout or cancellation of the task terminates
+the whole process group, so mpirun and all its ranks are stopped too. Several
+applications can run concurrently in one event loop:
+
+    async def prepare(case):
+        await asyncio.gather(run_foam_application('blockMesh', case),
+                             run_foam_application(['surfaceFeatureExtract'], case))
+        return await run_foam_application('simpleFoam', case, stdout_callback=print, timeout=3600)
+
+    exit_code = asyncio.run(prepare(case))
+"""
+
+import os
+import signal
+import asyncio
+import inspect
+import platform
+import subprocess
+
+from .utility import makeFoamCommand, makeRunCommand
+from .procmonitor import ResourceSampler, application_name
+
+_read_size = 1 << 16
+_posix = platform.system() != 'Windows'
+
+
+class _LineStream(object):
+    """Split chunks of a pipe into lines, write them to the log and pass them to the callback."""
+
+    def __init__(self, callback, log):
+        self.callback = callback
+        self.log = log
+        self._partial = b''
+
+    async def _emit(self, line):
+        if self.log:
+            self.log.write(line)
+        if self.callback:
+            result = self.callback(line.decode('utf-8', 'replace'))
+            if inspect.isawaitable(result):
+                await result
+
+    async def pump(self, reader):
+        while True:
+            chunk = await reader.read(_read_size)
+            if not chunk:
+                break
+            data = self._partial + chunk
+            end = data.rfind(b'\n') + 1
+            self._partial = data[end:]
+            start = 0
+            while start < end:
+                line_end = data.index(b'\n', start) + 1
+                await self._emit(data[start:line_end])
+                start = line_end
+        if self._partial:  # last line without newline
+            await self._emit(self._partial)
+            self._partial = b''
+
+
+def _command_name(cmd):
+    first = cmd[0] if isinstance(cmd, (list, tuple)) else cmd.split()[0]
+    return first.rsplit('/', 1)[-1]
+
+
+async def _start_process(cmd, case):
+    kwargs = dict(stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if _posix:
+        kwargs['start_new_session'] = True  # own process group, killed as a whole
+    else:
+        kwargs['creationflags'] = subprocess.CREATE_NEW_PROCESS_GROUP
+    command = makeFoamCommand(cmd, case)
+    if command is None:  # not Posix, or bashrc not found: run the shell command line of makeRunCommand()
+        return await asyncio.create_subprocess_shell(makeRunCommand(cmd, case), **kwargs)
+    args, env, cwd = command
+    return await asyncio.create_subprocess_exec(*args, env=env, cwd=cwd, **kwargs)
+
+
+def _signal_group(proc, sig):
+    try:
+        if _posix:
+            os.killpg(proc.pid, sig)
+        elif sig == signal.SIGTERM:
+            proc.send_signal(signal.CTRL_BREAK_EVENT)
+        else:
+            proc.kill()
+    except (ProcessLookupError, PermissionError):  # already exited
+        pass
+
+
+async def kill_process_group(proc, grace_period=5.0):
+    """Send SIGTERM to the process group of proc, SIGKILL if it is still running after grace_period seconds."""
+    if proc.returncode is None:
+        _signal_group(proc, signal.SIGTERM)
+        try:
+            await asyncio.wait_for(proc.wait(), grace_period)
+        except asyncio.TimeoutError:
+            _signal_group(proc, signal.SIGKILL if _posix else signal.SIGTERM)
+            await proc.wait()
+    elif _posix:  # the leader has exited, but ranks may be left in the group
+        _signal_group(proc, signal.SIGKILL)
+
+
+async def run_foam_application(cmd, case=None, stdout_callback=None, stderr_callback=None,
+                               log=True, timeout=None, grace_period=5.0, check=False, monitor_interval=None):
+    """Run an OpenFOAM application or utility and return its exit code.
+
+    Args:
+        cmd: List or string with the application as the first entry followed by the options,
+            e.g. ['transformPoints', '-scale', '"(0.001 0.001 0.001)"'], see utility.splitFoamCommand().
+        case: Case path used as working directory, default the current directory.
+        stdout_callback: Function or coroutine function called with each line of stdout as str.
+        stderr_callback: Function or coroutine function called with each line of stderr as str.
+        log: True to write stdout and stderr to `log.<application>` in the case, a path to
+            write them to another file, or False for no log file.
+        timeout: Seconds after which the process group is terminated and asyncio.TimeoutError raised.
+        grace_period: Seconds between SIGTERM and SIGKILL when terminating the process group.
+        check: Raise subprocess.CalledProcessError if the exit code is not zero.
+        monitor_interval: Seconds between samples of CPU, memory and I/O of the application
+            or its MPI ranks, saved as `log.<application>.resources.*` in the case, see procmonitor.
+
+    Returns:
+        The exit code of the application.
+    """
+    if log is True:  # named after the solver, not the launcher like mpirun
+        name = application_name(cmd) or _command_name(cmd)
+        log = os.path.join(case or os.getcwd(), 'log.{}'.format(name))
+    log_file = open(log, 'wb') if log else None
+    sampler = pumps = None
+    try:
+        proc = await _start_process(cmd, case)
+        try:
+            if monitor_interval:
+                sampler = ResourceSampler(proc.pid, case or os.getcwd(), application_name(cmd),
+                                          monitor_interval).start()
+            pumps = asyncio.gather(_LineStream(stdout_callback, log_file).pump(proc.stdout),
+                                   _LineStream(stderr_callback, log_file).pump(proc.stderr))
+
+            async def communicate():
+                await pumps
+                return await proc.wait()
+
+            exit_code = await asyncio.wait_for(communicate(), timeout)
+        except BaseException:  # timeout, cancellation or an exception raised by a callback or the sampler
+            if pumps:
+                pumps.cancel()
+            await kill_process_group(proc, grace_period)
+            raise
+    finally:
+        if log_file:
+            log_file.close()
+        if sampler:
+            sampler.stop()
+    if check and exit_code:
+        raise subprocess.CalledProcessError(exit_code, cmd)
+    return exit_code
@@ -0,0 +1,258 @@
+# coding=utf-8
+
+from __future__ import print_function, absolute_import
+
+"""Parametric sweep of a case over a grid of builder settings.
+
+A base configuration of BasicBuilder (the keyword arguments of its constructor)
+is varied by a parameter grid; each variant is built into its own case folder
+under the sweep folder and its pipeline of mesh conversion and solver is run in a
+process pool. A total core budget is split between the number of subdomains of
+each case and the number of concurrent cases. Status and wall time of every
+variant are collected into a summary table, saved as `sweep_summary.csv`.
+Like the pipeline, the sweep needs Python 3.7+.
+
+Parameters are dotted paths into the configuration, list items like boundary
+settings are selected by their name; a tuple of paths sets the same value to each:
+
+    sweep = Sweep(base, {'boundarySettings.Inlet.value': [(0, 0, 1), (0, 0, 2)],
+                         'fluidProperties.kinematicViscosity': [1e-6, 1e-5],
+                         ('solverSettings.turbulenceModel', 'turbulenceProperties.name'): ['laminar', 'kEpsilon']},
+                  '/tmp/sweep', mesh_path='pipe.unv', scale=0.001, total_cores=16)
+    rows = sweep.run()
+    print(format_summary(rows))
+"""
+
+import os
+import copy
+import json
+import time
+import asyncio
+import inspect
+import itertools
+import traceback
+import collections
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .BasicBuilder import BasicBuilder
+from .pipeline import Pipeline, SKIPPED
+from .filewriter import write_if_changed
+
+_PARAMS_FILE = 'sweep_params.json'
+_SUMMARY_FILE = 'sweep_summary.csv'
+
+
+def set_parameter(config, path, value):
+    """Set a value in the nested configuration by a dotted path, list items are matched by their `name`."""
+    keys = path.split('.')
+    node = config
+    for key in keys[:-1]:
+        if isinstance(node, list):
+            matched = [item for item in node if item.get('name') == key]
+            if not matched:
+                raise KeyError('no item named {} for parameter {}'.format(key, path))
+            node = matched[0]
+        else:
+            node = node.setdefault(key, {})
+    node[keys[-1]] = value
+
+
+def expand_grid(grid):
+    """List of variants as OrderedDicts of parameter and value.
+
+    Args:
+        grid: Dict of parameter and list of values, expanded as a full factorial product in
+            the order of the dict, or a list of dicts giving each variant explicitly.
+    """
+    if isinstance(grid, (list, tuple)):
+        return [collections.OrderedDict(variant) for variant in grid]
+    names = list(grid)
+    return [collections.OrderedDict(zip(names, values)) for values in itertools.product(*[grid[n] for n in names])]
+
+
+def split_cores(total_cores, num_cases, cores_per_case=None):
+    """Return (cores per case, number of concurrent cases) within the total core budget.
+
+    Without cores_per_case, cases run on one core each as long as there are more cases than cores,
+    otherwise the cores are shared evenly by all cases run at the same time.
+    """
+    total_cores = max(1, total_cores)
+    if not cores_per_case:
+        cores_per_case = max(1, total_cores // max(1, num_cases))
+    cores_per_case = min(cores_per_case, total_cores)
+    return cores_per_case, max(1, min(num_cases, total_cores // cores_per_case))
+
+
+def _default_config(builder_class=BasicBuilder):
+    """Copy of the default keyword arguments of the builder constructor, like getDefaultSolverSettings()."""
+    parameters = inspect.signature(builder_class.__init__).parameters.values()
+    return {p.name: copy.deepcopy(p.default) for p in parameters if p.default is not inspect.Parameter.empty}
+
+
+def _variant_config(base, variant, cores, builder_class=BasicBuilder):
+    # the base and the variant are merged into the full defaults, so that settings
+    # like solverSettings.potentialInit, not given by the base, are still present
+    config = _default_config(builder_class)
+    for key, value in copy.deepcopy(base).items():
+        if isinstance(value, dict) and isinstance(config.get(key), dict):
+            config[key].update(value)
+        else:
+            config[key] = value
+    for names, value in variant.items():
+        for name in (names if isinstance(names, tuple) else (names,)):
+            set_parameter(config, name, copy.deepcopy(value))
+    config['solverSettings']['parallel'] = cores > 1
+    if 'method' not in base.get('paralleSettings', {}):
+        config['paralleSettings']['method'] = 'scotch'  # the default simple needs coefficients for each core count
+    config['paralleSettings']['numberOfSubdomains'] = cores
+    return config
+
+
+def _json_value(value):
+    return value if isinstance(value, (str, int, float, bool, type(None))) else json.dumps(value)
+
+
+def _status(steps):
+    if any(code not in (0, SKIPPED) for code in steps.values()):
+        return 'failed'
+    return 'up to date' if all(code == SKIPPED for code in steps.values()) else 'done'
+
+
+def _run_variant(builder_class, config, case, mesh_path, scale, export_vtk):
+    """Build and run one variant in a worker process, return status, exit codes of steps and wall times."""
+    result = {'case': case, 'status': 'error', 'build_time': None, 'run_time': None, 'steps': None, 'error': None}
+    start = time.time()
+    try:
+        builder = builder_class(case, **config)
+        builder.createCase()
+        pipeline = builder.getPipeline(mesh_path, scale, export_vtk)
+        mesh_steps = [step for step in pipeline.steps.values()
+                      if step.outputs and all(o.startswith('constant/polyMesh') for o in step.outputs)]
+        if mesh_steps:  # boundary conditions are set up on the converted mesh
+            steps = asyncio.run(Pipeline(case, mesh_steps).run())
+            if _status(steps) == 'failed':
+                result.update(status='failed', steps=dict(steps), build_time=time.time() - start)
+                return result
+        builder.build()
+        result['build_time'] = time.time() - start
+        start = time.time()
+        steps = asyncio.run(pipeline.run())
+        result['run_time'] = time.time() - start
+        result['steps'] = dict(steps)
+        result['status'] = _status(steps)
+    except Exception as e:
+        result['error'] = '{}: {}'.format(type(e).__name__, e)
+        print(traceback.format_exc())
+    return result
+
+
+class Sweep(object):
+    """Variants of a case built from one base configuration and run in a process pool.
+
+    Attributes:
+        base: Keyword arguments of the builder constructor, copied for each variant.
+        variants: List of OrderedDicts of parameter and value, see expand_grid().
+        output_path: Folder of the variant cases `variant_000`, `variant_001`, ... and the summary.
+        cores_per_case: Number of subdomains of each case, 1 for a serial run.
+        max_workers: Number of cases run at the same time.
+    """
+
+    def __init__(self, base, grid, output_path, builder_class=BasicBuilder, mesh_path=None, scale=None,
+                 total_cores=None, cores_per_case=None, export_vtk=False):
+        self.base = base
+        self.variants = expand_grid(grid)
+        self.output_path = os.path.abspath(output_path)
+        self.builder_class = builder_class
+        self.mesh_path = os.path.abspath(mesh_path) if mesh_path else None
+        self.scale = scale
+        self.export_vtk = export_vtk
+        self.total_cores = total_cores or multiprocessing.cpu_count()
+        self.cores_per_case, self.max_workers = split_cores(self.total_cores, len(self.variants), cores_per_case)
+
+    def case_path(self, index):
+        return os.path.join(self.output_path, 'variant_{:03d}'.format(index))
+
+    def run(self, callback=None):
+        """Build and run all variants, write the summary and return its rows.
+
+        Args:
+            callback: Function called with each summary row when its variant is finished.
+
+        Returns:
+            List of summary rows in variant order, see summary_row().
+        """
+        if not os.path.isdir(self.output_path):
+            os.makedirs(self.output_path)
+        print("Info: sweep of {} variants, {} cases of {} cores at a time".format(
+            len(self.variants), self.max_workers, self.cores_per_case))
+        rows = [None] * len(self.variants)
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {}
+            for i, variant in enumerate(self.variants):
+                config = _variant_config(self.base, variant, self.cores_per_case, self.builder_class)
+                futures[executor.submit(_run_variant, self.builder_class, config, self.case_path(i),
+                                        self.mesh_path, self.scale, self.export_vtk)] = i
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:  # the worker process died
+                    result = {'case': self.case_path(i), 'status': 'error', 'build_time': None, 'run_time': None,
+                              'steps': None, 'error': '{}: {}'.format(type(e).__name__, e)}
+                rows[i] = self.summary_row(i, result)
+                self._write_params(i)
+                if callback:
+                    callback(rows[i])
+        self.save_summary(rows)
+        return rows
+
+    def summary_row(self, index, result):
+        """Summary row of a variant: case, parameter values, cores, status, failed step, build and run seconds."""
+        row = collections.OrderedDict([('case', os.path.basename(result['case']))])
+        for names, value in self.variants[index].items():
+            row[','.join(names) if isinstance(names, tuple) else names] = _json_value(value)
+        failed = [name for name, code in (result['steps'] or {}).items() if code not in (0, SKIPPED)]
+        row['cores'] = self.cores_per_case
+        row['status'] = result['status']
+        row['failed_step'] = failed[0] if failed else result['error']
+        row['build_time'] = result['build_time']
+        row['run_time'] = result['run_time']
+        return row
+
+    def _write_params(self, index):
+        case = self.case_path(index)
+        if os.path.isdir(case):
+            params = [[list(k) if isinstance(k, tuple) else k, v] for k, v in self.variants[index].items()]
+            content = json.dumps(params, indent=2, default=str)
+            write_if_changed(os.path.join(case, _PARAMS_FILE), lambda f: f.write(content))
+
+    def save_summary(self, rows, filepath=None):
+        """Write the summary rows as CSV, default to `sweep_summary.csv` in the sweep folder."""
+        import csv
+        import io
+        filepath = filepath or os.path.join(self.output_path, _SUMMARY_FILE)
+        text = io.StringIO()
+        writer = csv.writer(text, lineterminator='\n')
+        if rows:
+            writer.writerow(list(rows[0]))
+        for row in rows:
+            writer.writerow(['' if v is None else v for v in row.values()])
+        write_if_changed(filepath, lambda f: f.write(text.getvalue()))
+        return filepath
+
+
+def format_summary(rows):
+    """Format summary rows as a text table with aligned columns."""
+    if not rows:
+        return ''
+
+    def cell(v):
+        if v is None:
+            return '-'
+        return '{:.4g}'.format(v) if isinstance(v, float) else str(v)
+
+    header = list(rows[0])
+    table = [header] + [[cell(row[k]) for k in header] for row in rows]
+    widths = [max(len(r[i]) for r in table) for i in range(len(header))]
+    return '\n'.join('  '.join(c.ljust(w) for c, w in zip(r, widths)).rstrip() for r in table) + '\n'
@@ -0,0 +1,120 @@
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 - Qingfeng Xia <qingfeng.xia iesensor.com>         *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+"""
+benchmark of CppDictParser against parsers of the same input
+usage: python BenchmarkParser.py [size_in_MB ...], default to 1 10
+the dictionary is half nonuniform vector list and half boundary patch dictionaries,
+the whole field is parsed by PyFoam as baseline, if PyFoam is importable, and by CppDictParser
+decoding the list with numpy; the patch dictionaries alone are parsed by the original
+RegexCppDictParser, which can not parse lists, and by CppDictParser
+"""
+
+from __future__ import print_function, absolute_import
+
+import sys
+import os.path
+import timeit
+
+PACKAGE_PARENT = '../..'
+SCRIPT_DIR = os.path.dirname(os.path.realpath(os.path.join(os.getcwd(), os.path.expanduser(__file__))))
+sys.path.append(os.path.normpath(os.path.join(SCRIPT_DIR, PACKAGE_PARENT)))
+
+from FoamCaseBuilder.parser import CppDictParser, RegexCppDictParser
+from FoamCaseBuilder.foamfile import read_nonuniform_list
+
+try:
+    from PyFoam.RunDictionary.ParsedParameterFile import FoamStringParser
+except ImportError:
+    FoamStringParser = None
+
+_header = """/*--------------------------------*- C++ -*----------------------------------*\\
+  =========                 |
+  \\\\      /  F ield         | OpenFOAM: The Open Source CFD Toolbox
+\\*---------------------------------------------------------------------------*/
+"""
+
+_patch = """    patch{}
+    {{
+        type            fixedValue; // initial value
+        value           uniform ({} 0 0);
+    }}
+"""
+
+
+def makeFieldText(size, with_list=True):
+    """make a field dictionary of about `size` bytes, without FoamFile header which PyFoam parses separately"""
+    vector = "(0.00123456 -1.23456e-05 0.987654)\n"
+    n_cells = size // 2 // len(vector)
+    lines = [_header, "dimensions      [0 1 -1 0 0 0 0];\n\n"]
+    if with_list:
+        lines += ["internalField   nonuniform List<vector>\n{}\n(\n".format(n_cells), vector * n_cells, ")\n;\n\n"]
+    lines.append("boundaryField\n{\n")
+    n_patches = size // 2 // len(_patch)
+    lines += [_patch.format(i, i * 0.1) for i in range(n_patches)]
+    lines.append("}\n")
+    return ''.join(lines)
+
+
+def parseWithPyFoam(text):
+    return FoamStringParser(text).getData()
+
+
+def parseWithNumpy(text):
+    return CppDictParser(text, read_nonuniform_list).values
+
+
+def parseWithRegex(text):
+    return RegexCppDictParser(text).values
+
+
+def parseWithTokenizer(text):
+    return CppDictParser(text).values
+
+
+def compare(text, baseline, parser):
+    result = []
+    for parse in (baseline, parser):
+        start = timeit.default_timer()
+        values = parse(text)
+        elapsed = timeit.default_timer() - start
+        result.append(elapsed)
+        print("{:>20}: {:8.1f} MB in {:8.3f} s, {} patches".format(
+              parse.__name__, len(text) / 1048576.0, elapsed, len(values['boundaryField'])))
+    print("speedup: {:.1f}x".format(result[0] / result[1]))
+
+
+def benchmark(size_mb):
+    size = int(size_mb * 1024 * 1024)
+    if FoamStringParser:
+        compare(makeFieldText(size), parseWithPyFoam, parseWithNumpy)
+    else:
+        print("PyFoam is not importable, the field with list is not benchmarked")
+    dict_text = makeFieldText(size, with_list=False)
+    assert parseWithRegex(dict_text) == parseWithTokenizer(dict_text)
+    compare(dict_text, parseWithRegex, parseWithTokenizer)
+
+
+if __name__ == '__main__':
+    sizes = [float(s) for s in sys.argv[1:]] or [1, 10]
+    for s in sizes:
+        benchmark(s)
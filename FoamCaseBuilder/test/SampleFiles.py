@@ -0,0 +1,98 @@
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 - Qingfeng Xia <qingfeng.xia iesensor.com>         *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+"""
+sample OpenFOAM files and logs shared by the tests of FoamCaseBuilder
+"""
+
+field_text = """/*--------------------------------*- C++ -*----------------------------------*\\
+\\*---------------------------------------------------------------------------*/
+FoamFile
+{
+    version     2.0;
+    format      ascii;
+    class       volVectorField;
+    location    "0";
+    object      U;
+}
+// * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * * //
+
+dimensions      [0 1 -1 0 0 0 0];
+
+internalField   uniform (0 0 0);  // initial value
+
+boundaryField
+{
+    #includeEtc "caseDicts/setConstraintTypes"
+    inlet
+    {
+        type            fixedValue;
+        value           uniform (0 0 1);
+    }
+    "(wall|side)"
+    {
+        type            noSlip;
+    }
+    outlet
+    {
+        type            zeroGradient;
+        value           nonuniform List<scalar> 3(1 2 /* comment */ 3);
+    }
+}
+"""
+
+boundary_text = """FoamFile
+{
+    version     2.0;
+    format      ascii;
+    class       polyBoundaryMesh;
+    location    "constant/polyMesh";
+    object      boundary;
+}
+
+2
+(
+    inlet
+    {
+        type            patch;
+        nFaces          50;
+        startFace       10325;
+    }
+    wall
+    {
+        type            wall;
+        inGroups        1(wall);
+        nFaces          40;
+        startFace       10375;
+    }
+)
+"""
+
+log_step = """Time = {t}
+
+smoothSolver:  Solving for Ux, Initial residual = {r}, Final residual = 0.01, No Iterations 3
+GAMG:  Solving for p, Initial residual = {r}, Final residual = 0.001, No Iterations 12
+GAMG:  Solving for p, Initial residual = 0.2, Final residual = 0.001, No Iterations 5
+time step continuity errors : sum local = 1e-05, global = 1e-07, cumulative = 1e-06
+ExecutionTime = {t} s  ClockTime = {t} s
+
+"""
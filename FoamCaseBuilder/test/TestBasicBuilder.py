@@ -0,0 +1,66 @@
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 - Qingfeng Xia <qingfeng.xia iesensor.com>         *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+"""
+test of the restart of BasicBuilder from the latest time, no OpenFOAM installation is needed
+"""
+
+from __future__ import print_function, absolute_import
+
+import io
+import sys
+import os.path
+import contextlib
+import tempfile
+
+PACKAGE_PARENT = '../..'
+SCRIPT_DIR = os.path.dirname(os.path.realpath(os.path.join(os.getcwd(), os.path.expanduser(__file__))))
+sys.path.append(os.path.normpath(os.path.join(SCRIPT_DIR, PACKAGE_PARENT)))
+
+from FoamCaseBuilder.foamfile import FoamFile
+from FoamCaseBuilder.BasicBuilder import BasicBuilder, getDefaultSolverSettings
+
+
+def test_restartOnce():
+    case = tempfile.mkdtemp()
+    for folder in ['0', '10', 'constant', 'system']:
+        os.makedirs(os.path.join(case, folder))
+    with open(os.path.join(case, 'system', 'controlDict'), 'w') as f:
+        f.write('FoamFile\n{\n    format ascii;\n    class dictionary;\n    object controlDict;\n}\n'
+                'application simpleFoam;\nstartFrom startTime;\nstartTime 0;\nstopAt endTime;\nendTime 10;\n')
+    with open(os.path.join(case, 'log.simpleFoam'), 'w') as f:
+        f.write('Time = 10\n')
+    settings = getDefaultSolverSettings()
+    settings['restartFromLatestTime'] = True
+    builder = BasicBuilder(case, settings)
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        builder.createCase()
+        builder.build()  # the restart is set up by createCase() only
+    assert output.getvalue().count('Info: restart simpleFoam from time 10 to endTime 20') == 1
+    assert FoamFile.from_file(os.path.join(case, 'system', 'controlDict')).values['endTime'] == '20'
+    assert os.path.exists(os.path.join(case, 'log.simpleFoam.10'))
+
+
+if __name__ == '__main__':
+    test_restartOnce()
+    print('all tests passed')
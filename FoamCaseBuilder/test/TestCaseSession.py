@@ -0,0 +1,83 @@
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 - Qingfeng Xia <qingfeng.xia iesensor.com>         *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+"""
+test of CaseSession, deferred writes of the field files of a case, no OpenFOAM installation is needed
+"""
+
+from __future__ import print_function, absolute_import
+
+import sys
+import os.path
+import tempfile
+
+PACKAGE_PARENT = '../..'
+SCRIPT_DIR = os.path.dirname(os.path.realpath(os.path.join(os.getcwd(), os.path.expanduser(__file__))))
+sys.path.append(os.path.normpath(os.path.join(SCRIPT_DIR, PACKAGE_PARENT)))
+
+from FoamCaseBuilder.foamfile import ParsedParameterFile
+from FoamCaseBuilder.casesession import CaseSession, openFieldFile
+from SampleFiles import field_text
+
+
+def test_caseSession():
+    case = tempfile.mkdtemp()
+    os.mkdir(os.path.join(case, '0'))
+    fname = os.path.join(case, '0', 'U')
+    with open(fname, 'w') as f:
+        f.write(field_text.replace('uniform (0 0 0);', 'nonuniform List<vector> 2((1 2 3) (4 5 6));'))
+    with CaseSession(case) as session:
+        for patch in ('a', 'b'):
+            f = openFieldFile(fname)
+            f['boundaryField'][patch] = {'type': 'slip'}
+            f.writeFile()
+        assert openFieldFile(fname) is f and session.isDirty(fname)
+        with open(fname) as field_file:
+            assert 'slip' not in field_file.read()  # written on exit
+        shared = ParsedParameterFile(fname)  # reads see the unsaved changes of the session
+        assert 'b' in shared['boundaryField']
+        shared['boundaryField']['c'] = {'type': 'slip'}
+        shared.writeFile()
+    assert session.written == [os.path.realpath(fname)]
+    assert list(openFieldFile(fname)['boundaryField'])[-3:] == ['a', 'b', 'c']
+    # the mapping of the replaced file is released, the field is mapped again from the new file
+    assert f['internalField'].load().tolist() == [[1, 2, 3], [4, 5, 6]]
+    f.save()
+    assert f.save() is None  # saved from the new mapping
+    del f['boundaryField']['c']
+    f.writeFile()  # saved right away outside a session
+    assert 'c' not in openFieldFile(fname)['boundaryField']
+
+    try:
+        with CaseSession(case):
+            f = openFieldFile(fname)
+            f['boundaryField']['d'] = {'type': 'slip'}
+            f.writeFile()
+            raise RuntimeError()
+    except RuntimeError:
+        pass
+    assert 'd' not in openFieldFile(fname)['boundaryField']
+
+
+if __name__ == '__main__':
+    test_caseSession()
+    print('all tests passed')
@@ -0,0 +1,72 @@
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 - Qingfeng Xia <qingfeng.xia iesensor.com>         *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+"""
+test of the cached OpenFOAM settings of config.py, no OpenFOAM installation is needed
+"""
+
+from __future__ import print_function, absolute_import
+
+import sys
+import os.path
+import tempfile
+
+PACKAGE_PARENT = '../..'
+SCRIPT_DIR = os.path.dirname(os.path.realpath(os.path.join(os.getcwd(), os.path.expanduser(__file__))))
+sys.path.append(os.path.normpath(os.path.join(SCRIPT_DIR, PACKAGE_PARENT)))
+
+from FoamCaseBuilder import config
+
+
+def test_foamSettingsCache():
+    saved_settings = dict(config._FOAM_SETTINGS)
+    saved_env = dict((var, os.environ.get(var)) for var in ('XDG_CACHE_HOME', 'WM_PROJECT_VERSION'))
+    detect_dir, detect_version = config._detectFoamDir, config._detectFoamVersion
+    calls = []
+    config._detectFoamDir = lambda: calls.append('detect') or '/opt/openfoam9'  # instead of running bash
+    config._detectFoamVersion = lambda bashrc='~/.bashrc': (9, 0)
+    os.environ['XDG_CACHE_HOME'] = tempfile.mkdtemp()
+    try:
+        config._FOAM_SETTINGS.clear()  # nothing is detected at import
+        assert config.getFoamDir() == '/opt/openfoam9' and config.getFoamVersion() == (9, 0) and len(calls) == 1
+        config._FOAM_SETTINGS.clear()  # as in a new process: loaded from the disk cache
+        assert config.getFoamVersion() == (9, 0) and config.getFoamVariant() == 'OpenFOAM' and len(calls) == 1
+        config._FOAM_SETTINGS.clear()
+        os.environ['WM_PROJECT_VERSION'] = 'v2012'  # another OpenFOAM is sourced: the cache is stale
+        assert config.getFoamDir() == '/opt/openfoam9' and len(calls) == 2
+        config.setFoamVersion((8, 0))
+        assert config.getFoamVersion() == (8, 0) and config.refreshFoamSettings()['FOAM_VERSION'] == (9, 0)
+        assert len(calls) == 3
+    finally:
+        config._detectFoamDir, config._detectFoamVersion = detect_dir, detect_version
+        for var, value in saved_env.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+        config._FOAM_SETTINGS.clear()
+        config._FOAM_SETTINGS.update(saved_settings)
+
+
+if __name__ == '__main__':
+    test_foamSettingsCache()
+    print('all tests passed')
@@ -0,0 +1,78 @@
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 - Qingfeng Xia <qingfeng.xia iesensor.com>         *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+"""
+test of ConvergenceWatcher, no OpenFOAM installation is needed
+"""
+
+from __future__ import print_function, absolute_import
+
+import sys
+import os.path
+import tempfile
+
+PACKAGE_PARENT = '../..'
+SCRIPT_DIR = os.path.dirname(os.path.realpath(os.path.join(os.getcwd(), os.path.expanduser(__file__))))
+sys.path.append(os.path.normpath(os.path.join(SCRIPT_DIR, PACKAGE_PARENT)))
+
+from FoamCaseBuilder.convergence import ConvergenceWatcher, Monitor
+
+
+def test_convergenceWatcher():
+    case = tempfile.mkdtemp()
+    os.makedirs(os.path.join(case, 'system'))
+    with open(os.path.join(case, 'system', 'controlDict'), 'w') as f:
+        f.write('application     simpleFoam;\nstopAt          endTime;\nendTime         5000;\nrunTimeModifiable true;\n')
+    step = 'Time = {0}\n\nGAMG:  Solving for p, Initial residual = {1}, Final residual = 1e-09, No Iterations 9\n' \
+           'Cd = {2}\nExecutionTime = 0.1 s  ClockTime = 0 s\n\n'
+    watcher = ConvergenceWatcher(case, plateau_window=50)
+    for i in range(1, 200):  # converging by one decade per 100 steps
+        assert watcher.feed(step.format(i, 10 ** (-i / 100.0), 1)) is None
+    for i in range(200, 400):  # plateau
+        if watcher.feed(step.format(i, 0.01, 1)):
+            break
+    assert watcher.status['p'] == 'plateau' and i < 300
+    assert watcher.steps == i and len(watcher.residuals_history['p']) == 100  # only the judged windows are kept
+    with open(os.path.join(case, 'system', 'controlDict')) as f:
+        assert 'stopAt          writeNow;' in f.read()
+    assert watcher.restore() and not watcher.restore()  # after the solver has exited
+    with open(os.path.join(case, 'system', 'controlDict')) as f:
+        assert 'stopAt          endTime;' in f.read()
+
+    # watch() restores stopAt itself once the solver writes End to its log
+    with open(os.path.join(case, 'log.simpleFoam'), 'w') as f:
+        f.write(''.join(step.format(i, 0.01, 1) for i in range(1, 200)) + 'End\n')
+    watcher = ConvergenceWatcher(case, plateau_window=50, log=os.path.join(case, 'log.simpleFoam'))
+    assert watcher.watch(poll_interval=0).startswith('residuals stalled') and watcher.finished
+    with open(os.path.join(case, 'system', 'controlDict')) as f:
+        assert 'stopAt          endTime;' in f.read()
+
+    watcher = ConvergenceWatcher(case, residuals=False, stop=False, monitors=[Monitor('Cd', r'^Cd = (\S+)', 20, 1e-3)])
+    for i in range(1, 400):
+        if watcher.feed(step.format(i, 1, 0.3 + 1.0 / i)):
+            break
+    assert watcher.stop_reason.startswith('monitors converged') and 50 < i < 400
+
+
+if __name__ == '__main__':
+    test_convergenceWatcher()
+    print('all tests passed')
@@ -0,0 +1,87 @@
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 - Qingfeng Xia <qingfeng.xia iesensor.com>         *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+"""
+test of the process wide cache of parsed dictionaries, no OpenFOAM installation is needed
+"""
+
+from __future__ import print_function, absolute_import
+
+import sys
+import os.path
+import tempfile
+
+PACKAGE_PARENT = '../..'
+SCRIPT_DIR = os.path.dirname(os.path.realpath(os.path.join(os.getcwd(), os.path.expanduser(__file__))))
+sys.path.append(os.path.normpath(os.path.join(SCRIPT_DIR, PACKAGE_PARENT)))
+
+import numpy
+
+from FoamCaseBuilder.foamfile import FoamFile
+from FoamCaseBuilder.dictcache import ParsedDictCache, parsed_dict_cache, writable, estimate_size
+from SampleFiles import field_text
+
+
+def test_dictCache():
+    case = tempfile.mkdtemp()
+    os.mkdir(os.path.join(case, '0'))
+    fname = os.path.join(case, '0', 'U')
+    with open(fname, 'w') as f:
+        f.write(field_text)
+    parsed_dict_cache.clear()
+    f = FoamFile.from_file(fname)
+    f.values['boundaryField']['inlet']['type'] = 'slip'  # a copy is returned
+    assert FoamFile.from_file(fname).values['boundaryField']['inlet']['type'] == 'fixedValue'
+    stats = parsed_dict_cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1
+    f.save(case)  # drop on write
+    assert FoamFile.from_file(fname).values['boundaryField']['inlet']['type'] == 'slip'
+    assert parsed_dict_cache.stats()['misses'] == 2
+
+    # arrays are shared read only views, not copied on every hit
+    fname = os.path.join(case, '0', 'T')
+    with open(fname, 'w') as f:
+        f.write(field_text.replace('uniform (0 0 0);', 'nonuniform List<scalar> 4(1 2 3 4);'))
+    first, second = FoamFile.from_file(fname).values, FoamFile.from_file(fname).values
+    field = first['internalField']
+    assert numpy.shares_memory(field, second['internalField']) and not field.flags.writeable
+    try:
+        field[0] = 5.0
+        assert False, 'a cached array must not be modified in place'
+    except ValueError:
+        pass
+    field = writable(field)
+    field[0] = 5.0
+    assert second['internalField'][0] == 1.0 and writable(field) is field
+    assert estimate_size(numpy.frombuffer(b'\0' * 800)) == 800  # views of a mmap count too
+
+    cache = ParsedDictCache(max_bytes=10000)
+    for i in range(3):
+        cache.get(fname, lambda p: 'x' * 4000, tag=i)
+    assert cache.stats()['entries'] == 2 and cache.evictions == 1
+    cache.get(fname, lambda p: 'x' * 4000, tag=0)
+    assert cache.misses == 4
+
+
+if __name__ == '__main__':
+    test_dictCache()
+    print('all tests passed')
@@ -0,0 +1,62 @@
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 - Qingfeng Xia <qingfeng.xia iesensor.com>         *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+"""
+test of downsampling of plotted series, no OpenFOAM installation is needed
+"""
+
+from __future__ import print_function, absolute_import
+
+import sys
+import os.path
+
+PACKAGE_PARENT = '../..'
+SCRIPT_DIR = os.path.dirname(os.path.realpath(os.path.join(os.getcwd(), os.path.expanduser(__file__))))
+sys.path.append(os.path.normpath(os.path.join(SCRIPT_DIR, PACKAGE_PARENT)))
+
+import numpy
+
+from FoamCaseBuilder.downsample import lttb, MinMaxDecimator
+
+
+def test_downsample():
+    x = numpy.arange(100000.0)
+    y = numpy.exp(-x / 20000.0)
+    y[54321] = 5.0  # a spike must survive downsampling
+    lx, ly = lttb(x, y, 1000)
+    assert len(lx) == 1000 and lx[0] == 0 and lx[-1] == x[-1] and 54321 in lx
+    decimator = MinMaxDecimator(1000)
+    for i in range(0, len(x), 777):  # added in chunks as a running solver does
+        decimator.extend(x[i:i + 777], y[i:i + 777])
+    px, py = decimator.points()
+    assert len(px) <= 1000 and decimator.count == len(x) and (numpy.diff(px) >= 0).all()
+    assert py.max() == 5.0 and py.min() == y.min()
+    decimator = MinMaxDecimator(10)
+    x = numpy.arange(101.0)
+    decimator.extend(x, numpy.sin(x))
+    px, py = decimator.points()
+    assert len(px) <= 10 and (px[0], py[0]) == (0.0, 0.0) and (px[-1], py[-1]) == (100.0, numpy.sin(100.0))
+
+
+if __name__ == '__main__':
+    test_downsample()
+    print('all tests passed')
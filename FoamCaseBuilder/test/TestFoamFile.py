@@ -0,0 +1,198 @@
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 - Qingfeng Xia <qingfeng.xia iesensor.com>         *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+"""
+test of FoamFile, LazyFieldFile and the nonuniform list and binary readers and writers, no OpenFOAM installation is needed
+"""
+
+from __future__ import print_function, absolute_import
+
+import sys
+import gzip
+import os.path
+import tempfile
+
+PACKAGE_PARENT = '../..'
+SCRIPT_DIR = os.path.dirname(os.path.realpath(os.path.join(os.getcwd(), os.path.expanduser(__file__))))
+sys.path.append(os.path.normpath(os.path.join(SCRIPT_DIR, PACKAGE_PARENT)))
+
+import numpy
+
+from FoamCaseBuilder.parser import CppDictParser
+from FoamCaseBuilder.foamfile import read_nonuniform_list, LazyFieldFile, LazyInternalField, FoamFile
+from FoamCaseBuilder.binaryfile import BinaryFoamFile
+from FoamCaseBuilder.casesession import CaseSession, openFieldFile
+from FoamCaseBuilder.filewriter import write_report
+from FoamCaseBuilder.utility import listVarablesInFolder
+from SampleFiles import field_text
+
+
+def test_nonuniformList():
+    text = """internalField nonuniform List<vector>
+3
+(
+(1 2 3)
+(4 5 6)
+(7 8 -9e-3)
+)
+;
+boundaryField
+{
+    inlet { type fixedValue; value nonuniform List<scalar> 2(0.5 1); }
+    outlet { type fixedValue; value nonuniform List<vector> 0(); }
+}
+"""
+    d = CppDictParser(text, read_nonuniform_list).values
+    U = d['internalField']
+    assert isinstance(U, numpy.ndarray) and U.dtype == numpy.float64 and U.shape == (3, 3)
+    assert U[2, 2] == -9e-3
+    assert d['boundaryField']['inlet']['value'].tolist() == [0.5, 1.0]
+    assert d['boundaryField']['outlet']['value'].shape == (0, 3)
+    # left to the parser: other tokens than numbers, or a count not matching the payload
+    assert read_nonuniform_list('scalar', 2, '1 // one\n2)', 0) is None
+    assert read_nonuniform_list('scalar', 3, '1 2)', 0) is None
+
+
+def _binaryHeader(cls, name, arch):
+    return ('FoamFile\n{\n    version 2.0;\n    format binary;\n    arch "%s";\n'
+            '    class %s;\n    object %s;\n}\n\n' % (arch, cls, name)).encode('ascii')
+
+
+def test_binaryFile():
+    case = tempfile.mkdtemp()
+    U = numpy.arange(12, dtype='<f8').reshape(4, 3)
+    fname = os.path.join(case, 'U')
+    with open(fname, 'wb') as f:
+        f.write(_binaryHeader('volVectorField', 'U', 'LSB;label=32;scalar=64'))
+        f.write(b'dimensions [0 1 -1 0 0 0 0];\ninternalField nonuniform List<vector> 4(')
+        f.write(U.tobytes() + b');\nboundaryField\n{\n    inlet { type fixedValue; value uniform (0 0 1); }\n}\n')
+    d = BinaryFoamFile(fname).read_field()
+    assert (d['internalField'] == U).all() and not d['internalField'].flags['OWNDATA']
+    assert d['boundaryField']['inlet']['value'] == 'uniform (0 0 1)'
+
+    owner = numpy.arange(5, dtype='>i8')
+    fname = os.path.join(case, 'owner')
+    with open(fname, 'wb') as f:
+        f.write(_binaryHeader('labelList', 'owner', 'MSB;label=64;scalar=64'))
+        f.write(b'5\n(' + owner.tobytes() + b')\n')
+    data, end = BinaryFoamFile(fname).read_list()
+    assert data.dtype == numpy.dtype('>i8') and data.tolist() == owner.tolist()
+
+
+def test_lazyFieldFile():
+    case = tempfile.mkdtemp()
+    os.mkdir(os.path.join(case, '0'))
+    fname = os.path.join(case, '0', 'U')
+    payload = 'internalField   nonuniform List<vector>\n3\n(\n(1 2 3)\n(4 5 6)\n(7 8 9)\n)\n;'
+    with open(fname, 'w') as f:
+        f.write(field_text.replace('internalField   uniform (0 0 0);', payload))
+    f = LazyFieldFile(fname)
+    assert isinstance(f['internalField'], LazyInternalField)
+    assert f['dimensions'] == '[0 1 -1 0 0 0 0]'
+    f['boundaryField']['wall'] = {'type': 'slip', 'Prt': 0.85}
+    f.writeFile()
+    with open(fname) as rf:
+        text = rf.read()
+    assert payload in text and 'class       volVectorField;' in text
+    f = LazyFieldFile(fname)
+    assert f['boundaryField']['wall'] == {'type': 'slip', 'Prt': '0.85'}
+    assert f['internalField'].load().tolist() == [[1, 2, 3], [4, 5, 6], [7, 8, 9]]
+
+    f['internalField'] = 'uniform (0 0 1)'
+    f.writeFile()
+    assert LazyFieldFile(fname)['internalField'].load() == 'uniform (0 0 1)'
+
+
+def test_writeFoamFile():
+    case = tempfile.mkdtemp()
+    os.mkdir(os.path.join(case, '0'))
+    values = CppDictParser(field_text).values
+    del values['FoamFile']
+    values['internalField'] = numpy.arange(6.0).reshape(2, 3) / 3
+    values['boundaryField']['inlet']['flag'] = True
+    values['boundaryField']['inlet']['name'] = '"a@b"'
+    for file_format in ('ascii', 'binary'):
+        FoamFile('U', 'volVectorField', '0', file_format, values=values).save(case)
+        f = FoamFile.from_file(os.path.join(case, '0', 'U'))
+        assert f.format == file_format
+        assert (f.values['internalField'] == values['internalField']).all()
+        assert f.values['boundaryField']['inlet']['flag'] == 'true'
+        assert f.values['boundaryField']['inlet']['name'] == '"a@b"'
+        assert f.values['boundaryField']['#includeEtc'] == '"caseDicts/setConstraintTypes"'
+        assert f.values['boundaryField']['outlet']['value'].tolist() == [1, 2, 3]
+
+
+def test_skipUnchangedFile():
+    case = tempfile.mkdtemp()
+    os.mkdir(os.path.join(case, '0'))
+    fname = os.path.join(case, '0', 'U')
+    with open(fname, 'w') as f:
+        f.write(field_text)
+    write_report.clear(case)
+    f = FoamFile.from_file(fname)
+    assert f.save(case) == fname
+    mtime = os.stat(fname).st_mtime
+    assert f.save(case) is None and os.stat(fname).st_mtime == mtime
+    for i in range(2):  # LazyFieldFile keeps the original header, written only once
+        with CaseSession(case) as session:
+            openFieldFile(fname).writeFile()
+    assert session.skipped == [os.path.realpath(fname)] and not session.written
+    assert write_report.report(case) == {'written': [], 'skipped': [os.path.realpath(fname)]}
+    assert not [n for n in os.listdir(os.path.join(case, '0')) if n != 'U']  # no temporary file left
+
+
+def test_gzipFile():
+    case = tempfile.mkdtemp()
+    os.mkdir(os.path.join(case, '0'))
+    fname = os.path.join(case, '0', 'U')
+    with gzip.open(fname + '.gz', 'wt') as f:
+        f.write(field_text)
+    assert CppDictParser.from_file(fname).values == CppDictParser(field_text).values
+    f = FoamFile.from_file(fname)
+    assert f.name == 'U' and f.values['boundaryField']['inlet']['type'] == 'fixedValue'
+    assert listVarablesInFolder(case) == ['U']
+
+    with CaseSession(case):
+        lf = openFieldFile(fname)
+        assert lf.name == 'U' and lf.filepath == fname + '.gz'
+        lf['boundaryField']['inlet'] = {'type': 'zeroGradient'}
+        lf.writeFile()
+    assert os.listdir(os.path.join(case, '0')) == ['U.gz']
+    assert LazyFieldFile(fname)['boundaryField']['inlet']['type'] == 'zeroGradient'
+
+    with open(fname + '.gz', 'rb') as gz:
+        data = gz.read()
+    assert f.save(case, compress=True) == fname + '.gz'
+    assert f.save(case, compress=True) is None  # unchanged content is not rewritten
+    with open(fname + '.gz', 'rb') as gz:
+        assert gz.read() != data
+    assert f.save(case) == fname and os.listdir(os.path.join(case, '0')) == ['U']
+
+
+if __name__ == '__main__':
+    test_nonuniformList()
+    test_binaryFile()
+    test_lazyFieldFile()
+    test_writeFoamFile()
+    test_skipUnchangedFile()
+    test_gzipFile()
+    print('all tests passed')
@@ -0,0 +1,76 @@
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 - Qingfeng Xia <qingfeng.xia iesensor.com>         *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+"""
+test of the local job queue and its worker, no OpenFOAM installation is needed
+"""
+
+from __future__ import print_function, absolute_import
+
+import sys
+import time
+import os.path
+import signal
+import tempfile
+import subprocess
+
+PACKAGE_PARENT = '../..'
+SCRIPT_DIR = os.path.dirname(os.path.realpath(os.path.join(os.getcwd(), os.path.expanduser(__file__))))
+sys.path.append(os.path.normpath(os.path.join(SCRIPT_DIR, PACKAGE_PARENT)))
+
+from FoamCaseBuilder.jobqueue import JobQueue, JobWorker
+
+
+def test_jobQueue():
+    folder = tempfile.mkdtemp()
+    queue = JobQueue(os.path.join(folder, 'jobs.sqlite'))
+    first = queue.submit(folder, cores=2)
+    urgent = queue.submit(folder, cores=1, priority=5)
+    too_large = queue.submit(folder, cores=64, priority=9)
+    assert [job.id for job in queue.jobs(['queued'])] == [too_large, urgent, first]
+    assert queue.cancel(first) and not queue.cancel(first)
+    queue.set_state(urgent, 'running', pid=os.getpid())
+    assert queue.used_cores() == 1
+    JobWorker(queue, max_cores=4).schedule()  # more cores than the limit, never started
+    assert queue.job(too_large).state == 'failed' and queue.job(first).state == 'cancelled'
+
+    # the child of a cancelled job is reaped and its exit file removed
+    worker = JobWorker(queue, max_cores=4)
+    job = queue.job(queue.submit(folder))
+    child = subprocess.Popen(['sleep', '30'], start_new_session=True)
+    worker._children[job.id] = child
+    queue.set_state(job.id, 'running', pid=child.pid)
+    with open(os.path.join(folder, '.job{}.exit'.format(job.id)), 'w') as f:
+        f.write('143\n')
+    assert queue.cancel(job.id)
+    for _ in range(50):
+        worker.reap()
+        if not worker._children:
+            break
+        time.sleep(0.1)
+    assert child.returncode == -signal.SIGTERM and not os.path.exists(os.path.join(folder, '.job{}.exit'.format(job.id)))
+    queue.close()
+
+
+if __name__ == '__main__':
+    test_jobQueue()
+    print('all tests passed')
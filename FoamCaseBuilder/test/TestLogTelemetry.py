@@ -0,0 +1,109 @@
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 - Qingfeng Xia <qingfeng.xia iesensor.com>         *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+"""
+test of LogTelemetry and the profile report of solver logs, no OpenFOAM installation is needed
+"""
+
+from __future__ import print_function, absolute_import
+
+import sys
+import json
+import os.path
+import tempfile
+
+PACKAGE_PARENT = '../..'
+SCRIPT_DIR = os.path.dirname(os.path.realpath(os.path.join(os.getcwd(), os.path.expanduser(__file__))))
+sys.path.append(os.path.normpath(os.path.join(SCRIPT_DIR, PACKAGE_PARENT)))
+
+import numpy
+
+from FoamCaseBuilder.logtelemetry import LogTelemetry, load_telemetry
+from FoamCaseBuilder.logreport import profile_log, save_report
+from SampleFiles import log_step
+
+_pimple_log = """Courant Number mean: 0 max: 0
+deltaT = 0.001
+Time = 0.001
+
+Courant Number mean: 0.1 max: 0.5
+DILUPBiCG:  Solving for Ux, Initial residual = 1, Final residual = 0.01, No Iterations 3
+GAMG:  Solving for p, Initial residual = 1, Final residual = 0.001, No Iterations 12
+time step continuity errors : sum local = 1e-05, global = 1e-07, cumulative = 1e-06
+GAMG:  Solving for p, Initial residual = 0.2, Final residual = 0.0001, No Iterations 5
+time step continuity errors : sum local = 2e-05, global = 2e-07, cumulative = 2e-06
+ExecutionTime = 0.5 s  ClockTime = 1 s
+
+Courant Number mean: 0.2 max: 0.6
+deltaT = 0.002
+Time = 0.003
+
+PCG:  Solving for p, Initial residual = 0.5, Final residual = 0.001, No Iterations 20
+ExecutionTime = 0.75 s  ClockTime = 1 s
+"""
+
+
+def test_logTelemetry():
+    fname = os.path.join(tempfile.mkdtemp(), 'log.pimpleFoam')
+    with open(fname, 'w') as f:
+        f.write(_pimple_log)
+    telemetry = LogTelemetry(fname)
+    columns = load_telemetry(telemetry.save())
+    assert columns['time'].tolist() == [0.001, 0.003] and columns['deltaT'].tolist() == [0.001, 0.002]
+    assert columns['courant_max'].tolist() == [0.5, 0.6] and columns['execution_time'].tolist() == [0.5, 0.75]
+    assert columns['continuity_local'][0] == 2e-05 and numpy.isnan(columns['continuity_local'][1])
+    assert columns['initial/p'].tolist() == [1, 0.5] and columns['final/p'].tolist() == [0.0001, 0.001]
+    assert columns['iterations/p'].tolist() == [17, 20] and columns['iterations/Ux'].tolist() == [3, 0]
+    assert columns['solver_iterations/GAMG'].tolist() == [17, 0] and list(columns['solvers']) == ['DILUPBiCG', 'GAMG', 'PCG']
+    assert len(columns['solves_step']) == 4
+
+    fed = LogTelemetry()
+    for i in range(0, len(_pimple_log), 7):  # chunks of process output
+        fed.feed(_pimple_log[i:i + 7])
+    assert fed.columns()['iterations/p'].tolist() == [17, 20]
+
+
+def test_profileReport():
+    fname = os.path.join(tempfile.mkdtemp(), 'log.simpleFoam')
+    execution_time = 0.0
+    with open(fname, 'w') as f:
+        for i in range(1, 61):
+            execution_time += 2.0 if i == 45 else 0.1  # step 45 is stalled
+            f.write(log_step.replace('ExecutionTime = {t} s', 'ExecutionTime = {e} s')
+                    .format(t=i, r=1.0 / i, e=round(execution_time, 6)))
+    report = profile_log(fname, window=10)
+    assert report['steps'] == 60 and report['linear_iterations'] == 60 * 20
+    assert [f['field'] for f in report['fields']] == ['p', 'Ux'] and report['fields'][0]['iterations'] == 60 * 17
+    assert report['solvers'] == {'smoothSolver': 180, 'GAMG': 1020}
+    assert report['stalls']['count'] == 1 and report['stalls']['events'][0]['time'] == 45
+    assert not report['stalls']['stalled'] and not report['trend']['slowdown']
+    json_path, text_path = save_report(report, fname + '.profile')
+    with open(json_path) as f:
+        assert json.load(f)['steps'] == 60
+    with open(text_path) as f:
+        assert '1 stalled steps' in f.read()
+
+
+if __name__ == '__main__':
+    test_logTelemetry()
+    test_profileReport()
+    print('all tests passed')
@@ -0,0 +1,57 @@
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 - Qingfeng Xia <qingfeng.xia iesensor.com>         *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+"""
+test of OutputBuffer of the solver output, no OpenFOAM installation is needed
+"""
+
+from __future__ import print_function, absolute_import
+
+import io
+import sys
+import os.path
+
+PACKAGE_PARENT = '../..'
+SCRIPT_DIR = os.path.dirname(os.path.realpath(os.path.join(os.getcwd(), os.path.expanduser(__file__))))
+sys.path.append(os.path.normpath(os.path.join(SCRIPT_DIR, PACKAGE_PARENT)))
+
+from FoamCaseBuilder.outputbuffer import OutputBuffer
+
+
+def test_outputBuffer():
+    log = io.BytesIO()
+    buffer = OutputBuffer(capacity=10, echo_lines=5, log=log)
+    buffer.feed(b'Time = 1\nCourant')
+    assert buffer.take() == ('Time = 1\n', 'Time = 1\n')  # incomplete line waits
+    buffer.feed(''.join('line {}\n'.format(i) for i in range(100)))
+    text, echo = buffer.take()
+    assert text.startswith('Courantline 0\n') and text.count('\n') == 100
+    assert echo.startswith('... 95 lines not shown') and echo.endswith('line 95\nline 96\nline 97\nline 98\nline 99\n')
+    buffer.feed(b'End')
+    buffer.flush()
+    assert len(buffer.lines) == 10 and buffer.recent(2) == 'line 99\nEnd' and buffer.total_lines == 102
+    assert log.getvalue().count(b'\n') == 101 and buffer.total_bytes == len(log.getvalue())
+
+
+if __name__ == '__main__':
+    test_outputBuffer()
+    print('all tests passed')
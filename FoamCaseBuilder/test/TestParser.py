@@ -0,0 +1,148 @@
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 - Qingfeng Xia <qingfeng.xia iesensor.com>         *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+"""
+test of CppDictParser, ResidualParser and LogIndex of parser.py, no OpenFOAM installation is needed
+"""
+
+from __future__ import print_function, absolute_import
+
+import sys
+import os.path
+import tempfile
+
+PACKAGE_PARENT = '../..'
+SCRIPT_DIR = os.path.dirname(os.path.realpath(os.path.join(os.getcwd(), os.path.expanduser(__file__))))
+sys.path.append(os.path.normpath(os.path.join(SCRIPT_DIR, PACKAGE_PARENT)))
+
+import numpy
+
+from FoamCaseBuilder.parser import CppDictParser, ResidualParser, LogIndex
+from SampleFiles import field_text, boundary_text, log_step
+
+
+def test_parseField():
+    d = CppDictParser(field_text).values
+    assert d['FoamFile']['class'] == 'volVectorField'
+    assert d['dimensions'] == '[0 1 -1 0 0 0 0]'
+    assert d['internalField'] == 'uniform (0 0 0)'
+    bf = d['boundaryField']
+    assert bf['#includeEtc'] == '"caseDicts/setConstraintTypes"'
+    assert bf['inlet'] == {'type': 'fixedValue', 'value': 'uniform (0 0 1)'}
+    assert bf['"(wall|side)"']['type'] == 'noSlip'
+    assert bf['outlet']['value'] == 'nonuniform List<scalar> 3(1 2 3)'
+
+
+def test_parseKeywordWithBracket():
+    d = CppDictParser("divSchemes { default none; div(phi,U) bounded Gauss upwind; }").values
+    assert d['divSchemes']['div(phi,U)'] == 'bounded Gauss upwind'
+    d = CppDictParser('laplacianSchemes { laplacian((1|A(U)),p) Gauss linear; }').values
+    assert d['laplacianSchemes']['laplacian((1|A(U)),p)'] == 'Gauss linear'
+
+
+def test_parseCommentBeforeEntry():
+    # a `//` comment must not be taken as a key when the next entry is not a simple one
+    d = CppDictParser('a { b 1; // c\n div(phi,e) y; }').values
+    assert d['a'] == {'b': '1', 'div(phi,e)': 'y'}
+    assert CppDictParser('b 1; // c\n"p.*" 2;').values == {'b': '1', '"p.*"': '2'}
+    assert CppDictParser('b 1; // c\n#include "x"\nd 3;').values == {'b': '1', '#include': '"x"', 'd': '3'}
+    assert CppDictParser('b 1; // c d;').values == {'b': '1'}
+    assert CppDictParser('b 1;\n// maxCo 1;\n').values == {'b': '1'}
+
+
+def test_parseBoundary():
+    d = CppDictParser(boundary_text).values
+    assert list(d.keys()) == ['FoamFile', 'inlet', 'wall']
+    assert d['wall']['inGroups'] == '1(wall)'
+    assert d['inlet']['nFaces'] == '50'
+
+
+def test_parseUnbalancedBracket():
+    for text in ("a { b 1;", "a { b 1; }}", "a (1 2;"):
+        try:
+            CppDictParser(text)
+        except ValueError:
+            continue
+        raise AssertionError('unbalanced bracket is not detected: ' + text)
+
+
+def test_residualParser():
+    fname = os.path.join(tempfile.mkdtemp(), 'log.simpleFoam')
+    with open(fname, 'w') as f:
+        f.write(''.join(log_step.format(t=i, r=1.0 / i) for i in range(1, 4)))
+        f.write('Time = 4\n\nGAMG:  Solving for p, Initial')  # being written by the solver
+    parser = ResidualParser(fname)
+    assert parser.times.tolist() == [1, 2, 3, 4] and parser.quantities == ['Ux', 'p']
+    assert numpy.allclose(parser.get_residuals('p', (2, 3)), [0.5, 1.0 / 3])
+    assert parser.get_series('p')['iterations'].tolist() == [12, 5] * 3
+    offset = parser.offset
+    with open(fname, 'a') as f:
+        f.write(' residual = 0.3, Final residual = 0.001, No Iterations 2\n')
+    assert parser.parse() == 0 and parser.offset > offset
+    assert parser.get_residuals('p')[-1] == 0.3 and numpy.isnan(parser.get_residuals('Ux')[-1])
+    assert parser.residuals[4.0] == {'p': 0.3}
+
+    fed = ResidualParser(None, parse=False, index=False)  # solver output read from a pipe
+    with open(fname, 'rb') as f:
+        text = f.read()
+    for i in range(0, len(text), 7):
+        fed.feed(text[i:i + 7])
+    assert fed.times.tolist() == parser.times.tolist() and fed.quantities == parser.quantities
+    assert numpy.allclose(fed.get_series('p')['initial'], parser.get_series('p')['initial'])
+
+
+def test_logIndex():
+    fname = os.path.join(tempfile.mkdtemp(), 'log.pimpleFoam')
+    with open(fname, 'w') as f:
+        f.write(''.join(log_step.format(t=i, r=1.0 / i) for i in range(1, 101)))
+    ResidualParser(fname)  # index is written while parsing
+    index = LogIndex(fname)
+    assert list(index.times) == list(range(1, 101)) and index.covered == os.path.getsize(fname)
+    window = ResidualParser(fname, parse=False).parse_window(20, 22)
+    assert window.times.tolist() == [20, 21, 22]
+    assert numpy.allclose(window.get_residuals('Ux'), [1.0 / 20, 1.0 / 21, 1.0 / 22])
+
+    with open(fname, 'w') as f:  # overwritten by a new run, the old index is ignored
+        f.write(log_step.format(t=5, r=1))
+    assert not len(LogIndex(fname).times)
+    assert ResidualParser(fname).parse_window(0, 10).times.tolist() == [5]
+
+    # a short log overwritten by a longer run: the stale index file is replaced, not appended to
+    with open(fname, 'w') as f:
+        f.write(''.join(log_step.format(t=i, r=1.0 / i) for i in range(1, 6)))
+    ResidualParser(fname)
+    with open(fname, 'w') as f:
+        f.write(''.join(log_step.format(t=i, r=2.0 / i) for i in range(1, 11)))
+    ResidualParser(fname)
+    assert list(LogIndex(fname).times) == list(range(1, 11))
+    assert ResidualParser(fname, parse=False).parse_window(3, 4).times.tolist() == [3, 4]
+
+
+if __name__ == '__main__':
+    test_parseField()
+    test_parseKeywordWithBracket()
+    test_parseCommentBeforeEntry()
+    test_parseBoundary()
+    test_parseUnbalancedBracket()
+    test_residualParser()
+    test_logIndex()
+    print('all tests passed')
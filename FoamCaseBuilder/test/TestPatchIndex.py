@@ -0,0 +1,77 @@
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 - Qingfeng Xia <qingfeng.xia iesensor.com>         *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+"""
+test of PatchIndex of constant/polyMesh/boundary, no OpenFOAM installation is needed
+"""
+
+from __future__ import print_function, absolute_import
+
+import sys
+import os.path
+import tempfile
+import threading
+
+PACKAGE_PARENT = '../..'
+SCRIPT_DIR = os.path.dirname(os.path.realpath(os.path.join(os.getcwd(), os.path.expanduser(__file__))))
+sys.path.append(os.path.normpath(os.path.join(SCRIPT_DIR, PACKAGE_PARENT)))
+
+from FoamCaseBuilder.patchindex import PatchIndex
+from SampleFiles import boundary_text
+
+
+def test_patchIndex():
+    case = tempfile.mkdtemp()
+    os.makedirs(os.path.join(case, 'constant', 'polyMesh'))
+    fname = os.path.join(case, 'constant', 'polyMesh', 'boundary')
+    with open(fname, 'w') as f:
+        f.write(boundary_text)
+    index = PatchIndex.from_case(case)
+    assert index.names == ['inlet', 'wall'] and index.types == ['patch', 'wall']
+    assert index.nFaces.tolist() == [50, 40] and index.startFace[index.row('wall')] == 10375
+    assert index.inGroups == [(), ('wall',)]
+    assert PatchIndex.from_case(case) is index  # cached until the file is changed
+
+    index.setTypes({'inlet': 'symmetryPlane', 'wall': 'patch'})
+    index.setType('inlet', 'wall')
+    with open(fname) as f:
+        text = f.read()
+    assert text == boundary_text.replace('patch;', 'wall;', 1).replace('type            wall;\n        inGroups',
+                                                                          'type            patch;\n        inGroups')
+    assert PatchIndex.from_case(case) is index and PatchIndex(fname).types == ['wall', 'patch']
+
+    # the shared index is re-read when the file is changed by others, even to the same size
+    with open(fname, 'w') as f:
+        f.write(text.replace('type            wall;', 'type            cyc1;'))
+    assert PatchIndex.from_case(case).types == ['cyc1', 'patch']
+    threads = [threading.Thread(target=index.setTypes, args=({name: t},))
+               for name, t in [('inlet', 'symmetryPlane'), ('wall', 'wall')] * 4]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert PatchIndex(fname).types == index.types == ['symmetryPlane', 'wall']
+
+
+if __name__ == '__main__':
+    test_patchIndex()
+    print('all tests passed')
@@ -0,0 +1,76 @@
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 - Qingfeng Xia <qingfeng.xia iesensor.com>         *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+"""
+test of the case pipeline, needs Python 3.7+, no OpenFOAM installation is needed
+"""
+
+from __future__ import print_function, absolute_import
+
+import sys
+import os.path
+import shutil
+import tempfile
+
+PACKAGE_PARENT = '../..'
+SCRIPT_DIR = os.path.dirname(os.path.realpath(os.path.join(os.getcwd(), os.path.expanduser(__file__))))
+sys.path.append(os.path.normpath(os.path.join(SCRIPT_DIR, PACKAGE_PARENT)))
+
+from FoamCaseBuilder.pipeline import case_pipeline
+
+
+def test_pipelineDependencies():
+    case = tempfile.mkdtemp()
+    pipeline = case_pipeline(case, 'simpleFoam', mesh_file='mesh.unv', scale=0.001, init_potential=True,
+                             run_parallel=True, num_proc=4, export_vtk=True)
+    assert list(pipeline.steps) == ['ideasUnvToFoam', 'transformPoints', 'potentialFoam', 'decomposePar',
+                                    'simpleFoam', 'reconstructPar', 'foamToVTK']
+    assert pipeline.dependencies('transformPoints') == ['ideasUnvToFoam']
+    assert 'decomposePar' in pipeline.dependencies('simpleFoam')
+    assert 'reconstructPar' in pipeline.dependencies('foamToVTK')
+    assert not pipeline.is_up_to_date('potentialFoam')  # never run
+    assert "transformPoints -scale '(0.001 0.001 0.001)' 2>&1 | tee log.transformPoints" \
+        in pipeline.allrun_script()
+
+
+def test_pipelineResultsRemoved():
+    case = tempfile.mkdtemp()
+    for folder in ['0', 'constant', 'system', 'processor0/0', 'processor0/constant']:
+        os.makedirs(os.path.join(case, folder))
+    pipeline = case_pipeline(case, 'simpleFoam', run_parallel=True, num_proc=2, reconstruct=True)
+    for name in ['simpleFoam', 'reconstructPar']:
+        pipeline._keys[name] = pipeline.input_key(name)  # as after a successful run
+    # only the initial conditions: the results are missing
+    assert not pipeline.is_up_to_date('simpleFoam') and not pipeline.is_up_to_date('reconstructPar')
+    for folder in ['processor0/0.5', '0.5']:
+        os.makedirs(os.path.join(case, folder))
+    pipeline._keys['reconstructPar'] = pipeline.input_key('reconstructPar')
+    assert pipeline.is_up_to_date('simpleFoam') and pipeline.is_up_to_date('reconstructPar')
+    for folder in ['processor0/0.5', '0.5']:
+        shutil.rmtree(os.path.join(case, folder))
+    assert not pipeline.is_up_to_date('simpleFoam') and not pipeline.is_up_to_date('reconstructPar')
+
+
+if __name__ == '__main__':
+    test_pipelineDependencies()
+    test_pipelineResultsRemoved()
+    print('all tests passed')
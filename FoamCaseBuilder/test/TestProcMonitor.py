@@ -0,0 +1,60 @@
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 - Qingfeng Xia <qingfeng.xia iesensor.com>         *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+"""
+test of sampling of CPU, memory and I/O of the solver ranks, no OpenFOAM installation is needed
+"""
+
+from __future__ import print_function, absolute_import
+
+import sys
+import os.path
+
+PACKAGE_PARENT = '../..'
+SCRIPT_DIR = os.path.dirname(os.path.realpath(os.path.join(os.getcwd(), os.path.expanduser(__file__))))
+sys.path.append(os.path.normpath(os.path.join(SCRIPT_DIR, PACKAGE_PARENT)))
+
+import numpy
+
+from FoamCaseBuilder.procmonitor import ResourceSampler, resource_summary, application_name, is_supported, read_name
+
+
+def test_resourceSampler():
+    assert application_name('mpirun -np 4 simpleFoam -parallel') == 'simpleFoam'
+    assert application_name(['bash', '-c', 'pimpleFoam -case .']) == 'pimpleFoam'
+    assert application_name("bash -c 'simpleFoam -parallel'") == 'simpleFoam'
+    columns = {'time': numpy.array([0.0, 0.0, 1.0, 1.0]), 'rank': numpy.array([0, 1, 0, 1]),
+               'pid': numpy.array([10, 11, 10, 11]), 'cpu_percent': numpy.array([numpy.nan, numpy.nan, 100.0, 50.0]),
+               'rss': numpy.array([100, 300, 100, 300]), 'read_bytes': numpy.zeros(4, dtype=int),
+               'write_bytes': numpy.array([0, 0, 10, 30])}
+    summary = resource_summary(columns)
+    assert summary['cpu_imbalance'] == 100.0 / 75.0 and summary['rss_imbalance'] == 1.5
+    assert summary['slowest_rank'] == 1 and summary['largest_rank'] == 1 and summary['ranks'][1]['write_bytes'] == 30
+    if is_supported():  # this Python process as a serial solver
+        sampler = ResourceSampler(os.getpid(), solver=read_name(os.getpid()))
+        assert sampler.sample() == 1 and sampler.sample() == 1
+        assert sampler.summary()['ranks'][0]['rss_max'] > 0
+
+
+if __name__ == '__main__':
+    test_resourceSampler()
+    print('all tests passed')
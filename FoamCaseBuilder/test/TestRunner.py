@@ -0,0 +1,92 @@
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 - Qingfeng Xia <qingfeng.xia iesensor.com>         *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+"""
+test of the asyncio runner, needs Python 3.7+, no OpenFOAM installation is needed
+"""
+
+from __future__ import print_function, absolute_import
+
+import sys
+import time
+import os.path
+import asyncio
+import tempfile
+import subprocess
+
+PACKAGE_PARENT = '../..'
+SCRIPT_DIR = os.path.dirname(os.path.realpath(os.path.join(os.getcwd(), os.path.expanduser(__file__))))
+sys.path.append(os.path.normpath(os.path.join(SCRIPT_DIR, PACKAGE_PARENT)))
+
+from FoamCaseBuilder import runner, utility
+from FoamCaseBuilder.procmonitor import is_supported, read_stat
+
+
+def test_runFoamApplication():
+    case = tempfile.mkdtemp()
+    get_environment = utility.getFoamEnvironment
+    utility.getFoamEnvironment = lambda: dict(os.environ)  # no OpenFOAM needed to run bash
+    try:
+        assert utility.makeFoamCommand('simpleFoam -parallel', case) == \
+            (['simpleFoam', '-parallel'], dict(os.environ, PWD=case), case)
+        assert utility.makeFoamCommand('ls | wc', case)[0] == ['bash', '-c', 'ls | wc']
+        lines, errors = [], []
+        exit_code = asyncio.run(runner.run_foam_application("bash -c 'echo one; echo two >&2; printf three'", case,
+                                                            stdout_callback=lines.append,
+                                                            stderr_callback=errors.append))
+        assert exit_code == 0 and lines == ['one\n', 'three'] and errors == ['two\n']
+        with open(os.path.join(case, 'log.echo'), 'rb') as f:  # stdout and stderr are teed to the log
+            log = f.read()
+        assert len(log) == 13 and all(line in log for line in [b'one\n', b'two\n', b'three'])
+
+        try:
+            asyncio.run(runner.run_foam_application("bash -c 'exit 3'", case, log=False, check=True))
+            assert False, 'a nonzero exit code must raise with check=True'
+        except subprocess.CalledProcessError as e:
+            assert e.returncode == 3
+        assert asyncio.run(runner.run_foam_application("bash -c 'exit 3'", case, log=False)) == 3
+
+        # the whole process group is terminated on timeout, also the background child of bash
+        start = time.time()
+        try:
+            asyncio.run(runner.run_foam_application("bash -c 'sleep 30 & echo $! > sleep.pid; wait'", case,
+                                                    timeout=1, grace_period=1))
+            assert False, 'the timeout must raise'
+        except asyncio.TimeoutError:
+            pass
+        assert time.time() - start < 10
+        if is_supported():
+            with open(os.path.join(case, 'sleep.pid')) as f:
+                pid = int(f.read())
+            for _ in range(50):  # the orphan is reaped by init
+                stat = read_stat(pid)
+                if stat is None or stat[1] == 'Z':
+                    break
+                time.sleep(0.1)
+            assert stat is None or stat[1] == 'Z'
+    finally:
+        utility.getFoamEnvironment = get_environment
+
+
+if __name__ == '__main__':
+    test_runFoamApplication()
+    print('all tests passed')
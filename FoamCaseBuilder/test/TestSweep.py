@@ -0,0 +1,63 @@
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 - Qingfeng Xia <qingfeng.xia iesensor.com>         *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+"""
+test of the parametric sweep, needs Python 3.7+, no OpenFOAM installation is needed
+"""
+
+from __future__ import print_function, absolute_import
+
+import sys
+import os.path
+
+PACKAGE_PARENT = '../..'
+SCRIPT_DIR = os.path.dirname(os.path.realpath(os.path.join(os.getcwd(), os.path.expanduser(__file__))))
+sys.path.append(os.path.normpath(os.path.join(SCRIPT_DIR, PACKAGE_PARENT)))
+
+from FoamCaseBuilder.sweep import expand_grid, split_cores, set_parameter, _variant_config
+from FoamCaseBuilder.BasicBuilder import getDefaultSolverSettings
+
+
+def test_sweepGrid():
+    variants = expand_grid({'fluidProperties.kinematicViscosity': [1e-6, 1e-5],
+                            ('solverSettings.turbulenceModel', 'turbulenceProperties.name'): ['laminar', 'kEpsilon']})
+    assert len(variants) == 4 and variants[1]['fluidProperties.kinematicViscosity'] == 1e-6
+    config = {'boundarySettings': [{'name': 'Inlet', 'value': 0}, {'name': 'Outlet', 'value': 0}]}
+    set_parameter(config, 'boundarySettings.Outlet.value', 5)
+    set_parameter(config, 'fluidProperties.kinematicViscosity', 1e-6)
+    assert config['boundarySettings'][1]['value'] == 5 and config['fluidProperties'] == {'kinematicViscosity': 1e-6}
+    assert split_cores(16, 100) == (1, 16)  # more cases than cores: serial runs
+    assert split_cores(16, 4) == (4, 4)
+    assert split_cores(16, 3, cores_per_case=4) == (4, 3)
+
+    # a partial base is merged into the full defaults of the builder
+    config = _variant_config({'fluidProperties': {'kinematicViscosity': 1e-6}},
+                             {'solverSettings.turbulenceModel': 'kEpsilon'}, 4)
+    assert config['solverSettings'] == dict(getDefaultSolverSettings(), turbulenceModel='kEpsilon', parallel=True)
+    assert config['paralleSettings'] == {'method': 'scotch', 'numberOfSubdomains': 4}
+    assert config['fluidProperties']['name'] == 'water' and config['fluidProperties']['kinematicViscosity'] == 1e-6
+    assert _variant_config({}, {}, 1)['solverSettings'] == getDefaultSolverSettings()  # defaults are not changed
+
+
+if __name__ == '__main__':
+    test_sweepGrid()
+    print('all tests passed')
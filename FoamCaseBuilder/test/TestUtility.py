@@ -0,0 +1,66 @@
+# ***************************************************************************
+# *                                                                         *
+# *   Copyright (c) 2016 - Qingfeng Xia <qingfeng.xia iesensor.com>         *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Library General Public License for more details.                  *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+"""
+test of command splitting and time folder listing of utility.py, no OpenFOAM installation is needed
+"""
+
+from __future__ import print_function, absolute_import
+
+import sys
+import os.path
+import tempfile
+
+PACKAGE_PARENT = '../..'
+SCRIPT_DIR = os.path.dirname(os.path.realpath(os.path.join(os.getcwd(), os.path.expanduser(__file__))))
+sys.path.append(os.path.normpath(os.path.join(SCRIPT_DIR, PACKAGE_PARENT)))
+
+from FoamCaseBuilder.utility import splitFoamCommand, _parseEnvironment
+from FoamCaseBuilder.utility import listTimeSteps, getLatestTime
+
+
+def test_foamCommandSplit():
+    assert splitFoamCommand(['transformPoints', '-scale', '"(0.001 0.001 0.001)"']) == \
+        ['transformPoints', '-scale', '(0.001 0.001 0.001)']
+    assert splitFoamCommand("ideasUnvToFoam 'my mesh.unv'") == ['ideasUnvToFoam', 'my mesh.unv']
+    # shell syntax outside of quotes is left to bash
+    for cmd in ['echo $WM_PROJECT_USER_DIR', 'decomposePar > log', 'a && b', 'rm -r processor*']:
+        assert splitFoamCommand(cmd) is None
+    env = _parseEnvironment(b'WM_PROJECT_DIR=/opt/openfoam\0FOO=a=b\nc\0_=/usr/bin/env\0SHLVL=2\0')
+    assert env == {'WM_PROJECT_DIR': '/opt/openfoam', 'FOO': 'a=b\nc'}
+
+
+def test_latestTime():
+    case = tempfile.mkdtemp()
+    for folder in ['0', 'constant', 'processor0/0', 'processor0/constant']:
+        os.makedirs(os.path.join(case, folder))
+    assert listTimeSteps(case) == [0.0] and getLatestTime(case) is None  # nothing to restart from
+    os.makedirs(os.path.join(case, 'processor0', '0.25'))  # interrupted parallel run
+    assert listTimeSteps(case) == [0.0, 0.25] and getLatestTime(case) == '0.25'
+    os.makedirs(os.path.join(case, '1'))  # reconstructed
+    assert getLatestTime(case) == '1'
+
+
+if __name__ == '__main__':
+    test_foamCommandSplit()
+    test_latestTime()
+    print('all tests passed')
@@ -30,6 +30,8 @@ Foamfile is read and write by PyFoam or butterfly
 
 from __future__ import print_function, absolute_import
 
+import re
+import shlex
 import numbers
 import os
 import sys
@@ -77,6 +79,13 @@ else:  # using adapted version from butterfly: <https://github.com/ladybug-tools
     # adapt from butterfly github project: ParsedParameterFile, BoundaryDict (not yet working)
     #raise NotImplementedError("drop in replacement of PyFoam is not implemented")
 
+# field files are opened lazily by both backends, internalField is not parsed to edit boundaryField
+from .foamfile import LazyFieldFile
+from .casesession import CaseSession, openFieldFile
+from .filewriter import write_if_changed, write_report
+from .patchindex import PatchIndex
+from .casesteps import case_steps
+
 from .config import *
 from .FoamTemplateString import *
 
@@ -242,12 +251,32 @@ def getTurbulenceVariables(solverSettings):
 #########################################################################
 
 def createRawFoamFile(case, location, dictname, lines, classname = 'dictionary'):
+    """ the file is not written (mtime unchanged) if the content is identical, return True if written
+    """
     fname = case + os.path.sep + location +os.path.sep + dictname
     if os.path.exists(fname):
         if _debug: print("Warning: overwrite createRawFoamFile if dict file exists  {}".format(fname))
-    with open(fname, 'w+') as f:
+    if os.path.exists(fname + '.gz'):  # compressed by `writeCompression on` or compressFieldFiles()
+        os.remove(fname + '.gz')
+    def write(f):
         f.write(getFoamFileHeader(location, dictname, classname))
         f.writelines(lines)
+    return write_if_changed(fname, write)
+
+def compressFieldFiles(case, time='0'):
+    """ gzip field files in the time folder into `name.gz` and remove the uncompressed ones,
+    OpenFOAM reads them as if written with `writeCompression on`. Unchanged .gz are not rewritten.
+    """
+    timeFolder = case + os.path.sep + time
+    for name in sorted(os.listdir(timeFolder)):
+        fname = timeFolder + os.path.sep + name
+        if name.endswith('.gz') or name.startswith('.') or not os.path.isfile(fname):
+            continue
+        def write(f):
+            with open(fname, 'rb') as src:
+                shutil.copyfileobj(src, f, 1 << 20)
+        write_if_changed(fname + '.gz', write)
+        os.remove(fname)
 
 def createCaseFromScratch(output_path, solver_name):
     if os.path.isdir(output_path):
@@ -340,67 +369,22 @@ def cleanCase(output_path):
 
 
 ###############################################################
-def createRunScript(case_path, init_potential, run_parallel, solver_name, num_proc):
+def createRunScript(case_path, init_potential, run_parallel, solver_name, num_proc, restart=False):
+    """ write the Allrun bash script of the case steps, see casesteps.case_steps()
+    with python 3.7+ the same steps can be run from python, skipping unchanged steps, see pipeline.case_pipeline()
+    restart: continue the solver from the existing results, without initialisation and decomposition
+    """
     print("Create Allrun script, assume this script will be run with pwd = case folder ")
-    print(" run this script with makeRunCommand(), which will do sourcing (without login shell) and cd to case folder")
-
-    fname = case_path + os.path.sep + "Allrun"
-    meshOrg_dir =  "constant/polyMesh.org"
-    mesh_dir =  "constant/polyMesh"
 
     solver_log_file =  case_path + os.path.sep + 'log.'+solver_name
-    if os.path.exists(solver_log_file):
+    if os.path.exists(solver_log_file) and not restart:
         if _debug: print("Warning: there is a solver log exit, will be deleted to avoid error")
-        shutil.remove(solver_log_file)
-    if os.path.exists(fname):
-        if _debug: print("Warning: Overwrite existing Allrun script ")
-    with open(fname, 'w+') as f:
-        f.write("#!/bin/bash \n\n")
-        # NOTE: Although RunFunctions seem to be sourced, the functions `getApplication`
-        # and `getNumberOfProcessors` are not available. solver_name and num_proc do not have
-        # to be passed if they can be read using these bash functions
-        #f.write("# Source tutorial run functions \n")
-        #f.write(". $WM_PROJECT_DIR/bin/tools/RunFunctions \n\n")
-
-        if getFoamRuntime() != 'BlueCFD':
-            f.write("source {}/etc/bashrc\n".format(getFoamDir()))  # WSL, not working for blueCFD,
-        #QProcess has trouble to run, "source {}/etc/bashrc"
-        #source command is only supported by bash
-
-        '''
-        #WSL has trouble in ln -s
-        f.write("# Create symbolic links to polyMesh.org \n")
-        f.write("mkdir {} \n".format(mesh_dir))
-        f.write("ln -s {}/boundary {}/boundary \n".format(meshOrg_dir, mesh_dir))
-        f.write("ln -s {}/faces {}/faces \n".format(meshOrg_dir, mesh_dir))
-        f.write("ln -s {}/neighbour {}/neighbour \n".format(meshOrg_dir, mesh_dir))
-        f.write("ln -s {}/owner {}/owner \n".format(meshOrg_dir, mesh_dir))
-        f.write("ln -s {}/points {}/points \n".format(meshOrg_dir, mesh_dir))
-        f.write("\n")
-        '''
-        # BashWSL, cygwin, docker, run this script in case folder, if this script is run in case folder, no need to provide case path
-        case = '.'
-        if (init_potential):
-            f.write ("# Initialise flow \n")
-            f.write ("potentialFoam -case "+case+" 2>&1 | tee "+case+"/log.potentialFoam \n\n")
-
-        if (run_parallel):
-            f.write ("# Run application in parallel \n")
-            f.write ("decomposePar 2>&1 | tee log.decomposePar \n")
-            f.write ("mpirun -np {} {} -parallel -case {} 2>&1 | tee {}/log.{} \n\n".format(str(num_proc), solver_name, case, case,solver_name))
-        else:
-            f.write ("# Run application \n")
-            f.write ("{} -case {} 2>&1 | tee {}/log.{} \n\n".format(solver_name,case,case,solver_name))
-
-        #pyFoamPlot.py
-
-    # on windows linux subsystem, script must use unix line ending:  dos2unix
-    if getFoamRuntime() == 'BashWSL':
-        out = runFoamCommand("dos2unix Allrun", case_path)
-    try:  # Update Allrun permission, it will fail on windows
-        out = runFoamCommand("chmod a+x Allrun", case_path)
-    except:
-        pass  # on windows file system it is default executable to WSL user by default
+        os.remove(solver_log_file)
+    steps = case_steps(case_path, solver_name, init_potential=init_potential,
+                       run_parallel=run_parallel, num_proc=num_proc, restart=restart)
+    # written with unix line ending also on windows, and made executable if the file system supports it
+    steps.write_allrun()
+    return steps
 
 
 def makeRunCommand(cmd, case_path, source_env=True):
@@ -447,11 +431,104 @@ def makeRunCommand(cmd, case_path, source_env=True):
         return cmdline
 
 
+######################## OpenFOAM environment snapshot ########################
+_FOAM_ENVIRONMENT = {}  # (bashrc, mtime) -> environment dict after sourcing bashrc
+# variables of the capturing shell, not of the OpenFOAM environment
+_SHELL_ONLY_VARS = ('_', 'SHLVL', 'PWD', 'OLDPWD')
+# pipes, redirections, command lists, variables and globs, outside of quotes, need a shell
+_shell_syntax = re.compile(r'[|&;<>(){}$`*?~\[\]]')
+_quoted_text = re.compile(r'"[^"]*"|\'[^\']*\'')
+
+
+def _parseEnvironment(output):
+    """ parse the null separated `NAME=value` output of `env -0` into a dict
+    """
+    env = {}
+    for entry in output.split(b'\0'):
+        name, sep, value = entry.partition(b'=')
+        if sep and name:
+            env[name.decode('utf-8', 'replace')] = value.decode('utf-8', 'replace')
+    for name in _SHELL_ONLY_VARS:
+        env.pop(name, None)
+    return env
+
+
+def getFoamEnvironment(refresh=False):
+    """ environment variables of OpenFOAM, as after `source <foam_dir>/etc/bashrc`
+    bashrc is sourced once and `env -0` is captured, the snapshot is cached in memory until bashrc is modified
+    if this process is started in the same OpenFOAM environment, a copy of os.environ is returned without sourcing
+    return None if the runtime is not Posix or bashrc is not found, commands should then be run by makeRunCommand()
+    """
+    if getFoamRuntime() != "Posix":
+        return None
+    installation_path = getFoamDir()
+    bashrc = os.path.join(installation_path, "etc", "bashrc") if installation_path else None
+    if not bashrc or not os.path.exists(bashrc):
+        return None
+    key = (bashrc, os.path.getmtime(bashrc))
+    if refresh or key not in _FOAM_ENVIRONMENT:
+        if os.environ.get('WM_PROJECT_DIR') and \
+                os.path.realpath(os.environ['WM_PROJECT_DIR']) == os.path.realpath(installation_path):
+            env = dict(os.environ)  # environment pre-loaded before starting this process
+        else:
+            # bashrc is passed as $0 to avoid quoting, its output and exit status are not of interest
+            output = subprocess.check_output(['bash', '-c', 'source "$0" > /dev/null 2>&1; env -0', bashrc])
+            env = _parseEnvironment(output)
+        _FOAM_ENVIRONMENT.clear()
+        _FOAM_ENVIRONMENT[key] = env
+    return _FOAM_ENVIRONMENT[key]
+
+
+def splitFoamCommand(cmd):
+    """ split a command line into an argument list to run without a shell, quotes are removed
+    return None if the command uses shell syntax like pipes, redirection, variables or globs
+    """
+    if isinstance(cmd, (list, tuple)):
+        cmd = ' '.join(cmd)
+    if _shell_syntax.search(_quoted_text.sub('', cmd)):
+        return None
+    try:
+        args = shlex.split(cmd)
+    except ValueError:  # unbalanced quotes, leave the error message to the shell
+        return None
+    return args if args else None
+
+
+def makeFoamCommand(cmd, case=None):
+    """ return (argument list, environment variables, working dir) to start a command in the OpenFOAM environment
+    the command is launched directly with the environment snapshot of getFoamEnvironment() and the case
+    as working directory, by `bash -c` without sourcing only if it needs shell syntax
+    return None if there is no snapshot, e.g. on Windows, the command should then be run by makeRunCommand()
+    """
+    env = getFoamEnvironment()
+    if env is None:
+        return None
+    if case and not os.path.exists(case):
+        raise IOError('case path: `{}` does not exist'.format(case))
+    cwd = os.path.abspath(case) if case else os.getcwd()
+    args = splitFoamCommand(cmd)
+    if args is None:
+        args = ['bash', '-c', ' '.join(cmd) if isinstance(cmd, (list, tuple)) else cmd]
+    return args, dict(env, PWD=cwd), cwd
+
+
+def startFoamProcess(cmd, case=None, **kwargs):
+    """ start a command in the OpenFOAM environment and return the subprocess.Popen object
+    On Posix, the command is launched as assembled by makeFoamCommand(),
+    otherwise, e.g. on Windows, the shell command line of makeRunCommand() is used.
+    kwargs are passed to subprocess.Popen, like stdout and stderr
+    """
+    command = makeFoamCommand(cmd, case)
+    if command is None:
+        return subprocess.Popen(makeRunCommand(cmd, case), shell=True, **kwargs)
+    args, env, cwd = command
+    return subprocess.Popen(args, env=env, cwd=cwd, **kwargs)
+
+
 ###################### used by CFD module, not by CfdFOAM ######################
 def runFoamCommand(cmd, case=None):
     # python subprocess,  designed for simple Foam utilty command
-    # only work with `shell = True` option to source bashrc file
-    proc = subprocess.Popen(makeRunCommand(cmd, case), stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell = True)  #
+    proc = startFoamProcess(cmd, case, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
     (output, error) = proc.communicate()
     if error: print(error)
     return output
@@ -459,7 +536,7 @@ def runFoamCommand(cmd, case=None):
 
 def runFoamApplication(cmd, case=None):
     """ Run OpenFOAM application and automatically generate the log.application file.
-        Returns a CfdConsoleProcess object after launching
+        Returns the output of the application
         cmd  - List or string with the application being the first entry followed by the options.
               e.g. ['transformPoints', '-scale', '"(0.001 0.001 0.001)"']
         case - Case path
@@ -474,6 +551,20 @@ def runFoamApplication(cmd, case=None):
     app = cmds[0].rsplit('/', 1)[-1]
     logFile = "log.{}".format(app)
 
+    if getFoamEnvironment() is not None:
+        # Pipe to log file and terminal in python, stderr is merged into stdout
+        print("Running ", ' '.join(cmds))
+        proc = startFoamProcess(cmds, case, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        output = []
+        with open(os.path.join(case or os.getcwd(), logFile), 'wb') as log:
+            for line in iter(proc.stdout.readline, b''):
+                log.write(line)
+                output.append(line)
+                print(line.decode('utf-8', 'replace'), end='')
+        proc.stdout.close()
+        proc.wait()
+        return b''.join(output)
+
     cmdline = ' '.join(cmds)  # Space to separate options
     # Pipe to log file and terminal
     cmdline += " 1> >(tee -a " + logFile + ") 2> >(tee -a " + logFile + " >&2)"
@@ -546,17 +637,17 @@ def getVariableBoundaryCondition(case, variable, boundary_name):
     return pf["boundaryField"][boundary_name]
 
 def listBoundaryNames(case):
-    return BoundaryDict(case).patches()
+    return list(PatchIndex.from_case(case).names)
 
 def changeBoundaryType(case, bc_name, bc_type):
     """ change boundary named `bc_name` to `bc_type` in boundary dict file
+    only the type value is replaced in the file, other patches are not rewritten
     """
-    f = BoundaryDict(case)
-    if bc_name in f.patches():
-        f[bc_name]['type'] = bc_type
+    index = PatchIndex.from_case(case)
+    if bc_name in index:
+        index.setType(bc_name, bc_type)
     else:
         print("boundary `{}` not found, so boundary type is not changed".format(bc_name))
-    f.writeFile()
 
 def getPatchType(bcType, bcSubType):
     """ Get the boundary type based on selected BC condition """
@@ -587,7 +678,9 @@ def listVarablesInFolder(path):
         import glob
         l = glob.glob(initFolder + os.path.sep + "*")
         #(_, _, filenames) = os.walk(initFolder)
-        return [os.path.split(f)[-1] for f in l]
+        names = [os.path.split(f)[-1] for f in l]
+        names = [n[:-3] if n.endswith('.gz') else n for n in names]  # writeCompression on
+        return sorted(set(names), key=names.index)
     else:
         print("Warning: {} is not an existent case path".format(initFolder))
         return []
@@ -609,11 +702,44 @@ def listRegions(case):
     """
     raise NotImplementedError()
 
+def _timeFolders(folder):
+    """ sorted (float time, folder name) of the time folders in folder
+    """
+    times = []
+    if os.path.isdir(folder):
+        for name in os.listdir(folder):
+            try:
+                t = float(name)
+            except ValueError:
+                continue
+            if os.path.isdir(folder + os.path.sep + name):
+                times.append((t, name))
+    return sorted(times)
+
+def _listTimeFolders(case):
+    """ time folders of the case, or of processor0 if the decomposed case has later times,
+    as a parallel run writes into processor folders until reconstructPar
+    """
+    times = _timeFolders(case)
+    parallel_times = _timeFolders(case + os.path.sep + 'processor0')
+    if parallel_times and (not times or parallel_times[-1][0] > times[-1][0]):
+        return parallel_times
+    return times
+
 def listTimeSteps(case):
     """
     return a list of float time for tranisent simulation or iteration for steady case
     """
-    raise NotImplementedError()
+    return [t for t, name in _listTimeFolders(case)]
+
+def getLatestTime(case):
+    """ name of the latest time folder written by the solver, None if there is no time after the initial time
+    """
+    times = _listTimeFolders(case)
+    initial = min(_timeFolders(case)[:1] + _timeFolders(case + os.path.sep + 'processor0')[:1] or [None])
+    if times and times[-1][0] > initial[0]:
+        return times[-1][1]
+    return None
 
 def plotSolverProgress(case):
     """GNUplot to plot convergence progress of simulation
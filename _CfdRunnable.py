@@ -54,3 +54,6 @@ class _CfdRunnable(object):
 
     def check_prerequisites(self):
         return ""
+
+    def solve_finished(self, exit_code):
+        pass  # called after the external solver process is finished
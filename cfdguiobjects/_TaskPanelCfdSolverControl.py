@@ -37,6 +37,7 @@ import subprocess
 
 import FreeCAD
 import CfdTools
+from FoamCaseBuilder.outputbuffer import OutputBuffer
 
 if FreeCAD.GuiUp:
     import FreeCADGui
@@ -71,6 +72,7 @@ class _TaskPanelCfdSolverControl:
         #
         #======================================================================================================
         self.solver_run_process = QtCore.QProcess()
+        self.solver_output = OutputBuffer(capacity=200)  # latest lines shown when finished, Allrun writes the logs
 
         QtCore.QObject.connect(self.solver_run_process, QtCore.SIGNAL("started()"), self.solverProcessStarted)
         #QtCore.QObject.connect(self.solver_run_process, QtCore.SIGNAL("stateChanged(QProcess::ProcessState)"), self.solverProcessStateChanged)
@@ -191,10 +193,12 @@ class _TaskPanelCfdSolverControl:
 
 
     def runSolverProcess(self):
-        # Re-starting a simulation from the last time step has currently been de-actived by using an AllRun script.
+        # Re-starting a simulation from the last time step: set RestartFromLatestTime of the solver object and
+        # write the case, Allrun then continues the solver without initialisation and decomposition
         # re-setting the residuals is NOT needed for plotting
 
         self.Start = time.time()
+        self.solver_output.clear()
         #self.femConsoleMessage("Run {} at {} with command:".format(self.solver_object.SolverName, self.solver_object.WorkingDir))
         cmd = self.solver_runner.get_solver_cmd()
 
@@ -254,26 +258,31 @@ class _TaskPanelCfdSolverControl:
         self.form.pb_run_solver.setText("Re-run Solver")
         self.form.pb_run_solver.setEnabled(True)
         self.form.pb_terminate_solver.setEnabled(False)
+        try:  # post-processing of the run must not leave the panel unusable
+            self.solver_runner.solve_finished(exitCode)
+        except Exception as e:
+            FreeCAD.Console.PrintWarning("Post-processing of the solver run failed: {}\n".format(e))
 
     def plotResiduals(self):
-        text = str(self.solver_run_process.readAllStandardOutput())
-        self.solver_runner.process_output(text)
+        self.solver_output.feed(self.solver_run_process.readAllStandardOutput().data())
+        text = self.solver_output.take()[0]  # complete lines only
+        if text:
+            self.solver_runner.process_output(text)
 
         #NOTE: print the output from the solver to the console via the following line
         #FreeCAD.Console.PrintMessage(text)
 
-    def printSolverProcessStdout(self):
-        # this method should be deprecated, since plot will process the data
-        out = self.SolverProcess.readAllStandardOutput()
-        if out.isEmpty():  # since output has been extract to plot, it can be empty
+    def printSolverProcessStdout(self, lines=40):
+        # only the tail of the output is shown, the full output is in the solver log files
+        self.solver_output.flush()
+        out = self.solver_output.recent(lines)
+        if not out:
             self.femConsoleMessage("Solver stdout is empty", "#0000FF")
         else:
-            try:
-                out = str(out)  # python3 has no unicode type, utf-8 is the default encoding, this is a portable way to deal with bytes
-                # solver specific error detection code has been deleted here
-                self.femConsoleMessage(out = '<br>'.join([s for s in out.splitlines() if s]))
-            except UnicodeDecodeError:
-                self.femConsoleMessage("Error converting stdout from Solver", "#FF0000")
+            skipped = self.solver_output.total_lines - len(out.splitlines())
+            if skipped > 0:
+                self.femConsoleMessage("... {} lines of solver stdout not shown, see the log files".format(skipped))
+            self.femConsoleMessage('<br>'.join([s for s in out.splitlines() if s]))
 
     def showResult(self):
         self.femConsoleMessage("Loading result into FreeCAD is disabled for bugs...", "#FFFF00")
@@ -88,4 +88,18 @@ class CfdSolverFoam(CfdSolver.CfdSolver):
             obj.addProperty("App::PropertyEnumeration", "CaseCreationMode", "Solver",
                             "use this property with `TemplateCasePath` property to control how case is created")
             obj.CaseCreationMode = list(["fromScratch", "fromTutorial", "fromExisting"])
-            obj.CaseCreationMode = "fromScratch"
\ No newline at end of file
+            obj.CaseCreationMode = "fromScratch"
+
+        if "RestartFromLatestTime" not in obj.PropertiesList:
+            obj.addProperty("App::PropertyBool", "RestartFromLatestTime", "Solver",
+                    "Keep the case and its results, continue the solver from the latest time folder", True)
+            obj.RestartFromLatestTime = False
+
+        if "StopOnStalledResiduals" not in obj.PropertiesList:
+            obj.addProperty("App::PropertyBool", "StopOnStalledResiduals", "Solver",
+                    "Write and stop a steady solver once its residuals reach a plateau or oscillate, see FoamCaseBuilder.convergence", True)
+            obj.StopOnStalledResiduals = False
+
+        if "ProfileReport" not in obj.PropertiesList:
+            obj.addProperty("App::PropertyString", "ProfileReport", "Solver",
+                    "Wall clock profile summary of the last solver run, see log.<solver>.profile.json", True)
\ No newline at end of file